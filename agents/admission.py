@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+Concurrency limit and bounded FIFO wait queue in front of an agent server's
+A2A endpoint; overflow is rejected with 429 and Retry-After
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_QUEUE_TIMEOUT = 10.0
+# Caller's remaining time, sent by the smart client with every A2A request
+DEADLINE_HEADER = b"x-request-timeout"
+
+class AdmissionController:
+    """Admits at most `max_concurrency` A2A requests at once.
+
+    Further requests wait in a FIFO queue of at most `max_queue`, each for no
+    longer than `queue_timeout` (or the caller's X-Request-Timeout when that is
+    shorter). A full queue or an expired wait is answered with 429 and a
+    Retry-After estimated from recent service times. A finishing request hands
+    its slot straight to the oldest waiter. Only POSTs are admission-controlled,
+    so agent cards stay reachable under load.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, max_queue: int = DEFAULT_MAX_QUEUE,
+                 queue_timeout: float = DEFAULT_QUEUE_TIMEOUT):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        # Exponentially weighted average of how long an admitted request runs
+        self._service_seconds = 1.0
+        self.stats = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def load(self) -> Dict[str, float]:
+        """Load hints for registry heartbeats"""
+        return {"in_flight": self.in_flight, "queue_depth": self.queue_depth}
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new caller"""
+        return max(1, math.ceil(self._service_seconds * (self.queue_depth + 1) / self.max_concurrency))
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a slot; False if the queue is full or the wait timed out"""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.stats["rejected_full"] += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        wait = self.queue_timeout if timeout is None else min(self.queue_timeout, timeout)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # The slot was handed over just as the wait ended: pass it on
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["rejected_timeout"] += 1
+            return False
+        self.stats["admitted"] += 1
+        return True
+
+    def release(self, service_seconds: Optional[float] = None):
+        """Free a slot, handing it to the oldest waiter if there is one"""
+        if service_seconds is not None:
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * service_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def wrap(self, app):
+        """ASGI app that applies admission control in front of `app`"""
+
+        async def admitted_app(scope, receive, send):
+            if scope["type"] != "http" or scope["method"] != "POST":
+                return await app(scope, receive, send)
+            if not await self.acquire(_caller_deadline(scope)):
+                return await self._reject(send)
+            start = time.perf_counter()
+            try:
+                await app(scope, receive, send)
+            finally:
+                self.release(time.perf_counter() - start)
+
+        return admitted_app
+
+    async def _reject(self, send):
+        body = json.dumps({"error": {"code": 429, "message": "Agent is at capacity, retry later"}}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [(b"content-type", b"application/json"), (b"retry-after", str(self.retry_after()).encode()),
+                        (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def _caller_deadline(scope) -> Optional[float]:
+    """Seconds the caller will still wait, from the X-Request-Timeout header"""
+    for name, value in scope.get("headers", []):
+        if name == DEADLINE_HEADER:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                return None
+    return None
@@ -5,20 +5,39 @@ A standalone booking agent that can handle reservations and bookings
 """
 
 from strands import Agent
-from strands.multiagent.a2a import A2AServer
+from starlette.responses import JSONResponse
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from registry.registry_client import RegistryClient
+from agents.booking_inventory import (DEFAULT_AUTOSAVE_INTERVAL, DEFAULT_CATALOG_PATH, DEFAULT_HOLD_TTL,
+                                      Inventory, inventory_tools)
+from agents.server import AgentServer, add_server_arguments, run_server, server_options
+from common.stub_model import add_model_arguments
+from common.telemetry import add_telemetry_arguments, setup_tracing
 import argparse
-import sys
 import atexit
 
-class BookingAgent:
+class BookingAgent(AgentServer):
     """Booking Agent with reservation capabilities"""
     
-    def __init__(self):
-        self.agent = Agent(
+    name = "booking_agent"
+    title = "Booking Agent"
+    icon = "🏨"
+    description = "Professional booking specialist for hotels, restaurants, travel, events and car rentals"
+    capabilities = ["hotel_booking", "restaurant_reservations", "travel_booking", "event_booking", "car_rental"]
+    ready_message = "💼 Ready to handle booking requests from other agents..."
+    
+    def __init__(self, inventory=None, **options):
+        super().__init__(**options)
+        # Availability and reservations shared by every conversation
+        self.inventory = inventory or Inventory.from_catalog()
+        self.inventory_tools = inventory_tools(self.inventory)
+    
+    def build_agent(self, memory):
+        return Agent(
+            model=self.model,
+            conversation_manager=memory,
+            tools=self.inventory_tools,
             system_prompt="""You are a professional booking and reservation specialist.
             
             You can help with various types of bookings and reservations:
@@ -29,8 +48,15 @@ class BookingAgent:
             - Car rental bookings
             - Activity and tour bookings
             
-            Provide helpful information about:
-            - Availability checking
+            For hotels, restaurants, events and car rentals, use your tools to work with live inventory:
+            - search_availability to find options with availability for the requested dates
+            - hold_reservation to hold the option the user picks (holds lapse after a while)
+            - confirm_reservation only once the user has agreed to the booking and its price
+            - cancel_reservation and get_reservation to manage existing reservations
+            Always quote reservation ids, dates and hold expiry times back to the user. Never claim
+            a booking was made unless a tool confirmed it.
+            
+            For other bookings, provide helpful information about:
             - Pricing and options
             - Booking procedures and requirements
             - Cancellation policies
@@ -39,86 +65,58 @@ class BookingAgent:
             
             Always be professional, detail-oriented, and provide actionable booking advice.""",
             name="booking_agent",
-            description="Professional booking specialist handling hotel, restaurant, travel, and event reservations with expertise in availability, pricing, and booking procedures."
+            description="Professional booking specialist handling hotel, restaurant, travel, event and car rental reservations with expertise in availability, pricing, and booking procedures.",
+            hooks=[self.model_metrics] if self.model_metrics else None,
+            # Concurrent conversations would interleave their streamed text on stdout
+            callback_handler=None
         )
     
-    def start_server(self, port=8081, host="localhost", registry_url=None):
-        """Start the booking agent as an A2A server"""
-        print(f"🏨 Starting Booking Agent A2A Server...")
-        print(f"📡 Host: {host}")
-        print(f"🔌 Port: {port}")
-        print(f"🌐 URL: http://{host}:{port}")
-        if registry_url:
-            print(f"📋 Registry: {registry_url}")
-        print("="*50)
-        
-        registry_client = None
-        
-        try:
-            # Register with custom registry if provided
-            if registry_url:
-                registry_client = RegistryClient(registry_url)
-                agent_url = f"http://{host}:{port}"
-                result = registry_client.register_agent(
-                    name="booking_agent",
-                    description="Professional booking specialist for hotels, restaurants, travel, and events",
-                    url=agent_url,
-                    capabilities=["hotel_booking", "restaurant_reservations", "travel_booking", "event_booking"]
-                )
-                if result:
-                    print("📋 Registered with custom registry")
-                    # Setup cleanup on exit
-                    atexit.register(lambda: registry_client.unregister_agent("booking_agent"))
-            
-            # Create A2A server with the booking agent
-            server = A2AServer(agent=self.agent, port=port, host=host)
-            
-            print("✅ Booking Agent server is ready!")
-            print("💼 Ready to handle booking requests from other agents...")
-            print("🛑 Press Ctrl+C to stop the server")
-            print()
-            
-            # Start serving (this blocks)
-            server.serve()
-            
-        except KeyboardInterrupt:
-            print("\n🛑 Shutting down Booking Agent server...")
-            if registry_client:
-                registry_client.unregister_agent("booking_agent")
-            sys.exit(0)
-        except Exception as e:
-            print(f"❌ Error starting server: {e}")
-            if registry_client:
-                registry_client.unregister_agent("booking_agent")
-            sys.exit(1)
+    def routes(self):
+        return [("/inventory/stats", self.inventory_stats)]
+    
+    def describe(self):
+        return [f"🗂️  Inventory: {len(self.inventory.resources)} resources, holds last {self.inventory.hold_ttl:g}s"]
+    
+    async def inventory_stats(self, request):
+        """GET /inventory/stats: live reservations and hold/confirm/cancel counters"""
+        return JSONResponse(self.inventory.report())
 
 def main():
     """Main entry point with CLI arguments"""
     parser = argparse.ArgumentParser(description="Booking Agent A2A Server")
+    add_server_arguments(parser, port=8081)
     parser.add_argument(
-        "--port", 
-        type=int, 
-        default=8081, 
-        help="Port to run the server on (default: 8081)"
+        "--inventory-catalog",
+        type=str,
+        default=DEFAULT_CATALOG_PATH,
+        help="JSON catalog of bookable hotels, restaurants, events and cars (default: agents/fixtures/inventory.json)"
     )
     parser.add_argument(
-        "--host", 
-        type=str, 
-        default="localhost", 
-        help="Host to bind the server to (default: localhost)"
+        "--inventory-snapshot",
+        type=str,
+        default=None,
+        help="Persist reservations to this file: restored at startup, saved periodically and on exit"
     )
     parser.add_argument(
-        "--registry",
-        type=str,
-        default="http://localhost:8000",
-        help="Agent registry URL (default: http://localhost:8000)"
+        "--hold-ttl",
+        type=float,
+        default=DEFAULT_HOLD_TTL,
+        help=f"Seconds a hold lasts unless confirmed (default: {DEFAULT_HOLD_TTL:g})"
     )
+    add_model_arguments(parser)
+    add_telemetry_arguments(parser)
     
     args = parser.parse_args()
+    setup_tracing("booking_agent", args.trace)
+    
+    inventory = Inventory.open(args.inventory_snapshot, catalog_path=args.inventory_catalog, hold_ttl=args.hold_ttl)
+    if args.inventory_snapshot:
+        inventory.start_autosave(args.inventory_snapshot, DEFAULT_AUTOSAVE_INTERVAL)
+        atexit.register(lambda: inventory.stop_autosave(args.inventory_snapshot))
     
     # Create and start booking agent server
-    booking_agent = BookingAgent()
-    booking_agent.start_server(port=args.port, host=args.host, registry_url=args.registry)
+    booking_agent = BookingAgent(inventory=inventory, **server_options(args))
+    run_server(booking_agent, args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
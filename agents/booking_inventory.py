@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Booking Inventory
+In-process availability and reservation engine for the booking agent: hotels,
+restaurants, events and car rentals, indexed per bookable unit by time interval
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+from strands import tool
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "inventory.json")
+# Seconds a hold keeps units reserved before it lapses unless confirmed
+DEFAULT_HOLD_TTL = 600.0
+DEFAULT_AUTOSAVE_INTERVAL = 30.0
+KINDS = ("hotel", "restaurant", "event", "car")
+HELD, CONFIRMED, CANCELLED, EXPIRED = "held", "confirmed", "cancelled", "expired"
+
+class InventoryError(Exception):
+    """A request the inventory can't satisfy: unknown resource, bad dates, no availability"""
+
+def parse_time(value: str) -> int:
+    """Seconds since the epoch for an ISO date or date-time (naive values are UTC)"""
+    try:
+        moment = datetime.datetime.fromisoformat(value.strip())
+    except (AttributeError, ValueError):
+        raise InventoryError(f"Invalid date/time {value!r}; use ISO format like 2025-07-01 or 2025-07-01T19:30")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return int(moment.timestamp())
+
+def format_time(seconds: int) -> str:
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M")
+
+def _normalize(location: str) -> str:
+    return " ".join(location.lower().replace(",", " ").split())
+
+class IntervalIndex:
+    """Reservations of one bookable unit (a room, table, seat or car) as
+    non-overlapping half-open intervals sorted by start. Because they don't
+    overlap, the ends are sorted too, so conflict checks and range queries
+    are binary searches."""
+
+    __slots__ = ("starts", "ends", "ids")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.ids: List[str] = []
+
+    def overlapping(self, start: int, end: int) -> range:
+        """Positions of the intervals overlapping [start, end)"""
+        return range(bisect_right(self.ends, start), bisect_left(self.starts, end))
+
+    def is_free(self, start: int, end: int) -> bool:
+        i = bisect_right(self.ends, start)
+        return i == len(self.starts) or self.starts[i] >= end
+
+    def add(self, start: int, end: int, reservation_id: str):
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, reservation_id)
+
+    def remove(self, start: int, reservation_id: str):
+        i = bisect_left(self.starts, start)
+        while self.ids[i] != reservation_id:
+            i += 1
+        del self.starts[i], self.ends[i], self.ids[i]
+
+    def __len__(self):
+        return len(self.starts)
+
+class Resource:
+    """Something bookable with `units` interchangeable units, each with its own
+    interval index. Events have a fixed `window`; other kinds are booked for
+    the requested range (or `duration` seconds from the start when no end is
+    given). Every change goes through the resource's own lock."""
+
+    def __init__(self, resource_id: str, kind: str, name: str, location: str, units: int = 1,
+                 duration: Optional[int] = None, window: Optional[Tuple[int, int]] = None,
+                 attributes: Optional[dict] = None):
+        if kind not in KINDS:
+            raise InventoryError(f"Unknown kind {kind!r}; expected one of {', '.join(KINDS)}")
+        self.id = resource_id
+        self.kind = kind
+        self.name = name
+        self.location = location
+        self.duration = duration
+        self.window = window
+        self.attributes = attributes or {}
+        self.units = [IntervalIndex() for _ in range(max(1, units))]
+        self.reservations: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.version = 0
+        self.stats = {"holds": 0, "confirms": 0, "cancels": 0, "conflicts": 0, "expired": 0}
+
+    def span(self, start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+        """The interval a booking starting at `start` occupies"""
+        if self.window:
+            return self.window
+        if start is None:
+            raise InventoryError(f"A start date/time is required to book {self.name}")
+        if end is None:
+            if not self.duration:
+                raise InventoryError(f"An end date is required to book {self.name}")
+            end = start + self.duration
+        if end <= start:
+            raise InventoryError("The end must be after the start")
+        return start, end
+
+    def _release(self, reservation: dict, status: str):
+        for unit in reservation["units"]:
+            self.units[unit].remove(reservation["start"], reservation["id"])
+        reservation["status"] = status
+        self.version += 1
+
+    def _expire(self, start: int, end: int, now: float):
+        """Lapse expired holds overlapping [start, end) so their units count as free"""
+        expired = set()
+        for index in self.units:
+            for i in index.overlapping(start, end):
+                reservation = self.reservations[index.ids[i]]
+                if reservation["status"] == HELD and reservation["expires_at"] <= now:
+                    expired.add(reservation["id"])
+        for reservation_id in expired:
+            self._release(self.reservations.pop(reservation_id), EXPIRED)
+            self.stats["expired"] += 1
+
+    def expire_all(self, now: float) -> int:
+        """Lapse every expired hold of the resource; caller holds the lock"""
+        expired = [r["id"] for r in self.reservations.values() if r["status"] == HELD and r["expires_at"] <= now]
+        for reservation_id in expired:
+            self._release(self.reservations.pop(reservation_id), EXPIRED)
+            self.stats["expired"] += 1
+        return len(expired)
+
+    def free_units(self, start: int, end: int, now: float) -> List[int]:
+        """Units free for the whole of [start, end); caller holds the lock"""
+        self._expire(start, end, now)
+        return [u for u, index in enumerate(self.units) if index.is_free(start, end)]
+
+    def describe(self) -> dict:
+        info = {"resource_id": self.id, "kind": self.kind, "name": self.name, "location": self.location,
+                "units": len(self.units), **self.attributes}
+        if self.window:
+            info["start"], info["end"] = format_time(self.window[0]), format_time(self.window[1])
+        return info
+
+    def to_dict(self) -> dict:
+        """Definition plus live reservations, for snapshots; caller holds the lock"""
+        return {"id": self.id, "kind": self.kind, "name": self.name, "location": self.location,
+                "units": len(self.units), "duration": self.duration,
+                "window": list(self.window) if self.window else None, "attributes": self.attributes,
+                "reservations": [dict(r, units=list(r["units"])) for r in self.reservations.values()]}
+
+class Inventory:
+    """Availability and reservations across many resources.
+
+    A booking is a hold (`hold`) that lapses after `hold_ttl` seconds unless
+    confirmed (`confirm`); either can be cancelled. Each operation touches one
+    resource and runs under that resource's lock only, so bookings of
+    different resources never wait on each other, and a hold of several units
+    either gets all of them or none. Expired holds are reclaimed when a booking,
+    search or lookup touches them, and by `expire_holds` (run with each report
+    and autosave tick) for ranges nobody queries.
+    """
+
+    def __init__(self, resources: Iterable[Resource] = (), hold_ttl: float = DEFAULT_HOLD_TTL):
+        self.hold_ttl = hold_ttl
+        self.resources: Dict[str, Resource] = {}
+        self._by_kind_location: Dict[Tuple[str, str], List[Resource]] = {}
+        for resource in resources:
+            self.add_resource(resource)
+        self._autosave: Optional[threading.Event] = None
+
+    def add_resource(self, resource: Resource):
+        self.resources[resource.id] = resource
+        self._by_kind_location.setdefault((resource.kind, _normalize(resource.location)), []).append(resource)
+
+    def resource(self, resource_id: str) -> Resource:
+        resource = self.resources.get(resource_id)
+        if resource is None:
+            raise InventoryError(f"Unknown resource {resource_id!r}")
+        return resource
+
+    def search(self, kind: str, location: str, start: Optional[str] = None, end: Optional[str] = None,
+               quantity: int = 1) -> List[dict]:
+        """Resources of a kind in a location with at least `quantity` units free for the range.
+        Events are matched when they take place within the range."""
+        start_at = parse_time(start) if start else None
+        end_at = parse_time(end) if end else None
+        now = time.time()
+        results = []
+        for resource in self._by_kind_location.get((kind, _normalize(location)), []):
+            if resource.window and ((start_at is not None and resource.window[1] <= start_at)
+                                    or (end_at is not None and resource.window[0] >= end_at)):
+                continue
+            span = resource.span(start_at, end_at) if resource.window or start_at is not None else None
+            if span is None:
+                results.append(resource.describe())
+                continue
+            with resource.lock:
+                free = len(resource.free_units(*span, now))
+            if free >= quantity:
+                results.append(dict(resource.describe(), available=free))
+        return results
+
+    def hold(self, resource_id: str, start: Optional[str] = None, end: Optional[str] = None,
+             quantity: int = 1, guest: Optional[str] = None) -> dict:
+        """Reserve `quantity` units for the range until the hold expires"""
+        resource = self.resource(resource_id)
+        start_at, end_at = resource.span(parse_time(start) if start else None, parse_time(end) if end else None)
+        if quantity < 1:
+            raise InventoryError("Quantity must be at least 1")
+        now = time.time()
+        with resource.lock:
+            free = resource.free_units(start_at, end_at, now)
+            if len(free) < quantity:
+                resource.stats["conflicts"] += 1
+                raise InventoryError(f"{resource.name} has only {len(free)} of {quantity} "
+                                     f"{'unit' if quantity == 1 else 'units'} free for that time")
+            reservation = {"id": f"{resource.id}:{uuid.uuid4().hex[:12]}", "resource_id": resource.id,
+                           "start": start_at, "end": end_at, "units": free[:quantity], "quantity": quantity,
+                           "guest": guest, "status": HELD, "created_at": now, "expires_at": now + self.hold_ttl}
+            for unit in reservation["units"]:
+                resource.units[unit].add(start_at, end_at, reservation["id"])
+            resource.reservations[reservation["id"]] = reservation
+            resource.version += 1
+            resource.stats["holds"] += 1
+            return self._view(resource, reservation)
+
+    def _find(self, reservation_id: str) -> Tuple[Resource, str]:
+        return self.resource(reservation_id.rsplit(":", 1)[0]), reservation_id
+
+    def confirm(self, reservation_id: str) -> dict:
+        """Turn a live hold into a confirmed reservation"""
+        resource, reservation_id = self._find(reservation_id)
+        with resource.lock:
+            reservation = resource.reservations.get(reservation_id)
+            if reservation is None:
+                raise InventoryError(f"No live reservation {reservation_id!r}; it may have expired or been cancelled")
+            if reservation["status"] == HELD:
+                if reservation["expires_at"] <= time.time():
+                    self._drop(resource, reservation, EXPIRED)
+                    resource.stats["expired"] += 1
+                    raise InventoryError(f"Hold {reservation_id} expired; place a new hold")
+                reservation["status"] = CONFIRMED
+                reservation["expires_at"] = None
+                resource.version += 1
+                resource.stats["confirms"] += 1
+            return self._view(resource, reservation)
+
+    def cancel(self, reservation_id: str) -> dict:
+        """Release a hold or a confirmed reservation"""
+        resource, reservation_id = self._find(reservation_id)
+        with resource.lock:
+            reservation = resource.reservations.get(reservation_id)
+            if reservation is None:
+                raise InventoryError(f"No live reservation {reservation_id!r}; it may have expired or been cancelled")
+            self._drop(resource, reservation, CANCELLED)
+            resource.stats["cancels"] += 1
+            return self._view(resource, reservation)
+
+    def get(self, reservation_id: str) -> dict:
+        """A live reservation; a hold past its expiry is dropped and reported as gone"""
+        resource, reservation_id = self._find(reservation_id)
+        with resource.lock:
+            reservation = resource.reservations.get(reservation_id)
+            if reservation is not None and reservation["status"] == HELD and reservation["expires_at"] <= time.time():
+                self._drop(resource, reservation, EXPIRED)
+                resource.stats["expired"] += 1
+                reservation = None
+            if reservation is None:
+                raise InventoryError(f"No live reservation {reservation_id!r}; it may have expired or been cancelled")
+            return self._view(resource, reservation)
+
+    def expire_holds(self) -> int:
+        """Drop every hold past its expiry, wherever it is; returns how many lapsed"""
+        now = time.time()
+        expired = 0
+        for resource in list(self.resources.values()):
+            with resource.lock:
+                expired += resource.expire_all(now)
+        return expired
+
+    @staticmethod
+    def _drop(resource: Resource, reservation: dict, status: str):
+        del resource.reservations[reservation["id"]]
+        resource._release(reservation, status)
+
+    @staticmethod
+    def _view(resource: Resource, reservation: dict) -> dict:
+        """Reservation as shown to callers"""
+        view = {"reservation_id": reservation["id"], "resource_id": resource.id, "name": resource.name,
+                "kind": resource.kind, "location": resource.location, "start": format_time(reservation["start"]),
+                "end": format_time(reservation["end"]), "quantity": reservation["quantity"],
+                "guest": reservation["guest"], "status": reservation["status"]}
+        if reservation["status"] == HELD:
+            view["hold_expires"] = format_time(int(reservation["expires_at"]))
+        return view
+
+    def report(self) -> dict:
+        """Resources, live reservations and operation counters, summed over resources"""
+        self.expire_holds()
+        totals = {"resources": len(self.resources), "held": 0, "confirmed": 0}
+        for resource in self.resources.values():
+            for name, value in resource.stats.items():
+                totals[name] = totals.get(name, 0) + value
+            for reservation in list(resource.reservations.values()):
+                totals[reservation["status"]] = totals.get(reservation["status"], 0) + 1
+        return totals
+
+    # Persistence
+
+    @property
+    def version(self) -> int:
+        return sum(resource.version for resource in self.resources.values())
+
+    def snapshot(self, path: str):
+        """Write every resource and live reservation to `path` atomically. Each
+        resource is copied under its own lock, so bookings continue meanwhile."""
+        resources = []
+        for resource in list(self.resources.values()):
+            with resource.lock:
+                resources.append(resource.to_dict())
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"saved_at": time.time(), "hold_ttl": self.hold_ttl, "resources": resources}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, hold_ttl: Optional[float] = None) -> "Inventory":
+        """Inventory restored from a snapshot; holds that expired meanwhile are dropped"""
+        with open(path) as f:
+            data = json.load(f)
+        inventory = cls(hold_ttl=data.get("hold_ttl", DEFAULT_HOLD_TTL) if hold_ttl is None else hold_ttl)
+        now = time.time()
+        for entry in data["resources"]:
+            resource = Resource(entry["id"], entry["kind"], entry["name"], entry["location"], entry["units"],
+                                duration=entry.get("duration"),
+                                window=tuple(entry["window"]) if entry.get("window") else None,
+                                attributes=entry.get("attributes"))
+            for reservation in entry.get("reservations", []):
+                if reservation["status"] == HELD and reservation["expires_at"] <= now:
+                    continue
+                for unit in reservation["units"]:
+                    resource.units[unit].add(reservation["start"], reservation["end"], reservation["id"])
+                resource.reservations[reservation["id"]] = reservation
+            inventory.add_resource(resource)
+        return inventory
+
+    @classmethod
+    def from_catalog(cls, path: str = DEFAULT_CATALOG_PATH, hold_ttl: float = DEFAULT_HOLD_TTL) -> "Inventory":
+        """Empty inventory over the resources in a catalog file. Event times are
+        given as `day_offset` from today plus `time` and `duration_minutes`."""
+        with open(path) as f:
+            catalog = json.load(f)
+        today = datetime.datetime.now(datetime.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        inventory = cls(hold_ttl=hold_ttl)
+        for entry in catalog["resources"]:
+            window = None
+            if "day_offset" in entry:
+                hour, minute = (int(part) for part in entry.get("time", "00:00").split(":"))
+                start = today + datetime.timedelta(days=entry["day_offset"], hours=hour, minutes=minute)
+                window = (int(start.timestamp()), int(start.timestamp()) + entry.get("duration_minutes", 120) * 60)
+            duration = entry["duration_minutes"] * 60 if "duration_minutes" in entry and not window else None
+            inventory.add_resource(Resource(entry["id"], entry["kind"], entry["name"], entry["location"],
+                                            entry.get("units", 1), duration=duration, window=window,
+                                            attributes=entry.get("attributes")))
+        return inventory
+
+    @classmethod
+    def open(cls, snapshot_path: Optional[str] = None, catalog_path: str = DEFAULT_CATALOG_PATH,
+             hold_ttl: float = DEFAULT_HOLD_TTL) -> "Inventory":
+        """Restore from `snapshot_path` when it exists, otherwise start from the catalog"""
+        if snapshot_path and os.path.exists(snapshot_path):
+            return cls.load(snapshot_path, hold_ttl=hold_ttl)
+        return cls.from_catalog(catalog_path, hold_ttl=hold_ttl)
+
+    def start_autosave(self, path: str, interval: float = DEFAULT_AUTOSAVE_INTERVAL):
+        """Snapshot to `path` from a background thread whenever something changed"""
+        if self._autosave:
+            return
+        stop = self._autosave = threading.Event()
+
+        def save():
+            saved = self.version
+            while not stop.wait(interval):
+                self.expire_holds()
+                if self.version != saved:
+                    saved = self.version
+                    try:
+                        self.snapshot(path)
+                    except OSError as e:
+                        print(f"⚠️  Inventory snapshot failed: {e}")
+
+        threading.Thread(target=save, name="inventory-autosave", daemon=True).start()
+
+    def stop_autosave(self, path: Optional[str] = None):
+        """Stop autosaving, writing a final snapshot to `path` if given"""
+        if self._autosave:
+            self._autosave.set()
+            self._autosave = None
+        if path:
+            self.snapshot(path)
+
+def inventory_tools(inventory: Inventory) -> list:
+    """Availability and reservation tools for an agent, backed by `inventory`"""
+
+    def run(operation, *args, **kwargs) -> str:
+        try:
+            return json.dumps(operation(*args, **kwargs))
+        except InventoryError as e:
+            return json.dumps({"error": str(e)})
+
+    @tool
+    def search_availability(kind: str, location: str, start: str = "", end: str = "", quantity: int = 1) -> str:
+        """Find hotels, restaurants, events or car rentals in a city with availability for a date range.
+
+        Args:
+            kind: One of "hotel", "restaurant", "event" or "car"
+            location: City, e.g. "Paris"
+            start: Check-in, pick-up or reservation date/time in ISO format, e.g. "2025-07-01" or "2025-07-01T19:30"
+            end: Check-out or drop-off date/time in ISO format (restaurants default to one seating)
+            quantity: Rooms, tables, tickets or cars needed
+        """
+        return run(inventory.search, kind, location, start or None, end or None, quantity)
+
+    @tool
+    def hold_reservation(resource_id: str, start: str = "", end: str = "", quantity: int = 1,
+                         guest_name: str = "") -> str:
+        """Place a temporary hold on a resource; it lapses unless confirmed with confirm_reservation.
+
+        Args:
+            resource_id: The resource_id from search_availability
+            start: Start date/time in ISO format (not needed for events)
+            end: End date/time in ISO format (not needed for events and restaurants)
+            quantity: Rooms, tables, tickets or cars to hold
+            guest_name: Name the reservation is under
+        """
+        return run(inventory.hold, resource_id, start or None, end or None, quantity, guest_name or None)
+
+    @tool
+    def confirm_reservation(reservation_id: str) -> str:
+        """Confirm a held reservation. Only do this once the user has agreed to the booking.
+
+        Args:
+            reservation_id: The reservation_id returned by hold_reservation
+        """
+        return run(inventory.confirm, reservation_id)
+
+    @tool
+    def cancel_reservation(reservation_id: str) -> str:
+        """Cancel a held or confirmed reservation.
+
+        Args:
+            reservation_id: The reservation_id of the hold or reservation
+        """
+        return run(inventory.cancel, reservation_id)
+
+    @tool
+    def get_reservation(reservation_id: str) -> str:
+        """Look up the details and status of a reservation.
+
+        Args:
+            reservation_id: The reservation_id of the hold or reservation
+        """
+        return run(inventory.get, reservation_id)
+
+    return [search_availability, hold_reservation, confirm_reservation, cancel_reservation, get_reservation]
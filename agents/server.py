@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Agent Server
+A2A server scaffolding shared by the specialist agents: one agent per
+conversation, admission control, metrics, health and session endpoints, and
+registration with the agent registry
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from strands.models import BedrockModel
+from strands.multiagent.a2a import A2AServer
+from starlette.responses import JSONResponse
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from registry.registry_client import RegistryClient
+from agents.admission import (DEFAULT_MAX_CONCURRENCY, DEFAULT_MAX_QUEUE, DEFAULT_QUEUE_TIMEOUT,
+                              AdmissionController)
+from common.conversation_memory import DEFAULT_MAX_TOKENS, TokenBudgetConversationManager
+from common.stub_model import build_model
+from common.telemetry import Metrics, ModelMetrics, instrument, tracing_enabled
+import asyncio
+import atexit
+import uvicorn
+import weakref
+
+# Conversations (A2A context ids) kept in memory; past this the least recently used is dropped
+DEFAULT_MAX_CONTEXTS = 256
+# Threads running model calls; each streaming answer holds one for its whole duration
+DEFAULT_WORKERS = 32
+DEFAULT_LEASE_TTL = 30.0
+
+class AgentServer:
+    """A specialist agent served over A2A, one agent (and history) per conversation.
+
+    Subclasses describe themselves through the class attributes below and build
+    a conversation's agent in `build_agent`; they can add routes and startup
+    lines through `routes` and `describe`.
+    """
+
+    # Registry name, display title and icon, registry description and capabilities
+    name = None
+    title = None
+    icon = "🤖"
+    description = None
+    capabilities = []
+    ready_message = "💬 Ready to receive requests from other agents..."
+
+    def __init__(self, max_contexts=DEFAULT_MAX_CONTEXTS, workers=DEFAULT_WORKERS,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_queue=DEFAULT_MAX_QUEUE,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT, memory_tokens=DEFAULT_MAX_TOKENS, model=None, metrics=None):
+        self.max_contexts = max_contexts
+        self.memory_tokens = memory_tokens
+        # Memory manager of each live conversation; entries go when the conversation is evicted
+        self.memories = weakref.WeakValueDictionary()
+        self.workers = workers
+        # Set by start_server(); GET /health reports ready once registered (if there is a registry)
+        self.registry_url = None
+        self.registered = False
+        # Bounds the requests running and waiting; its load is reported through heartbeats
+        self.admission = AdmissionController(max_concurrency, max_queue, queue_timeout)
+        # One model client shared by every conversation's agent, so a new conversation costs
+        # a cheap Agent object rather than a new client
+        self.model = model or BedrockModel()
+        # Request, model-call and token metrics served at GET /metrics (None: not recorded)
+        self.metrics = metrics
+        self.model_metrics = ModelMetrics(metrics) if metrics else None
+        if metrics:
+            metrics.gauge("admission_in_flight", "Requests admitted and running", fn=lambda: self.admission.in_flight)
+            metrics.gauge("admission_queue_depth", "Requests waiting for a slot", fn=lambda: self.admission.queue_depth)
+
+    def create_agent(self, context_id=None):
+        """Fresh agent with its own history for one A2A conversation (context id)"""
+        memory = TokenBudgetConversationManager(max_tokens=self.memory_tokens)
+        if context_id is not None:
+            self.memories[context_id] = memory
+        return self.build_agent(memory)
+
+    def build_agent(self, memory):
+        """The agent answering one conversation, keeping its history in `memory`"""
+        raise NotImplementedError
+
+    def routes(self):
+        """Extra (path, handler) GET routes of this agent"""
+        return []
+
+    def describe(self):
+        """Extra lines for the startup banner"""
+        return []
+
+    async def health(self, request):
+        """GET /health: readiness probe, 503 until the agent is registered with its registry"""
+        ready = self.registered or not self.registry_url
+        return JSONResponse({"status": "ready" if ready else "unregistered", **self.admission.load()},
+                            status_code=200 if ready else 503)
+
+    async def sessions(self, request):
+        """GET /sessions: history size and summaries of each live conversation"""
+        sessions = {context_id: memory.stats() for context_id, memory in list(self.memories.items())
+                    if memory.metrics["turns"]}
+        return JSONResponse({"count": len(sessions), "sessions": sessions})
+
+    def serve(self, server):
+        """Serve the A2A app on an event loop whose thread pool has `workers` threads,
+        so that many conversations can wait on the model at once"""
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="model"))
+        asyncio.set_event_loop(loop)
+        app = server.to_starlette_app()
+        app.add_route("/health", self.health, methods=["GET"])
+        app.add_route("/sessions", self.sessions, methods=["GET"])
+        for path, handler in self.routes():
+            app.add_route(path, handler, methods=["GET"])
+        if self.metrics:
+            app.add_route("/metrics", self.metrics.endpoint, methods=["GET"])
+        # Outermost, so requests waiting for admission count as in flight
+        app = instrument(self.admission.wrap(app), self.metrics)
+        config = uvicorn.Config(app, host=server.host, port=server.port)
+        loop.run_until_complete(uvicorn.Server(config).serve())
+
+    def start_server(self, port, host="localhost", registry_url=None, lease_ttl=DEFAULT_LEASE_TTL):
+        """Register with the registry (if given) and serve the agent over A2A until stopped"""
+        print(f"{self.icon} Starting {self.title} A2A Server...")
+        print(f"📡 Host: {host}")
+        print(f"🔌 Port: {port}")
+        print(f"🌐 URL: http://{host}:{port}")
+        print(f"🧠 Model: {self.model.get_config().get('model_id')}")
+        print(f"🧵 Conversations: up to {self.max_contexts} kept, {self.workers} model workers")
+        print(f"🚦 Admission: {self.admission.max_concurrency} concurrent, {self.admission.max_queue} queued, "
+              f"{self.admission.queue_timeout:g}s max wait")
+        for line in self.describe():
+            print(line)
+        print(f"📈 Metrics: {'GET /metrics' if self.metrics else 'off'}, tracing {'on' if tracing_enabled() else 'off'}")
+        if registry_url:
+            print(f"📋 Registry: {registry_url}")
+        print("="*50)
+
+        registry_client = None
+
+        try:
+            # Register with custom registry if provided
+            if registry_url:
+                self.registry_url = registry_url
+                registry_client = RegistryClient(registry_url)
+                result = registry_client.register_agent(
+                    name=self.name,
+                    description=self.description,
+                    url=f"http://{host}:{port}",
+                    capabilities=self.capabilities,
+                    ttl=lease_ttl
+                )
+                self.registered = bool(result)
+                if result:
+                    print("📋 Registered with custom registry")
+                    registry_client.start_heartbeat(self.name, load_fn=self.admission.load)
+                    # Setup cleanup on exit
+                    atexit.register(lambda: registry_client.unregister_agent(self.name))
+
+            # Each A2A context id gets its own agent (and history), so conversations run
+            # concurrently; A2A-compliant streaming sends answer text as appended artifact chunks
+            server = A2AServer(agent_factory=self.create_agent, max_contexts=self.max_contexts,
+                               port=port, host=host, enable_a2a_compliant_streaming=True)
+
+            print(f"✅ {self.title} server is ready!")
+            print(self.ready_message)
+            print("🛑 Press Ctrl+C to stop the server")
+            print()
+
+            # Start serving (this blocks)
+            self.serve(server)
+
+        except KeyboardInterrupt:
+            print(f"\n🛑 Shutting down {self.title} server...")
+            if registry_client:
+                registry_client.unregister_agent(self.name)
+            sys.exit(0)
+        except Exception as e:
+            print(f"❌ Error starting server: {e}")
+            if registry_client:
+                registry_client.unregister_agent(self.name)
+            sys.exit(1)
+
+def add_server_arguments(parser, port):
+    """Options every agent server takes: address, registry, conversations and admission control"""
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=port,
+        help=f"Port to run the server on (default: {port})"
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="localhost",
+        help="Host to bind the server to (default: localhost)"
+    )
+    parser.add_argument(
+        "--registry",
+        type=str,
+        default="http://localhost:8000",
+        help="Agent registry URL (default: http://localhost:8000)"
+    )
+    parser.add_argument(
+        "--lease-ttl",
+        type=float,
+        default=DEFAULT_LEASE_TTL,
+        help=f"Registry lease in seconds, renewed by heartbeats (default: {DEFAULT_LEASE_TTL:g})"
+    )
+    parser.add_argument(
+        "--max-contexts",
+        type=int,
+        default=DEFAULT_MAX_CONTEXTS,
+        help=f"Conversations kept in memory before the least recently used is dropped (default: {DEFAULT_MAX_CONTEXTS})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Threads for model calls, i.e. answers generated at once (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help=f"Requests handled at once; more wait in the queue (default: {DEFAULT_MAX_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=DEFAULT_MAX_QUEUE,
+        help=f"Requests allowed to wait; beyond this they get 429 (default: {DEFAULT_MAX_QUEUE})"
+    )
+    parser.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=DEFAULT_QUEUE_TIMEOUT,
+        help=f"Seconds a request may wait for a slot before it gets 429 (default: {DEFAULT_QUEUE_TIMEOUT:g})"
+    )
+    parser.add_argument(
+        "--memory-tokens",
+        type=int,
+        default=DEFAULT_MAX_TOKENS,
+        help=f"Token budget per conversation; older turns are summarized (default: {DEFAULT_MAX_TOKENS})"
+    )
+
+def server_options(args) -> dict:
+    """AgentServer keyword arguments from parsed add_server_arguments (and model/telemetry) options"""
+    return {
+        "max_contexts": args.max_contexts,
+        "workers": args.workers,
+        "max_concurrency": args.max_concurrency,
+        "max_queue": args.max_queue,
+        "queue_timeout": args.queue_timeout,
+        "memory_tokens": args.memory_tokens,
+        "model": build_model(args),
+        "metrics": None if args.no_metrics else Metrics()
+    }
+
+def run_server(agent: AgentServer, args):
+    """Serve `agent` with the address and registry options parsed by add_server_arguments"""
+    agent.start_server(port=args.port, host=args.host, registry_url=args.registry, lease_ttl=args.lease_ttl)
@@ -5,23 +5,43 @@ A standalone weather agent that can be started as an A2A server
 """
 
 from strands import Agent
-from strands.multiagent.a2a import A2AServer
+from starlette.responses import JSONResponse
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from registry.registry_client import RegistryClient
+from agents.server import AgentServer, add_server_arguments, run_server, server_options
+from agents.weather_data import (DEFAULT_BUCKET_SECONDS, DEFAULT_FIXTURE_PATH, PROVIDERS, FixtureWeatherProvider,
+                                 OpenMeteoWeatherProvider, WeatherLookup, weather_tool)
+from common.stub_model import add_model_arguments
+from common.telemetry import add_telemetry_arguments, setup_tracing
 import argparse
-import sys
-import atexit
 
-class WeatherAgent:
+class WeatherAgent(AgentServer):
     """Weather Agent with enhanced capabilities"""
     
-    def __init__(self):
-        self.agent = Agent(
+    name = "weather_agent"
+    title = "Weather Agent"
+    icon = "🌤️ "
+    description = "Professional weather expert providing current weather information and forecasts"
+    capabilities = ["weather_info", "forecasts", "weather_advice"]
+    ready_message = "💬 Ready to receive weather requests from other agents..."
+    
+    def __init__(self, weather_provider=None, weather_bucket=DEFAULT_BUCKET_SECONDS, **options):
+        super().__init__(**options)
+        # Weather data shared by every conversation: one fetch per city and time bucket
+        self.weather = WeatherLookup(weather_provider or OpenMeteoWeatherProvider(), bucket_seconds=weather_bucket)
+        self.weather_tool = weather_tool(self.weather)
+    
+    def build_agent(self, memory):
+        return Agent(
+            model=self.model,
+            conversation_manager=memory,
+            tools=[self.weather_tool],
             system_prompt="""You are a professional weather expert and meteorologist. 
             
-            Provide accurate, detailed weather information for any location requested. Include:
+            Provide accurate, detailed weather information for any location requested.
+            Use the get_weather tool to look up current conditions and the forecast, and base
+            your answer on its data. Include:
             - Current conditions (temperature, humidity, wind, precipitation)
             - Weather description and outlook
             - Practical advice (clothing recommendations, travel considerations)
@@ -29,86 +49,59 @@ class WeatherAgent:
             
             Always be helpful and provide actionable weather insights.""",
             name="weather_agent",
-            description="Professional weather expert providing current weather information, forecasts, and practical weather advice for any location worldwide."
+            description="Professional weather expert providing current weather information, forecasts, and practical weather advice for any location worldwide.",
+            hooks=[self.model_metrics] if self.model_metrics else None,
+            # Concurrent conversations would interleave their streamed text on stdout
+            callback_handler=None
         )
     
-    def start_server(self, port=8080, host="localhost", registry_url=None):
-        """Start the weather agent as an A2A server"""
-        print(f"🌤️  Starting Weather Agent A2A Server...")
-        print(f"📡 Host: {host}")
-        print(f"🔌 Port: {port}")
-        print(f"🌐 URL: http://{host}:{port}")
-        if registry_url:
-            print(f"📋 Registry: {registry_url}")
-        print("="*50)
-        
-        registry_client = None
-        
-        try:
-            # Register with custom registry if provided
-            if registry_url:
-                registry_client = RegistryClient(registry_url)
-                agent_url = f"http://{host}:{port}"
-                result = registry_client.register_agent(
-                    name="weather_agent",
-                    description="Professional weather expert providing current weather information and forecasts",
-                    url=agent_url,
-                    capabilities=["weather_info", "forecasts", "weather_advice"]
-                )
-                if result:
-                    print("📋 Registered with custom registry")
-                    # Setup cleanup on exit
-                    atexit.register(lambda: registry_client.unregister_agent("weather_agent"))
-            
-            # Create A2A server with the weather agent
-            server = A2AServer(agent=self.agent, port=port, host=host)
-            
-            print("✅ Weather Agent server is ready!")
-            print("💬 Ready to receive weather requests from other agents...")
-            print("🛑 Press Ctrl+C to stop the server")
-            print()
-            
-            # Start serving (this blocks)
-            server.serve()
-            
-        except KeyboardInterrupt:
-            print("\n🛑 Shutting down Weather Agent server...")
-            if registry_client:
-                registry_client.unregister_agent("weather_agent")
-            sys.exit(0)
-        except Exception as e:
-            print(f"❌ Error starting server: {e}")
-            if registry_client:
-                registry_client.unregister_agent("weather_agent")
-            sys.exit(1)
+    def routes(self):
+        return [("/weather/stats", self.weather_stats)]
+    
+    def describe(self):
+        return [f"🌡️  Weather data: {self.weather.provider.name}, cached per {self.weather.bucket_seconds:g}s"]
+    
+    async def weather_stats(self, request):
+        """GET /weather/stats: weather data lookups, cache hits and provider calls"""
+        return JSONResponse(self.weather.report())
 
 def main():
     """Main entry point with CLI arguments"""
     parser = argparse.ArgumentParser(description="Weather Agent A2A Server")
+    add_server_arguments(parser, port=8080)
     parser.add_argument(
-        "--port", 
-        type=int, 
-        default=8080, 
-        help="Port to run the server on (default: 8080)"
+        "--weather-provider",
+        choices=sorted(PROVIDERS),
+        default=OpenMeteoWeatherProvider.name,
+        help=f"Weather data source; 'fixture' reads canned data for offline runs (default: {OpenMeteoWeatherProvider.name})"
     )
     parser.add_argument(
-        "--host", 
-        type=str, 
-        default="localhost", 
-        help="Host to bind the server to (default: localhost)"
+        "--weather-fixture",
+        type=str,
+        default=DEFAULT_FIXTURE_PATH,
+        help="JSON file used by the fixture provider (default: agents/fixtures/weather.json)"
     )
     parser.add_argument(
-        "--registry",
-        type=str,
-        default="http://localhost:8000",
-        help="Agent registry URL (default: http://localhost:8000)"
+        "--weather-bucket",
+        type=float,
+        default=DEFAULT_BUCKET_SECONDS,
+        help=f"Seconds weather data is reused per location (default: {DEFAULT_BUCKET_SECONDS:g})"
     )
+    add_model_arguments(parser)
+    add_telemetry_arguments(parser)
     
     args = parser.parse_args()
+    setup_tracing("weather_agent", args.trace)
+    
+    if args.weather_provider == FixtureWeatherProvider.name:
+        weather_provider = FixtureWeatherProvider(args.weather_fixture)
+    else:
+        weather_provider = OpenMeteoWeatherProvider()
     
     # Create and start weather agent server
-    weather_agent = WeatherAgent()
-    weather_agent.start_server(port=args.port, host=args.host, registry_url=args.registry)
+    weather_agent = WeatherAgent(weather_provider=weather_provider, weather_bucket=args.weather_bucket,
+                                 **server_options(args))
+    run_server(weather_agent, args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
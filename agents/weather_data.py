@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Weather Data
+Structured weather lookups for the weather agent: pluggable providers behind a
+cache keyed by location and time bucket, with concurrent lookups coalesced
+"""
+
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Optional
+import httpx
+from strands import tool
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "weather.json")
+# Lookups for a location within the same bucket share one provider fetch
+DEFAULT_BUCKET_SECONDS = 600.0
+DEFAULT_MAX_ENTRIES = 1024
+FORECAST_DAYS = 3
+
+# WMO weather interpretation codes, as used by Open-Meteo
+WEATHER_CODES = {
+    0: "clear sky", 1: "mainly clear", 2: "partly cloudy", 3: "overcast", 45: "fog", 48: "freezing fog",
+    51: "light drizzle", 53: "drizzle", 55: "dense drizzle", 56: "freezing drizzle", 57: "freezing drizzle",
+    61: "light rain", 63: "rain", 65: "heavy rain", 66: "freezing rain", 67: "freezing rain",
+    71: "light snow", 73: "snow", 75: "heavy snow", 77: "snow grains", 80: "light showers", 81: "showers",
+    82: "violent showers", 85: "snow showers", 86: "heavy snow showers", 95: "thunderstorm",
+    96: "thunderstorm with hail", 99: "thunderstorm with heavy hail"
+}
+
+def normalize_location(location: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a location ("Paris,  FR" -> "paris, fr")"""
+    parts = (" ".join(re.findall(r"[\w]+", part.lower().replace("'", ""))) for part in location.split(","))
+    return ", ".join(part for part in parts if part)
+
+class WeatherProvider:
+    """Interface for weather data sources.
+
+    `fetch(location)` returns a dict with `location`, `current` (temperature_c,
+    humidity, wind_kph, precipitation_mm, conditions), `forecast` (one entry per
+    day: date, high_c, low_c, conditions, precipitation_chance) and `source`,
+    or None when the location is unknown.
+    """
+
+    name = "provider"
+
+    def fetch(self, location: str) -> Optional[dict]:
+        raise NotImplementedError
+
+class FixtureWeatherProvider(WeatherProvider):
+    """Canned weather from a JSON file, for offline runs and tests.
+
+    The file maps normalized locations to `current` and `forecast` data, with
+    forecast days given as `day_offset` from today, plus optional `aliases`.
+    `delay` simulates a slow upstream.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path: str = DEFAULT_FIXTURE_PATH, delay: float = 0.0):
+        self.path = path
+        self.delay = delay
+        with open(path) as f:
+            data = json.load(f)
+        self.locations = {normalize_location(name): entry for name, entry in data["locations"].items()}
+        self.aliases = {normalize_location(alias): normalize_location(name)
+                        for alias, name in data.get("aliases", {}).items()}
+
+    def fetch(self, location: str) -> Optional[dict]:
+        if self.delay:
+            time.sleep(self.delay)
+        key = normalize_location(location)
+        key = self.aliases.get(key, key)
+        # "Paris, France" falls back to "paris" when only the city is in the file
+        entry = self.locations.get(key) or self.locations.get(key.split(", ")[0])
+        if entry is None:
+            return None
+        today = datetime.date.today()
+        forecast = [dict({k: v for k, v in day.items() if k != "day_offset"},
+                         date=(today + datetime.timedelta(days=day.get("day_offset", i))).isoformat())
+                    for i, day in enumerate(entry.get("forecast", []))]
+        return {"location": entry.get("name", location), "current": dict(entry["current"]),
+                "forecast": forecast, "source": self.name}
+
+class OpenMeteoWeatherProvider(WeatherProvider):
+    """Live weather from Open-Meteo (no API key): geocodes the location, then
+    fetches current conditions and a short daily forecast"""
+
+    name = "open-meteo"
+    GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+    def __init__(self, timeout: float = 10.0):
+        self.client = httpx.Client(timeout=timeout)
+
+    def fetch(self, location: str) -> Optional[dict]:
+        city = location.split(",")[0].strip()
+        response = self.client.get(self.GEOCODING_URL, params={"name": city, "count": 1})
+        response.raise_for_status()
+        results = response.json().get("results")
+        if not results:
+            return None
+        place = results[0]
+        response = self.client.get(self.FORECAST_URL, params={
+            "latitude": place["latitude"],
+            "longitude": place["longitude"],
+            "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,precipitation,weather_code",
+            "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weather_code",
+            "forecast_days": FORECAST_DAYS,
+            "timezone": "auto"
+        })
+        response.raise_for_status()
+        data = response.json()
+        current, daily = data["current"], data["daily"]
+        name = ", ".join(part for part in (place.get("name"), place.get("country")) if part)
+        return {
+            "location": name,
+            "current": {
+                "temperature_c": current["temperature_2m"],
+                "humidity": current["relative_humidity_2m"],
+                "wind_kph": current["wind_speed_10m"],
+                "precipitation_mm": current["precipitation"],
+                "conditions": WEATHER_CODES.get(current["weather_code"], "unknown")
+            },
+            "forecast": [
+                {"date": date, "high_c": high, "low_c": low, "conditions": WEATHER_CODES.get(code, "unknown"),
+                 "precipitation_chance": chance}
+                for date, high, low, chance, code in zip(
+                    daily["time"], daily["temperature_2m_max"], daily["temperature_2m_min"],
+                    daily["precipitation_probability_max"], daily["weather_code"])
+            ],
+            "source": self.name
+        }
+
+    def close(self):
+        self.client.close()
+
+PROVIDERS = {provider.name: provider for provider in (FixtureWeatherProvider, OpenMeteoWeatherProvider)}
+
+class WeatherLookup:
+    """Cached, coalesced weather lookups in front of a provider.
+
+    Results (including "unknown location") are cached per normalized location
+    and time bucket of `bucket_seconds`, so data is refreshed once per bucket
+    and the cache holds at most `max_entries` (least recently used go first).
+    Concurrent misses for the same key are single-flighted: one caller fetches
+    and the others wait for its result. Provider errors are not cached.
+    """
+
+    def __init__(self, provider: WeatherProvider, bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.provider = provider
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Optional[dict]]" = OrderedDict()  # (location, bucket) -> data
+        self._in_flight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "cache_hits": 0, "coalesced": 0, "provider_calls": 0,
+                      "provider_errors": 0, "provider_seconds": 0.0}
+
+    def _key(self, location: str) -> tuple:
+        return normalize_location(location), int(time.time() // self.bucket_seconds)
+
+    def get(self, location: str) -> Optional[dict]:
+        """Weather for a location, or None if the provider doesn't know it"""
+        key = self._key(location)
+        leader = False
+        with self._lock:
+            self.stats["lookups"] += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return self._entries[key]
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.stats["coalesced"] += 1
+            else:
+                flight = self._in_flight[key] = Future()
+                self.stats["provider_calls"] += 1
+                leader = True
+        if not leader:
+            return flight.result()
+        start = time.perf_counter()
+        try:
+            data = self.provider.fetch(location)
+        except Exception as e:
+            with self._lock:
+                self.stats["provider_errors"] += 1
+                del self._in_flight[key]
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            self.stats["provider_seconds"] += time.perf_counter() - start
+            self._store(key, data)
+            del self._in_flight[key]
+        flight.set_result(data)
+        return data
+
+    def _store(self, key: tuple, data: Optional[dict]):
+        self._entries[key] = data
+        # Entries from past buckets can never be hit again
+        while self._entries and next(iter(self._entries))[1] < key[1]:
+            self._entries.popitem(last=False)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def report(self) -> dict:
+        """Counters plus cache size and hit rate"""
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._entries), provider=self.provider.name)
+        stats["hit_rate"] = (stats["cache_hits"] + stats["coalesced"]) / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+def weather_tool(lookup: WeatherLookup):
+    """`get_weather` tool for an agent, answering from `lookup`"""
+
+    @tool
+    def get_weather(location: str) -> str:
+        """Get current weather conditions and a short daily forecast for a location.
+
+        Args:
+            location: City name, optionally with country, e.g. "Paris, France"
+        """
+        try:
+            data = lookup.get(location)
+        except Exception as e:
+            return json.dumps({"error": f"Weather data unavailable for {location}: {e}"})
+        if data is None:
+            return json.dumps({"error": f"Unknown location: {location}"})
+        return json.dumps(data)
+
+    return get_weather
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+A2A Transport
+Minimal pooled JSON-RPC client for sending messages straight to A2A agents
+"""
+
+import asyncio
+import httpx
+import json
+import threading
+import uuid
+import weakref
+from typing import AsyncIterator, NamedTuple, Optional
+from common.telemetry import SpanKind, inject, span
+
+AGENT_CARD_PATHS = ["/.well-known/agent-card.json", "/.well-known/agent.json"]
+DEFAULT_TIMEOUT = 300.0
+# Seconds the caller will still wait for an answer; agents can skip work nobody will read
+DEADLINE_HEADER = "X-Request-Timeout"
+
+class A2AError(Exception):
+    """An A2A agent returned an error or an unusable response"""
+
+class CardFetch(NamedTuple):
+    """Result of an agent card request; `card` is None when the server answered 304"""
+    card: Optional[dict]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    @property
+    def not_modified(self) -> bool:
+        return self.card is None
+
+def build_message_request(text: str, method: str = "message/send", context_id: Optional[str] = None,
+                          deadline: Optional[float] = None) -> dict:
+    """JSON-RPC request carrying a single user text message"""
+    message = {
+        "kind": "message",
+        "role": "user",
+        "messageId": uuid.uuid4().hex,
+        "parts": [{"kind": "text", "text": text}]
+    }
+    if context_id:
+        message["contextId"] = context_id
+    if deadline is not None:
+        message["metadata"] = {"timeout": round(deadline, 3)}
+    return {
+        "jsonrpc": "2.0",
+        "id": uuid.uuid4().hex,
+        "method": method,
+        "params": {"message": message}
+    }
+
+def _parts_text(parts: list) -> str:
+    """Concatenate the text parts of an A2A message or artifact"""
+    return "".join(part.get("text", "") for part in parts or [] if part.get("kind", "text") == "text")
+
+def extract_text(result: dict) -> str:
+    """Pull the answer text out of a message/send result (a Message or a Task)"""
+    if result.get("kind") == "message":
+        return _parts_text(result.get("parts")).strip()
+    artifacts = "\n".join(_parts_text(a.get("parts")) for a in result.get("artifacts") or [])
+    if artifacts.strip():
+        return artifacts.strip()
+    status_message = (result.get("status") or {}).get("message") or {}
+    return _parts_text(status_message.get("parts")).strip()
+
+def deadline_headers(deadline: Optional[float]) -> dict:
+    """Headers passing the caller's remaining time to the agent"""
+    return {DEADLINE_HEADER: f"{deadline:.3f}"} if deadline is not None else {}
+
+def _unwrap(response: httpx.Response) -> dict:
+    """Raise for HTTP/JSON-RPC errors, return the JSON-RPC result"""
+    response.raise_for_status()
+    body = response.json()
+    if body.get("error"):
+        raise A2AError(body["error"].get("message", str(body["error"])))
+    return body.get("result") or {}
+
+def stream_event_text(result: dict, streamed_status: bool) -> str:
+    """Answer text carried by one message/stream event.
+
+    A2A-compliant agents stream text as appended artifact chunks; legacy strands
+    servers stream it as working-status messages and then repeat the whole answer
+    as an artifact, which is skipped once status text has been seen.
+    """
+    kind = result.get("kind")
+    if kind == "artifact-update":
+        return "" if streamed_status else _parts_text((result.get("artifact") or {}).get("parts"))
+    if kind == "status-update":
+        return _parts_text(((result.get("status") or {}).get("message") or {}).get("parts"))
+    if kind == "message":
+        return _parts_text(result.get("parts"))
+    return ""
+
+def card_to_agent(url: str, card: dict) -> dict:
+    """Registry-style agent record (name, description, url, capabilities) from an agent card"""
+    capabilities = []
+    for skill in card.get("skills") or []:
+        capabilities.append(skill.get("id") or skill.get("name", ""))
+        capabilities.extend(skill.get("tags") or [])
+    name = card.get("name", url)
+    return {
+        "name": name,
+        "description": card.get("description", ""),
+        "url": url,
+        "instance_id": f"{name}@{url}",
+        "capabilities": [c for c in capabilities if c]
+    }
+
+class A2ATransport:
+    """Pooled sync/async HTTP client for A2A message/send and agent cards"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, pool_size: int = 20):
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.timeout = timeout
+        # Created on first use: building an SSL context costs more than a warm client start
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+        # httpx async pools are bound to the event loop that first used them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> httpx.Client:
+        """Pooled sync client"""
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout, limits=self.limits)
+            return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Pooled async client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._async_clients[loop] = client
+        return client
+
+    def send(self, url: str, text: str, context_id: Optional[str] = None, timeout: Optional[float] = None,
+             deadline: Optional[float] = None) -> str:
+        """Send a message to an agent and return its text answer.
+        `deadline` is the seconds left to answer: it bounds the call and is passed to the agent."""
+        with span("a2a message/send", {"url.full": url}, kind=SpanKind.CLIENT):
+            response = self.client.post(url, json=build_message_request(text, context_id=context_id,
+                                                                        deadline=deadline),
+                                        headers=inject(deadline_headers(deadline)),
+                                        timeout=timeout or deadline or self.timeout)
+            return extract_text(_unwrap(response))
+
+    async def send_async(self, url: str, text: str, context_id: Optional[str] = None,
+                         timeout: Optional[float] = None, deadline: Optional[float] = None) -> str:
+        """Async variant of send()"""
+        with span("a2a message/send", {"url.full": url}, kind=SpanKind.CLIENT):
+            response = await self._async_client().post(
+                url, json=build_message_request(text, context_id=context_id, deadline=deadline),
+                headers=inject(deadline_headers(deadline)), timeout=timeout or deadline or self.timeout
+            )
+            return extract_text(_unwrap(response))
+
+    async def stream_async(self, url: str, text: str, context_id: Optional[str] = None,
+                           timeout: Optional[float] = None, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """Send a message with message/stream and yield answer text chunks as they arrive"""
+        request = build_message_request(text, method="message/stream", context_id=context_id, deadline=deadline)
+        headers = {"Accept": "text/event-stream", **deadline_headers(deadline)}
+        streamed_status = False
+        streamed_any = False
+        with span("a2a message/stream", {"url.full": url}, kind=SpanKind.CLIENT):
+            async with self._async_client().stream("POST", url, json=request, headers=inject(headers),
+                                                   timeout=timeout or deadline or self.timeout) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    body = json.loads(line[5:])
+                    if body.get("error"):
+                        raise A2AError(body["error"].get("message", str(body["error"])))
+                    result = body.get("result") or {}
+                    chunk = stream_event_text(result, streamed_status)
+                    if result.get("kind") == "status-update" and chunk:
+                        streamed_status = True
+                    if result.get("kind") == "task" and not streamed_any:
+                        # A server that answers with a finished task instead of streaming it
+                        completed = (result.get("status") or {}).get("state") == "completed"
+                        chunk = extract_text(result) if completed else ""
+                    if chunk:
+                        streamed_any = True
+                        yield chunk
+
+    def get_agent_card(self, url: str, timeout: float = 5.0) -> Optional[dict]:
+        """Fetch an agent's card, trying the current and the legacy well-known paths"""
+        fetched = self.fetch_agent_card(url, timeout=timeout)
+        return fetched.card if fetched else None
+
+    def fetch_agent_card(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                         timeout: float = 5.0) -> Optional[CardFetch]:
+        """Conditionally fetch an agent's card: validators from an earlier fetch let
+        the server answer 304 Not Modified. None if no well-known path answered."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        for path in AGENT_CARD_PATHS:
+            try:
+                response = self.client.get(url.rstrip("/") + path, headers=headers, timeout=timeout)
+                if response.status_code == 304:
+                    return CardFetch(None, etag, last_modified)
+                if response.status_code == 200:
+                    return CardFetch(response.json(), response.headers.get("ETag"),
+                                     response.headers.get("Last-Modified"))
+            except (httpx.HTTPError, ValueError):
+                continue
+        return None
+
+    def close(self):
+        """Release pooled sync connections"""
+        if self._client is not None:
+            self._client.close()
+
+    async def aclose(self):
+        """Release pooled async connections for the running event loop"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
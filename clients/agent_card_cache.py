@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Agent Card Cache
+Agent cards keyed by URL and persisted to disk, revalidated with conditional
+requests, so a client restart doesn't rediscover every agent
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from clients.a2a_transport import A2ATransport
+
+DEFAULT_CARD_CACHE_PATH = "agent_cards.json"
+# Seconds a card is trusted before it is revalidated
+DEFAULT_MAX_AGE = 300.0
+
+class AgentCardCache:
+    """Agent cards by URL, optionally persisted to a JSON file.
+
+    A card younger than `max_age` is used as is. Older cards are revalidated
+    with If-None-Match / If-Modified-Since when the agent sent validators, or
+    refetched and compared otherwise. An agent that can't be reached keeps its
+    last known card. `path=None` keeps cards in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CARD_CACHE_PATH, max_age: float = DEFAULT_MAX_AGE,
+                 transport: Optional[A2ATransport] = None):
+        self.path = path
+        self.max_age = max_age
+        self.transport = transport or A2ATransport()
+        self.entries: Dict[str, dict] = self._load()  # url -> {card, etag, last_modified, fetched_at}
+        self.stats = {"hits": 0, "fetched": 0, "revalidated": 0, "changed": 0, "stale": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable agent card cache {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        """Write the cache atomically, so concurrent clients never read a partial file"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def cached(self, url: str) -> Optional[dict]:
+        """Last known card for a URL, however old (no network)"""
+        entry = self.entries.get(url)
+        return entry["card"] if entry else None
+
+    def is_fresh(self, url: str) -> bool:
+        entry = self.entries.get(url)
+        return entry is not None and time.time() - entry["fetched_at"] < self.max_age
+
+    def get(self, url: str) -> Optional[dict]:
+        """Card for a URL: from the cache while fresh, revalidated otherwise"""
+        if self.is_fresh(url):
+            self.stats["hits"] += 1
+            return self.cached(url)
+        return self.refresh([url])[url]
+
+    def refresh(self, urls: Iterable[str], max_workers: int = 8) -> Dict[str, Optional[dict]]:
+        """Revalidate (or fetch) cards for several URLs concurrently and persist them once"""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as pool:
+            cards = dict(zip(urls, pool.map(self._revalidate, urls)))
+        with self._lock:
+            self._save()
+        return cards
+
+    def _revalidate(self, url: str) -> Optional[dict]:
+        entry = self.entries.get(url)
+        fetched = self.transport.fetch_agent_card(url, etag=entry.get("etag") if entry else None,
+                                                  last_modified=entry.get("last_modified") if entry else None)
+        with self._lock:
+            if fetched is None:
+                self.stats["errors"] += 1
+                if entry:
+                    self.stats["stale"] += 1
+                return self.cached(url)
+            if fetched.not_modified or (entry and entry["card"] == fetched.card):
+                self.stats["revalidated"] += 1
+                card = entry["card"]
+            else:
+                self.stats["changed" if entry else "fetched"] += 1
+                card = fetched.card
+            self.entries[url] = {"card": card, "etag": fetched.etag, "last_modified": fetched.last_modified,
+                                 "fetched_at": time.time()}
+            return card
+
+    def stale_urls(self, urls: Iterable[str]) -> List[str]:
+        """URLs whose card is missing or past `max_age`"""
+        return [url for url in urls if not self.is_fresh(url)]
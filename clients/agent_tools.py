@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Agent Tools
+One routing tool per specialist agent, built from its registry record or card,
+so the routing LLM calls an agent directly instead of discovering it first
+"""
+
+import re
+from typing import Awaitable, Callable
+from strands.tools.tools import PythonAgentTool
+
+def tool_name_for(agent_name: str) -> str:
+    """Tool name for an agent (tool names allow letters, digits, '_' and '-')"""
+    return f"ask_{re.sub(r'[^a-zA-Z0-9_-]+', '_', agent_name).strip('_').lower()}"[:64]
+
+def tool_signature(agent: dict) -> tuple:
+    """What an agent's tool is built from: a record with the same signature gets the same tool"""
+    return agent["name"], agent.get("description"), tuple(agent.get("capabilities") or ())
+
+def build_agent_tool(agent: dict, call: Callable[..., Awaitable[str]]) -> PythonAgentTool:
+    """Tool that sends a message to `agent` through `call(name, message, deadline)`.
+    Building one is cheap: it needs only the agent's metadata, no network."""
+    tool_name = tool_name_for(agent["name"])
+    description = agent.get("description") or agent["name"]
+    if agent.get("capabilities"):
+        description += f" Capabilities: {', '.join(agent['capabilities'])}."
+    spec = {
+        "name": tool_name,
+        "description": f"Ask the {agent['name']} specialist. {description}",
+        "inputSchema": {"json": {
+            "type": "object",
+            "properties": {
+                "message": {
+                    "type": "string",
+                    "description": "The question or request for the agent, with every detail it needs"
+                }
+            },
+            "required": ["message"]
+        }}
+    }
+
+    async def ask_agent(tool_use, **invocation_state):
+        try:
+            # The routing call's deadline rides along in the invocation state
+            text = await call(agent["name"], tool_use["input"]["message"], invocation_state.get("deadline"))
+            return {"toolUseId": tool_use["toolUseId"], "status": "success", "content": [{"text": text}]}
+        except Exception as e:
+            return {"toolUseId": tool_use["toolUseId"], "status": "error",
+                    "content": [{"text": f"{agent['name']} failed: {e}"}]}
+
+    ask_agent.__name__ = tool_name
+    return PythonAgentTool(tool_name, spec, ask_agent)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Load Balancer
+Spreads requests across the replicas registered under one agent name:
+power-of-two-choices on outstanding requests, or smooth weighted round-robin
+"""
+
+import os
+import random
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Collection, Dict, List, Optional
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from registry.registry_store import load_level
+
+def reported_load(instance: dict) -> float:
+    """Requests an instance reported as in flight or queued, at the registry's load-level
+    resolution. The registry only publishes load when its level changes, so within a
+    level the listed value is whatever was reported at that moment; each hint counts as
+    the floor of its level (0, 2, 4, 8, ...) so replicas on the same level compare equal."""
+    levels = load_level(instance.get("load") or {})
+    return float(sum(1 << level for key, level in levels.items() if key in ("in_flight", "queue_depth")))
+
+def instance_key(instance: dict) -> str:
+    """Instance id of a registry record (name@url for records that predate instance ids)"""
+    return instance.get("instance_id") or f"{instance['name']}@{instance['url']}"
+
+class Replica:
+    """One instance of a logical agent, with this client's view of its load"""
+
+    def __init__(self, instance: dict):
+        self.instance_id = instance_key(instance)
+        # Requests this client has in flight to the replica, and has sent in total
+        self.outstanding = 0
+        self.dispatched = 0
+        # Smooth weighted round-robin state
+        self.current_weight = 0.0
+        self.refresh(instance)
+
+    def refresh(self, instance: dict):
+        """Take the latest url, weight and load hints from a registry record"""
+        self.url = instance["url"]
+        self.weight = max(float(instance.get("weight") or 1.0), 0.01)
+        self.reported_load = reported_load(instance)
+
+class Balancer:
+    """Picks one replica of a logical agent per request"""
+
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+
+    def pick(self, candidates: Optional[List[Replica]] = None) -> Replica:
+        """Choose among `candidates` (default: every replica)"""
+        raise NotImplementedError
+
+class PowerOfTwoChoices(Balancer):
+    """Sample two replicas at random and take the less loaded one.
+
+    Load is this client's outstanding requests plus the load the replica last
+    reported to the registry, divided by its weight. Comparing just two random
+    candidates avoids herding every client onto the same "least loaded"
+    replica while still steering away from busy ones.
+    """
+
+    def __init__(self, replicas: List[Replica], rng: Optional[random.Random] = None):
+        super().__init__(replicas)
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def cost(replica: Replica) -> float:
+        return (replica.outstanding + replica.reported_load + 1) / replica.weight
+
+    def pick(self, candidates: Optional[List[Replica]] = None) -> Replica:
+        candidates = self.replicas if candidates is None else candidates
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = self.rng.sample(candidates, 2)
+        return first if self.cost(first) <= self.cost(second) else second
+
+class WeightedRoundRobin(Balancer):
+    """Smooth weighted round-robin: replicas are picked in proportion to their
+    weight, interleaved rather than in bursts"""
+
+    def pick(self, candidates: Optional[List[Replica]] = None) -> Replica:
+        total = 0.0
+        best = None
+        for replica in self.replicas if candidates is None else candidates:
+            replica.current_weight += replica.weight
+            total += replica.weight
+            if best is None or replica.current_weight > best.current_weight:
+                best = replica
+        best.current_weight -= total
+        return best
+
+BALANCERS = {"p2c": PowerOfTwoChoices, "wrr": WeightedRoundRobin}
+
+class Dispatcher:
+    """Per-agent-name replica sets and the balancer that chooses between them"""
+
+    def __init__(self, strategy: str = "p2c"):
+        if strategy not in BALANCERS:
+            raise ValueError(f"Unknown load balancing strategy: {strategy}")
+        self.strategy = strategy
+        self.balancers: Dict[str, Balancer] = {}
+        self._lock = threading.Lock()
+
+    def update(self, instances: List[dict]):
+        """Rebuild the replica sets from registry records, keeping the counters of
+        replicas that are still present"""
+        with self._lock:
+            known = {r.instance_id: r for b in self.balancers.values() for r in b.replicas}
+            grouped: Dict[str, List[Replica]] = {}
+            for instance in instances:
+                # Reuse replica objects so requests already in flight are still counted
+                replica = known.get(instance_key(instance))
+                if replica is None:
+                    replica = Replica(instance)
+                else:
+                    replica.refresh(instance)
+                grouped.setdefault(instance["name"], []).append(replica)
+            self.balancers = {name: BALANCERS[self.strategy](replicas) for name, replicas in grouped.items()}
+
+    def pick(self, name: str, exclude: Collection[str] = ()) -> Optional[Replica]:
+        """Replica to send the next request for an agent to, skipping replicas
+        whose url is in `exclude`; None if no replica is left"""
+        with self._lock:
+            balancer = self.balancers.get(name)
+            if balancer is None:
+                return None
+            if not exclude:
+                return balancer.pick()
+            candidates = [r for r in balancer.replicas if r.url not in exclude]
+            return balancer.pick(candidates) if candidates else None
+
+    @contextmanager
+    def track(self, replica: Replica):
+        """Count a request as outstanding on a replica while it runs"""
+        with self._lock:
+            replica.outstanding += 1
+            replica.dispatched += 1
+        try:
+            yield replica
+        finally:
+            with self._lock:
+                replica.outstanding -= 1
+
+    def stats(self) -> Dict[str, List[dict]]:
+        """Requests dispatched to and in flight on each replica, by agent name"""
+        with self._lock:
+            return {
+                name: [{"instance_id": r.instance_id, "url": r.url, "weight": r.weight,
+                        "outstanding": r.outstanding, "dispatched": r.dispatched} for r in balancer.replicas]
+                for name, balancer in self.balancers.items()
+            }
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Planner
+Splits a compound question into sub-tasks for different specialists, runs the
+independent ones concurrently and merges their answers into one
+"""
+
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Clause boundaries: sentence ends, semicolons and joining words
+SPLIT_PATTERN = re.compile(r"\s*(?:[.;!?]+\s+|[.;!?]+$|,?\s+\b(and then|and also|and|then|also|plus)\b\s+)",
+                           re.IGNORECASE)
+# A clause introduced like this uses the previous part's answer
+DEPENDENT_CONNECTORS = {"then", "and then"}
+LEADING_CONNECTOR = re.compile(r"^(?:and|also|plus)\b,?\s*", re.IGNORECASE)
+DEPENDENT_OPENERS = re.compile(r"^(?:if|when|unless|based on|depending on|once|given|after that|afterwards|"
+                               r"in that case|so)\b", re.IGNORECASE)
+
+class SubTask(NamedTuple):
+    """One part of a plan: a message for one agent, after the parts it depends on"""
+    index: int
+    agent: str
+    text: str
+    depends_on: Tuple[int, ...]
+
+class Plan(NamedTuple):
+    question: str
+    tasks: List[SubTask]
+
+    @property
+    def agents(self) -> List[str]:
+        return list(dict.fromkeys(task.agent for task in self.tasks))
+
+class SubTaskResult(NamedTuple):
+    """Outcome of one sub-task; exactly one of answer/error is set"""
+    task: SubTask
+    answer: Optional[str]
+    error: Optional[str]
+    seconds: float
+
+def split_clauses(question: str) -> List[Tuple[str, bool]]:
+    """Clauses of a question, each with whether it depends on the clause before"""
+    clauses = []
+    depends = False
+    position = 0
+    for match in SPLIT_PATTERN.finditer(question):
+        clauses.append((question[position:match.start()], depends))
+        connector = (match.group(1) or "").lower()
+        depends = connector in DEPENDENT_CONNECTORS
+        position = match.end()
+    clauses.append((question[position:], depends))
+    result = []
+    for text, depends in clauses:
+        text = LEADING_CONNECTOR.sub("", text.strip(" ,"))
+        if text:
+            result.append((text, bool(result) and (depends or bool(DEPENDENT_OPENERS.match(text)))))
+    return result
+
+class Planner:
+    """Plans and runs compound questions.
+
+    A question is planned when it splits into clauses that the pre-router
+    routes confidently to at least two different agents; anything else is
+    left to the single-agent paths. Consecutive independent clauses for the
+    same agent are sent together. Every sub-task starts as soon as the parts
+    it depends on have answered, so independent parts run concurrently and
+    end-to-end latency is the slowest chain rather than the sum.
+    """
+
+    def __init__(self, max_tasks: int = 6):
+        self.max_tasks = max_tasks
+        self.stats = {"plans": 0, "subtasks": 0, "failed_subtasks": 0, "seconds": 0.0, "sequential_seconds": 0.0}
+
+    def plan(self, question: str, prerouter) -> Optional[Plan]:
+        """Plan for a compound question, or None if it is a job for one agent"""
+        clauses = split_clauses(question)
+        if len(clauses) < 2 or prerouter is None:
+            return None
+        tasks: List[SubTask] = []
+        for text, depends in clauses:
+            decision = prerouter.route(text)
+            if decision is None:
+                # A part we can't place confidently: let the LLM router see the whole question
+                return None
+            previous = tasks[-1] if tasks else None
+            if previous and previous.agent == decision.agent and (depends or not previous.depends_on):
+                # Same specialist as the part before: one message covers both
+                tasks[-1] = previous._replace(text=f"{previous.text}, and {text}")
+                continue
+            tasks.append(SubTask(len(tasks), decision.agent, text, (previous.index,) if depends and previous else ()))
+        if len({task.agent for task in tasks}) < 2 or len(tasks) > self.max_tasks:
+            return None
+        return Plan(question, tasks)
+
+    @staticmethod
+    def message_for(plan: Plan, task: SubTask, results: Dict[int, SubTaskResult]) -> str:
+        """Sub-task message: the part itself, the whole request for context (e.g. what
+        "there" refers to) and the answers of the parts it depends on"""
+        message = (f"{task.text}\n\nThis is one part of the request \"{plan.question}\". "
+                   f"Only handle this part; other specialists handle the rest.")
+        earlier = [results[i] for i in task.depends_on]
+        if earlier:
+            message += "\n\nAnswers to the earlier parts:\n" + "\n".join(
+                f"- {r.task.text}: {r.answer}" for r in earlier)
+        return message
+
+    def start(self, plan: Plan, call: Callable[[str, str, object], Awaitable[str]], deadline) -> List[asyncio.Task]:
+        """Launch every sub-task; each waits only for its own dependencies.
+        `call(agent, message, deadline)` sends one message to an agent."""
+        results: Dict[int, SubTaskResult] = {}
+        tasks: List[asyncio.Task] = []
+
+        async def run(task: SubTask) -> SubTaskResult:
+            for dependency in task.depends_on:
+                await asyncio.shield(tasks[dependency])
+            start = time.perf_counter()
+            failed = [results[i].task.text for i in task.depends_on if results[i].error]
+            if failed:
+                result = SubTaskResult(task, None, f"skipped because \"{failed[0]}\" failed", 0.0)
+            else:
+                try:
+                    answer = await call(task.agent, self.message_for(plan, task, results), deadline)
+                    result = SubTaskResult(task, answer, None, time.perf_counter() - start)
+                except Exception as e:
+                    result = SubTaskResult(task, None, str(e) or type(e).__name__, time.perf_counter() - start)
+            results[task.index] = result
+            return result
+
+        for task in plan.tasks:
+            tasks.append(asyncio.ensure_future(run(task)))
+        return tasks
+
+    async def execute(self, plan: Plan, call: Callable[[str, str, object], Awaitable[str]],
+                      deadline) -> List[SubTaskResult]:
+        """Run a plan and return its sub-task results in plan order"""
+        start = time.perf_counter()
+        tasks = self.start(plan, call, deadline)
+        try:
+            results = list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.record(results, start)
+        return results
+
+    def record(self, results: List[SubTaskResult], start: float):
+        """Account a finished plan: wall time against the sum of its sub-task latencies"""
+        self.stats["plans"] += 1
+        self.stats["subtasks"] += len(results)
+        self.stats["failed_subtasks"] += sum(1 for r in results if r.error)
+        self.stats["seconds"] += time.perf_counter() - start
+        self.stats["sequential_seconds"] += sum(r.seconds for r in results)
+
+    @staticmethod
+    def section(result: SubTaskResult) -> str:
+        """One sub-task's part of the merged answer"""
+        if result.error:
+            return f"**{result.task.text}**\n⚠️  No answer from {result.task.agent}: {result.error}"
+        return f"**{result.task.text}**\n{result.answer.strip()}"
+
+    @classmethod
+    def merge(cls, results: List[SubTaskResult]) -> str:
+        """Single answer from the sub-task answers, in the order the question asked them"""
+        return "\n\n".join(cls.section(result) for result in results)
+
+    def report(self) -> dict:
+        stats = self.stats
+        return dict(stats, avg_speedup=stats["sequential_seconds"] / stats["seconds"] if stats["seconds"] else None)
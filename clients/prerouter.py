@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Pre-Router
+Deterministic keyword/TF-IDF router that picks a specialist agent locally,
+so confident questions skip the LLM routing hop
+"""
+
+import math
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "at", "be", "by", "can", "could", "do", "does", "for", "from",
+    "get", "give", "have", "how", "i", "in", "is", "it", "its", "like", "me", "my", "need", "of", "on",
+    "or", "please", "s", "should", "tell", "that", "the", "there", "this", "to", "want", "what",
+    "when", "where", "which", "will", "with", "would", "you", "your", "help", "professional", "providing"
+}
+SUFFIXES = ("ations", "ation", "ings", "ing", "ers", "er", "es", "s")
+CAPABILITY_WEIGHT = 2.0
+
+def stem(word: str) -> str:
+    """Very light suffix stripping so 'bookings'/'booking'/'book' share a term"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-letters (including '_'), drop stopwords, stem"""
+    return [stem(w) for w in re.findall(r"[a-z]+", text.lower()) if w not in STOPWORDS]
+
+class RouteDecision(NamedTuple):
+    """Outcome of a confident pre-route"""
+    agent: str
+    score: float
+    runner_up: float
+
+class PreRouter:
+    """Scores questions against each agent's capabilities and description.
+
+    The index is built once per discovery: a posting list from term to
+    per-agent weight (term frequency x inverse agent frequency, capability
+    terms boosted). A question's score for an agent is the share of the
+    question's known-term weight that the agent covers, so scoring costs
+    O(question terms). Words no agent mentions are ignored rather than
+    counted against every agent.
+    """
+
+    def __init__(self, min_score: float = 0.7, min_margin: float = 0.5):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.idf: Dict[str, float] = {}
+        self.agents: List[str] = []
+
+    def build(self, agents: List[dict]):
+        """Index agent records ({name, description, capabilities, ...})"""
+        term_freqs: Dict[str, Dict[str, float]] = {}
+        for agent in agents:
+            freqs: Dict[str, float] = {}
+            for term in tokenize(agent["name"]) + tokenize(agent.get("description", "")):
+                freqs[term] = freqs.get(term, 0.0) + 1.0
+            for capability in agent.get("capabilities", []):
+                for term in tokenize(capability):
+                    freqs[term] = freqs.get(term, 0.0) + CAPABILITY_WEIGHT
+            term_freqs[agent["name"]] = freqs
+
+        self.agents = list(term_freqs)
+        doc_freq: Dict[str, int] = {}
+        for freqs in term_freqs.values():
+            for term in freqs:
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+        count = len(self.agents)
+        self.idf = {term: math.log(1 + count / df) for term, df in doc_freq.items()}
+
+        self.postings = {}
+        for name, freqs in term_freqs.items():
+            for term, tf in freqs.items():
+                # Saturating tf so a long description can't drown out capabilities
+                self.postings.setdefault(term, {})[name] = (1 + math.log(tf)) * self.idf[term]
+
+    def scores(self, question: str) -> Dict[str, float]:
+        """Per-agent score in [0, 1] for a question"""
+        terms = [t for t in tokenize(question) if t in self.postings]
+        if not terms:
+            return {}
+        total = sum(self.idf[t] for t in terms)
+        scores: Dict[str, float] = {}
+        for term in terms:
+            postings = self.postings[term]
+            best = max(postings.values())
+            for name, weight in postings.items():
+                # Each matched term contributes its idf mass, scaled by how strongly
+                # this agent (relative to the strongest) owns the term
+                scores[name] = scores.get(name, 0.0) + self.idf[term] * weight / best
+        return {name: score / total for name, score in scores.items()}
+
+    def route(self, question: str) -> Optional[RouteDecision]:
+        """Return the agent for a confident match, or None to defer to the LLM router"""
+        ranked = sorted(self.scores(question).items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return None
+        name, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if top < self.min_score or top - runner_up < self.min_margin:
+            return None
+        return RouteDecision(name, top, runner_up)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Resilience
+Circuit breakers, request deadlines and hedged requests for A2A calls, so a
+slow or failing replica costs a bounded amount of latency
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Set
+import httpx
+
+DEFAULT_DEADLINE = 120.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 10.0
+DEFAULT_HEDGE_QUANTILE = 0.95
+# Latency samples needed before a hedge delay is trusted
+MIN_HEDGE_SAMPLES = 20
+
+class CircuitOpenError(Exception):
+    """Every replica of an agent is behind an open circuit breaker"""
+
+class DeadlineExceeded(Exception):
+    """The request deadline passed before an agent answered"""
+
+def never_delivered(error: Optional[BaseException]) -> bool:
+    """Whether a failed attempt certainly never reached the agent's handler, so even a
+    call that must not run twice can go to another replica: the connection was refused
+    or never made, or admission control turned the request away (429)"""
+    if isinstance(error, (CircuitOpenError, httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429
+
+class Deadline:
+    """Absolute point in time a request must finish by"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+async def until_deadline(awaitable: Awaitable, deadline: Deadline):
+    """Await `awaitable`, raising DeadlineExceeded if the deadline passes first.
+    Unlike asyncio.wait_for it runs in the current task, so it can bound each step
+    of an agent stream whose context variables must stay in one task."""
+    task = asyncio.current_task()
+    expired = False
+
+    def expire():
+        nonlocal expired
+        expired = True
+        task.cancel()
+
+    timer = asyncio.get_running_loop().call_later(deadline.remaining(), expire)
+    try:
+        return await awaitable
+    except asyncio.CancelledError:
+        if not expired:
+            raise
+        if hasattr(task, "uncancel"):
+            task.uncancel()
+        raise DeadlineExceeded(f"No answer within {deadline.seconds:g}s") from None
+    finally:
+        timer.cancel()
+
+class CircuitBreaker:
+    """Per-endpoint breaker: closed -> open after `failure_threshold` consecutive
+    failures; open -> half-open after `reset_timeout`, when one probe request is
+    let through; the probe's outcome closes or re-opens the circuit"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def available(self) -> bool:
+        """Whether a request could be let through now (no side effects)"""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        if self.state == self.HALF_OPEN:
+            return not self._probing
+        return True
+
+    def allow(self) -> bool:
+        """Admit a request, moving an open circuit to half-open once it has cooled down"""
+        if not self.available():
+            return False
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self):
+        """A request was cancelled (e.g. it lost a hedge race); it says nothing about health"""
+        self._probing = False
+
+class LatencyTracker:
+    """Sliding window of successful call latencies for one agent"""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+class ResiliencePolicy:
+    """Runs calls to a logical agent across its replicas.
+
+    Replicas whose breaker is open are skipped. A failed attempt fails over to
+    another replica while the deadline allows. With hedging on, an attempt still
+    running at the agent's `hedge_quantile` latency gets a duplicate on a second
+    replica and the first answer wins. A call that is not `idempotent` (e.g. a
+    booking) is never hedged, and only fails over when the failed attempt never
+    reached the agent (see never_delivered), so it can't be applied twice.
+    """
+
+    def __init__(self, deadline: float = DEFAULT_DEADLINE, hedge: bool = False,
+                 hedge_quantile: float = DEFAULT_HEDGE_QUANTILE,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.stats = {"calls": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0,
+                      "deadline_exceeded": 0, "circuit_rejections": 0}
+
+    def new_deadline(self, seconds: Optional[float] = None) -> Deadline:
+        return Deadline(self.deadline if seconds is None else seconds)
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        breaker = self.breakers.get(url)
+        if breaker is None:
+            breaker = self.breakers[url] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        tracker = self.latencies.get(agent)
+        return tracker.quantile(self.hedge_quantile) if tracker else None
+
+    def choose(self, dispatcher, agent: str, tried: Set[str]):
+        """Next replica to try (balanced, skipping tried and open-circuit replicas), or None"""
+        while True:
+            unavailable = tried | {url for url, b in self.breakers.items() if not b.available()}
+            replica = dispatcher.pick(agent, exclude=unavailable)
+            if replica is None:
+                return None
+            tried.add(replica.url)
+            if self.breaker(replica.url).allow():
+                return replica
+
+    def record(self, agent: str, url: str, start: float, error: Optional[BaseException]):
+        """Account one finished attempt to the endpoint's breaker and the agent's latency"""
+        breaker = self.breaker(url)
+        if error is None:
+            breaker.record_success()
+            self.latencies.setdefault(agent, LatencyTracker()).record(time.perf_counter() - start)
+        elif isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            # Cancelled, or the caller stopped reading a stream: no verdict on the endpoint
+            breaker.record_abandoned()
+        else:
+            breaker.record_failure()
+
+    async def _attempt(self, dispatcher, agent: str, replica, send, deadline: Deadline):
+        start = time.perf_counter()
+        try:
+            with dispatcher.track(replica):
+                result = await asyncio.wait_for(send(replica.url, deadline.remaining()), deadline.remaining())
+        except BaseException as e:
+            self.record(agent, replica.url, start, e)
+            raise
+        self.record(agent, replica.url, start, None)
+        return result
+
+    async def call(self, dispatcher, agent: str, send: Callable[[str, float], Awaitable],
+                   deadline: Deadline, hedge: Optional[bool] = None, idempotent: bool = True):
+        """Call `send(url, seconds_left)` on a replica of `agent` and return the first success"""
+        self.stats["calls"] += 1
+        hedge = (self.hedge if hedge is None else hedge) and idempotent
+        hedge_delay = self.hedge_delay(agent) if hedge else None
+        tried: Set[str] = set()
+        started = time.monotonic()
+
+        def launch():
+            replica = self.choose(dispatcher, agent, tried)
+            if replica is None:
+                return None
+            return asyncio.ensure_future(self._attempt(dispatcher, agent, replica, send, deadline))
+
+        first = launch()
+        if first is None:
+            self.stats["circuit_rejections"] += 1
+            raise CircuitOpenError(f"No available replica of {agent}: circuits open")
+        pending = {first}
+        hedged = False
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = deadline.remaining()
+                if hedge_delay is not None and not hedged:
+                    timeout = min(timeout, max(hedge_delay - (time.monotonic() - started), 0.0))
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if hedged and task is not first:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+                if deadline.expired:
+                    break
+                if not done and not hedged and hedge_delay is not None:
+                    # Slower than the agent's usual tail: race a second replica. Only when
+                    # hedging: the wait can also end a hair before the deadline reads expired
+                    hedged = True
+                    extra = launch()
+                    if extra is not None:
+                        self.stats["hedges"] += 1
+                        pending.add(extra)
+                elif done and not pending and (idempotent or never_delivered(last_error)):
+                    # Every attempt so far failed: fail over while replicas remain
+                    extra = launch()
+                    if extra is not None:
+                        self.stats["failovers"] += 1
+                        pending.add(extra)
+        finally:
+            for task in pending:
+                task.cancel()
+        if deadline.expired:
+            self.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"No answer from {agent} within {deadline.seconds:g}s")
+        raise last_error
+
+    def report(self) -> dict:
+        """Counters plus the endpoints whose circuit is not closed"""
+        return dict(self.stats, open_circuits=sorted(
+            url for url, b in self.breakers.items() if b.state != CircuitBreaker.CLOSED))
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Caches specialist answers keyed on a normalized question and the target agent,
+with per-capability TTLs and bounded LRU storage (in memory or on disk)
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Seconds a cached answer stays valid per capability. 0 means never cache:
+# booking capabilities take actions, so replaying an old answer would be wrong.
+DEFAULT_CAPABILITY_TTLS = {
+    "weather_info": 300.0,
+    "forecasts": 900.0,
+    "weather_advice": 300.0,
+    "hotel_booking": 0.0,
+    "restaurant_reservations": 0.0,
+    "travel_booking": 0.0,
+    "event_booking": 0.0,
+    "car_rental": 0.0
+}
+
+def normalize_question(question: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a question"""
+    return " ".join(re.findall(r"[a-z0-9]+", question.lower().replace("'", "")))
+
+def cache_key(question: str, agent: str) -> str:
+    """Cache key for a question sent to a given agent"""
+    return f"{agent}\x1f{normalize_question(question)}"
+
+class CapabilityTTLPolicy:
+    """Chooses how long an agent's answers may be cached from its capabilities.
+
+    The shortest TTL among the agent's capabilities wins, so one action-taking
+    capability (TTL 0) disables caching for that agent. Capabilities without an
+    entry fall back to `default_ttl`.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 0.0):
+        self.ttls = dict(DEFAULT_CAPABILITY_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+
+    def ttl_for(self, capabilities: List[str]) -> float:
+        ttls = [self.ttls.get(c, self.default_ttl) for c in capabilities] or [self.default_ttl]
+        return max(min(ttls), 0.0)
+
+class ResponseCache:
+    """Interface for response cache backends"""
+
+    def __init__(self):
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, question: str, agent: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, question: str, agent: str, response: str, ttl: float):
+        raise NotImplementedError
+
+    def invalidate(self, question: Optional[str] = None, agent: Optional[str] = None) -> int:
+        """Drop entries for a question, an agent, both, or (no arguments) everything"""
+        raise NotImplementedError
+
+class LRUResponseCache(ResponseCache):
+    """In-process cache bounded by entry count, evicting the least recently used"""
+
+    def __init__(self, max_entries: int = 1024):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (agent, expires_at, response)
+        self._lock = threading.Lock()
+
+    def get(self, question: str, agent: str) -> Optional[str]:
+        key = cache_key(question, agent)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def set(self, question: str, agent: str, response: str, ttl: float):
+        if ttl <= 0:
+            return
+        key = cache_key(question, agent)
+        with self._lock:
+            self._entries[key] = (agent, time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, question: Optional[str] = None, agent: Optional[str] = None) -> int:
+        with self._lock:
+            if question is not None and agent is not None:
+                keys = [cache_key(question, agent)] if cache_key(question, agent) in self._entries else []
+            else:
+                normalized = normalize_question(question) if question is not None else None
+                keys = [key for key, (entry_agent, _, _) in self._entries.items()
+                        if (agent is None or entry_agent == agent)
+                        and (normalized is None or key.split("\x1f", 1)[1] == normalized)]
+            for key in keys:
+                del self._entries[key]
+            self.stats["invalidations"] += len(keys)
+            return len(keys)
+
+class SQLiteResponseCache(ResponseCache):
+    """On-disk cache that several client processes can share.
+
+    Entries carry an absolute expiry and a last-used time; inserts beyond
+    `max_entries` evict the least recently used rows.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._conn().executescript("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            agent TEXT NOT NULL,
+            question TEXT NOT NULL,
+            response TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+        CREATE INDEX IF NOT EXISTS responses_agent ON responses(agent);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections must not be shared across threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, question: str, agent: str) -> Optional[str]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT response, expires_at FROM responses WHERE key = ?",
+                           (cache_key(question, agent),)).fetchone()
+        if row is None or row[1] <= now:
+            self.stats["misses"] += 1
+            return None
+        conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, cache_key(question, agent)))
+        self.stats["hits"] += 1
+        return row[0]
+
+    def set(self, question: str, agent: str, response: str, ttl: float):
+        if ttl <= 0:
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, agent, question, response, expires_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (cache_key(question, agent), agent, normalize_question(question), response, now + ttl, now)
+        )
+        self.stats["stores"] += 1
+        excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute("DELETE FROM responses WHERE key IN "
+                         "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,))
+            self.stats["evictions"] += excess
+
+    def invalidate(self, question: Optional[str] = None, agent: Optional[str] = None) -> int:
+        clauses, params = [], []
+        if question is not None:
+            clauses.append("question = ?")
+            params.append(normalize_question(question))
+        if agent is not None:
+            clauses.append("agent = ?")
+            params.append(agent)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        removed = self._conn().execute(f"DELETE FROM responses{where}", params).rowcount
+        self.stats["invalidations"] += removed
+        return removed
@@ -5,75 +5,884 @@ A client that can automatically route questions to the appropriate A2A agent
 """
 
 from strands import Agent
-from strands_tools.a2a_client import A2AClientToolProvider
+import asyncio
+import contextlib
+import json
 import sys
 import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple, Optional
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from registry.registry_client import RegistryClient
+from registry.registry_client import AsyncRegistryClient, RegistryClient
+from clients.a2a_transport import A2ATransport, card_to_agent
+from clients.agent_card_cache import DEFAULT_CARD_CACHE_PATH, AgentCardCache
+from clients.agent_tools import build_agent_tool, tool_name_for, tool_signature
+from clients.load_balancer import BALANCERS, Dispatcher
+from clients.planner import Planner
+from clients.prerouter import PreRouter
+from clients.resilience import DEFAULT_DEADLINE, CircuitOpenError, DeadlineExceeded, ResiliencePolicy, until_deadline
+from clients.response_cache import CapabilityTTLPolicy, LRUResponseCache, SQLiteResponseCache
+from common.conversation_memory import DEFAULT_MAX_TOKENS, TokenBudgetConversationManager
+from common.stub_model import add_model_arguments, build_model
+from common.telemetry import add_telemetry_arguments, annotate, setup_tracing, span
 import argparse
 
-class SmartA2AClient:
-    """Smart client that routes questions to appropriate A2A agents"""
-    
-    def __init__(self, agent_urls=None, registry_url=None):
-        """Initialize with agent URLs or registry for service discovery"""
-        self.agent_urls = agent_urls or []
-        self.registry_url = registry_url
-        
-        # Create a smart routing agent
-        self.client_agent = Agent(
-            system_prompt="""You are a smart assistant that can route questions to specialized agents.
+DEFAULT_MAX_CONCURRENCY = 4
+# Named conversations (e.g. UI sessions) whose routing history is kept; past this the least recently used goes
+DEFAULT_MAX_CONVERSATIONS = 256
+# Live refresh: seconds between agent card checks for direct connections, the registry
+# long-poll timeout, and the wait before watching again when the registry is unreachable
+DEFAULT_REFRESH_INTERVAL = 60.0
+WATCH_TIMEOUT = 30.0
+WATCH_RETRY = 5.0
+
+ROUTER_SYSTEM_PROMPT = """You are a smart assistant that can route questions to specialized agents.
             
-            You have access to multiple specialized agents via A2A tools:
+            You have access to multiple specialized agents, one ask_<agent> tool each:
             - Weather agents for weather-related questions
             - Booking agents for reservation and booking questions
             - Other specialized agents as available
             
             When a user asks a question:
             1. Analyze what type of question it is
-            2. Use the appropriate A2A tool to get the answer from the right specialist
+            2. Use the appropriate agent tool to get the answer from the right specialist
             3. Provide a clear, helpful response based on the specialist's answer
             
-            Always route to the most appropriate specialist for the best answer.""",
-            name="smart_client",
-            description="Smart routing client that connects users to appropriate specialized agents"
-        )
+            When a question has independent parts for different specialists, call all of their
+            tools at once so they run in parallel. Wait for an answer first only when another
+            part needs it.
+            
+            Always route to the most appropriate specialist for the best answer."""
+
+class BatchResult(NamedTuple):
+    """Outcome of one question in a batch; exactly one of answer/error is set"""
+    index: int
+    question: str
+    answer: Optional[str]
+    error: Optional[str]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def swap_tools(agent, tools, removed):
+    """Add or replace `tools` (by tool name) in a routing agent and drop the `removed` names.
+    The agent's tool registry is replaced in one assignment instead of edited, so a turn
+    running on another thread never sees it half-updated and is never waited for; it
+    keeps its history and sees the new tools from its next model call."""
+    registry = {name: tool for name, tool in agent.tool_registry.registry.items() if name not in removed}
+    registry.update(tools)
+    agent.tool_registry.registry = registry
+
+class SmartA2AClient:
+    """Smart client that routes questions to appropriate A2A agents"""
+    
+    def __init__(self, agent_urls=None, registry_url=None, fast_path=True, response_cache=None, ttl_policy=None,
+                 balancer="p2c", resilience=None, card_cache=None, memory_tokens=DEFAULT_MAX_TOKENS,
+                 planner=True, model=None, max_conversations=DEFAULT_MAX_CONVERSATIONS):
+        """Initialize with agent URLs or registry for service discovery.
+        
+        Startup only gathers agent metadata: agent cards come from `card_cache`
+        when it has them, and the routing agent and its tools are built on first
+        use or by warm_up().
+        """
+        started = time.perf_counter()
+        self.agent_urls = agent_urls or []
+        self.registry_url = registry_url
+        self.transport = A2ATransport()
+        # Agent cards by URL for direct connections (in memory unless a disk-backed cache is given)
+        self.card_cache = card_cache or AgentCardCache(path=None, transport=self.transport)
+        # Answers from pre-routed agents, keyed on normalized question + agent
+        self.response_cache = response_cache
+        self.ttl_policy = ttl_policy or CapabilityTTLPolicy()
+        # Agent metadata (name, description, url, capabilities) used by the pre-router
+        self.agents = {}
+        # Replicas of each agent and the load balancer choosing between them
+        self.dispatcher = Dispatcher(balancer)
+        # Circuit breakers, deadlines and hedging for calls to those replicas
+        self.resilience = resilience or ResiliencePolicy()
+        self.fast_path = fast_path
+        # Model for the routing agent (None: the strands default, Amazon Bedrock)
+        self.model = model
+        # Splits compound questions into parts for different agents, answered concurrently
+        self.planner = Planner() if planner else None
+        # Keeps the shared routing agent's history within a token budget
+        self.memory = TokenBudgetConversationManager(max_tokens=memory_tokens)
+        self.memory_tokens = memory_tokens
+        # Routing agent and lock of each named conversation, least recently used first, so one
+        # client can serve many users without mixing their histories
+        self.max_conversations = max_conversations
+        self._conversations = OrderedDict()
+        # Context ids sent to agents derive from this, so each client and conversation gets its
+        # own history on every agent; turns the routing agent didn't answer, still being recorded
+        self._context_namespace = uuid.uuid4()
+        self._pending_turns = set()
+        self.prerouter = None
+        self.routing_stats = {"fast_path": 0, "llm_path": 0, "planned": 0,
+                              "fast_path_seconds": 0.0, "llm_path_seconds": 0.0, "planned_seconds": 0.0}
+        self.stream_stats = {"streams": 0, "first_chunk_seconds": 0.0, "total_seconds": 0.0}
+        self.startup_stats = {"seconds": None, "cards_cached": 0, "cards_fetched": 0, "warm_up_seconds": None}
+        # Agent set changes applied while running (see start_refresh)
+        self.refresh_stats = {"refreshes": 0, "agent_changes": 0, "agents_added": 0, "agents_removed": 0,
+                              "tools_rebuilt": 0, "seconds": 0.0, "max_seconds": 0.0}
+        self._refresh_future = None
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        # Held while a conversation answers; an asyncio lock, so a caller cancelled while waiting
+        # for it never ends up holding it. It binds to the loop that first waits on it, so it
+        # (like every conversation's lock) is only ever awaited on the client's loop
+        self._router_lock = asyncio.Lock()
+        # Signature of each agent's routing metadata: the pre-router is only rebuilt when it changes
+        self._signatures = None
+        # Built lazily: see router_tools and client_agent. Tools are kept by agent name with
+        # the signature they were built from, so a refresh rebuilds only the changed ones
+        self._router_tools = None
+        self._client_agent = None
+        self._build_lock = threading.Lock()
+        self._warm_up_thread = None
         
         # Connect to agents via registry or direct URLs
         if registry_url:
             registry_client = RegistryClient(registry_url)
-            agent_urls = registry_client.get_agent_urls()
+            with span("smart_client.discover", {"url.full": registry_url}):
+                agents = registry_client.list_agents()
+            agent_urls = [agent["url"] for agent in agents]
             if agent_urls:
-                a2a_client = A2AClientToolProvider(known_agent_urls=agent_urls)
                 print(f"🤖 Smart A2A Client initialized")
                 print(f"📋 Using registry: {registry_url}")
                 print(f"🔍 Discovered {len(agent_urls)} agents:")
-                for url in agent_urls:
-                    print(f"   - {url}")
+                for agent in agents:
+                    print(f"   - {agent['name']}: {agent['url']}")
             else:
+                # With start_refresh() the client picks agents up as they register
                 print(f"❌ No agents found in registry: {registry_url}")
-                return
         else:
-            a2a_client = A2AClientToolProvider(known_agent_urls=self.agent_urls)
+            # Without a registry, agent cards supply the routing metadata. Cached cards
+            # are used whatever their age (warm_up() revalidates them); only unknown
+            # URLs are fetched now, concurrently.
+            cards = {url: self.card_cache.cached(url) for url in self.agent_urls}
+            missing = [url for url, card in cards.items() if card is None]
+            self.startup_stats["cards_cached"] = len(cards) - len(missing)
+            self.startup_stats["cards_fetched"] = len(missing)
+            cards.update(self.card_cache.refresh(missing))
+            agents = [card_to_agent(url, card) for url, card in cards.items() if card]
             print(f"🤖 Smart A2A Client initialized")
             print(f"🔗 Connected to {len(self.agent_urls)} agents:")
             for url in self.agent_urls:
-                print(f"   - {url}")
+                print(f"   - {url}" + ("" if cards[url] else " (no agent card yet)"))
         
-        self.client_agent.tools = a2a_client.tools
+        self._apply_agents(agents)
+        self.startup_stats["seconds"] = time.perf_counter() - started
+        print_startup_report(self)
         print()
     
-    def ask(self, question):
-        """Ask a question and get routed to the right agent"""
-        print(f"❓ Question: {question}")
-        print("🔄 Routing to appropriate agent...")
-        print()
+    def _apply_agents(self, agents):
+        """Index agent records for pre-routing, load balancing and the routing tools.
+        Returns the agent names added and removed and how many tools were rebuilt."""
+        # Replicas share a name: route on one record per name, balance across all of them
+        by_name = {}
+        for agent in agents:
+            by_name.setdefault(agent["name"], agent)
+        self.dispatcher.update(agents)
+        # Replicas and load hints come and go without changing what the pre-router indexes
+        signatures = {name: tool_signature(agent) for name, agent in by_name.items()}
+        prerouter = self.prerouter
+        if signatures != self._signatures:
+            prerouter = None
+            if self.fast_path or self.planner:
+                prerouter = PreRouter()
+                prerouter.build(list(by_name.values()))
+        added = [name for name in by_name if name not in self.agents]
+        removed = [name for name in self.agents if name not in by_name]
+        self.agents, self.prerouter, self._signatures = by_name, prerouter, signatures
+        rebuilt = 0
+        with self._build_lock:
+            if self._router_tools is not None:
+                # Tools were already built: build new ones only for agents that are new or
+                # were re-described, and swap them into the routing agents, which keep their history
+                tools, changed = {}, {}
+                for name, agent in by_name.items():
+                    entry = self._router_tools.get(name)
+                    if entry is None or entry[0] != signatures[name]:
+                        entry = (signatures[name], build_agent_tool(agent, self._call_agent))
+                        changed[entry[1].tool_name] = entry[1]
+                    tools[name] = entry
+                gone = {tool_name_for(name) for name in self._router_tools if name not in by_name}
+                self._router_tools = tools
+                rebuilt = len(changed)
+                if changed or gone:
+                    routers = [self._client_agent] + [agent for agent, _ in self._conversations.values()]
+                    for router in routers:
+                        if router is not None:
+                            swap_tools(router, changed, gone)
+        return added, removed, rebuilt
+    
+    def _build_router_tools(self):
+        return {name: (tool_signature(agent), build_agent_tool(agent, self._call_agent))
+                for name, agent in self.agents.items()}
+    
+    def _current_tools(self):
+        """Routing tools as a list; the caller holds _build_lock and the tools are built"""
+        return [tool for _, tool in self._router_tools.values()]
+    
+    @property
+    def router_tools(self):
+        """One tool per agent name, built on first use"""
+        with self._build_lock:
+            if self._router_tools is None:
+                self._router_tools = self._build_router_tools()
+            return self._current_tools()
+    
+    @property
+    def client_agent(self):
+        """Shared conversational routing agent, used when the pre-router is not confident; built on first use"""
+        self.router_tools
+        with self._build_lock:
+            if self._client_agent is None:
+                self._client_agent = self._build_router_agent(self._current_tools(),
+                                                              conversation_manager=self.memory)
+            return self._client_agent
+    
+    def _conversation(self, conversation=None):
+        """Routing agent and lock for a conversation: the shared agent for None, otherwise
+        the conversation's own agent with its own bounded history, built on first use"""
+        if conversation is None:
+            return self.client_agent, self._router_lock
+        self.router_tools
+        with self._build_lock:
+            entry = self._conversations.get(conversation)
+            if entry is not None:
+                self._conversations.move_to_end(conversation)
+                return entry
+            memory = TokenBudgetConversationManager(max_tokens=self.memory_tokens)
+            entry = (self._build_router_agent(self._current_tools(), conversation_manager=memory),
+                     asyncio.Lock())
+            self._conversations[conversation] = entry
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+            return entry
+    
+    def _context_id(self, conversation, name):
+        """A2A context id for a conversation's messages to agent `name`: the same on every
+        turn, so the agent keeps one history per conversation instead of one per message"""
+        return uuid.uuid5(self._context_namespace, f"{name}\n{conversation!r}").hex
+    
+    def _conversation_call(self, conversation):
+        """_call_agent for a conversation's pre-routed and planned messages, sent under its context ids"""
+        
+        async def call(name, message, deadline=None):
+            return await self._call_agent(name, message, deadline, context_id=self._context_id(conversation, name))
+        
+        return call
+    
+    def _remember_turn(self, conversation, question, answer):
+        """Add a turn answered without the routing agent (fast path, cache or plan) to the
+        conversation's history, as the routing agent does for its own turns, so a later
+        question can refer back to it. Recorded in the background, after any turn the
+        conversation is still answering."""
+        task = asyncio.ensure_future(self._append_turn(conversation, question, answer))
+        self._pending_turns.add(task)
+        task.add_done_callback(self._pending_turns.discard)
+    
+    async def _append_turn(self, conversation, question, answer):
+        agent, lock = await asyncio.to_thread(self._conversation, conversation)
+        async with lock:
+            agent.messages.extend([{"role": "user", "content": [{"text": question}]},
+                                   {"role": "assistant", "content": [{"text": answer}]}])
+            agent.conversation_manager.apply_management(agent)
+    
+    def end_conversation(self, conversation):
+        """Forget a named conversation's routing history; False if it wasn't kept"""
+        with self._build_lock:
+            return self._conversations.pop(conversation, None) is not None
+    
+    def _build_router_agent(self, tools=None, messages=None, conversation_manager=None):
+        """Routing agent over the per-agent tools"""
+        return Agent(
+            model=self.model,
+            system_prompt=ROUTER_SYSTEM_PROMPT,
+            name="smart_client",
+            description="Smart routing client that connects users to appropriate specialized agents",
+            tools=self.router_tools if tools is None else tools,
+            messages=messages,
+            conversation_manager=conversation_manager,
+            # Callers print or stream the answer; concurrent answers would interleave on stdout
+            callback_handler=None
+        )
+    
+    def warm_up(self, background=True):
+        """Revalidate stale agent cards and build the routing agent ahead of the first question.
+        Returns the warm-up thread when `background` is set."""
+        if background:
+            self._warm_up_thread = threading.Thread(target=self.warm_up, args=(False,),
+                                                    name="smart-client-warm-up", daemon=True)
+            self._warm_up_thread.start()
+            return self._warm_up_thread
+        started = time.perf_counter()
+        if not self.registry_url:
+            self._revalidate_cards()
+        self.client_agent
+        self.startup_stats["warm_up_seconds"] = time.perf_counter() - started
+    
+    def _revalidate_cards(self):
+        """Re-fetch stale agent cards of direct connections and apply any that changed"""
+        stale = self.card_cache.stale_urls(self.agent_urls)
+        before = {url: self.card_cache.cached(url) for url in stale}
+        cards = self.card_cache.refresh(stale)
+        if any(cards[url] != before[url] for url in stale):
+            started = time.perf_counter()
+            self._refresh_agents([card_to_agent(url, card) for url in self.agent_urls
+                                  if (card := self.card_cache.cached(url))], started)
+    
+    def start_refresh(self, interval=DEFAULT_REFRESH_INTERVAL):
+        """Keep the agent set current while the client runs: follow the registry's change
+        feed (long-polling /watch), or re-check stale agent cards every `interval` seconds
+        for direct connections. Agents that register, leave or change are applied as they
+        happen, without rebuilding the routing agents or waiting for answers in progress."""
+        if self._refresh_future is None:
+            self._refresh_future = self._submit(self._watch_registry() if self.registry_url
+                                                else self._poll_agent_cards(interval))
+        return self._refresh_future
+    
+    def stop_refresh(self):
+        """Stop following agent set changes"""
+        future, self._refresh_future = self._refresh_future, None
+        if future is not None:
+            future.cancel()
+    
+    async def _watch_registry(self):
+        registry = AsyncRegistryClient(self.registry_url)
+        # Instances by id, rebuilt from the feed: the first call (revision 0, no wait) replays
+        # the registry's change log, or returns the full list when the log no longer reaches back
+        instances, revision, epoch = {}, 0, None
+        try:
+            while True:
+                result = await registry.watch(revision, epoch, timeout=WATCH_TIMEOUT if epoch else 0)
+                if result is None:
+                    # Registry unreachable: keep routing to the agents we know
+                    await asyncio.sleep(WATCH_RETRY)
+                    continue
+                started = time.perf_counter()
+                if result["reset"]:
+                    instances = {agent["instance_id"]: agent for agent in result["agents"]}
+                for change in result["changes"]:
+                    if change["type"] == "unregister":
+                        instances.pop(change["instance_id"], None)
+                    else:
+                        instances[change["instance_id"]] = change["agent"]
+                revision, epoch = result["revision"], result["epoch"]
+                if result["reset"] or result["changes"]:
+                    self._refresh_agents(list(instances.values()), started)
+        finally:
+            await registry.aclose()
+    
+    async def _poll_agent_cards(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self._revalidate_cards)
+    
+    def _refresh_agents(self, agents, started):
+        """Apply a new agent set, recording how long it took and how many tools it rebuilt"""
+        added, removed, rebuilt = self._apply_agents(agents)
+        seconds = time.perf_counter() - started
+        stats = self.refresh_stats
+        stats["refreshes"] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        if added or removed or rebuilt:
+            stats["agent_changes"] += 1
+            stats["agents_added"] += len(added)
+            stats["agents_removed"] += len(removed)
+            stats["tools_rebuilt"] += rebuilt
+            changes = ", ".join([f"+{name}" for name in added] + [f"-{name}" for name in removed])
+            print(f"🔄 Agents changed ({changes or 'updated descriptions'}): "
+                  f"{rebuilt} tools rebuilt, applied in {seconds * 1000:.1f}ms")
+    
+    def run(self, coro):
+        """Run a coroutine on the client's event loop and wait for its result.
         
+        Sync entry points share one long-lived loop (in a daemon thread) so the
+        async connection pool is reused across calls.
+        """
+        return self._submit(coro).result()
+    
+    async def _on_loop(self, coro):
+        """Await a coroutine on the client's loop from whichever loop the caller runs on.
+        Async entry points go through here: conversation locks bind to one loop, so every
+        answer, sync or async, has to wait for them on the same one."""
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self._submit(coro))
+    
+    async def _relay(self, agen):
+        """Async generator counterpart of _on_loop: drive `agen` on the client's loop and
+        yield its items on the caller's"""
+        if asyncio.get_running_loop() is self._loop:
+            async with contextlib.aclosing(agen):
+                async for item in agen:
+                    yield item
+            return
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        future = self._pump(agen, lambda message: loop.call_soon_threadsafe(items.put_nowait, message))
         try:
-            response = self.client_agent(question)
-            return response
+            while True:
+                has_item, value = await items.get()
+                if has_item:
+                    yield value
+                elif value is not None:
+                    raise value
+                else:
+                    return
+        finally:
+            future.cancel()
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the client's event loop, starting the loop on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="smart-client-loop", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    def close(self):
+        """Release connections and stop the client's event loop"""
+        self.stop_refresh()
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.transport.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+        self.transport.close()
+    
+    def ask(self, question, use_cache=True, deadline=None, conversation=None):
+        """Ask a question and get routed to the right agent.
+        `deadline` overrides the policy's seconds allowed for the whole answer.
+        `conversation` names a separate routing history (e.g. a user session);
+        None continues the client's shared conversation."""
+        return self.run(self.ask_async(question, use_cache=use_cache, deadline=deadline, conversation=conversation))
+    
+    async def ask_async(self, question, use_cache=True, isolated=False, deadline=None, conversation=None):
+        """Async variant of ask(), awaitable from any event loop. `isolated` answers with a
+        fresh routing agent instead of a conversational one, so calls can run in parallel."""
+        try:
+            return await self._on_loop(self._answer(question, use_cache=use_cache, isolated=isolated,
+                                                    deadline=deadline, conversation=conversation))
         except Exception as e:
             return f"❌ Error: {e}"
+    
+    async def _answer(self, question, use_cache=True, isolated=False, verbose=True, deadline=None,
+                      conversation=None):
+        """Route and answer one question, raising if no path produced an answer"""
+        # One trace per question: routing, A2A calls and the specialists' model calls nest under it
+        with span("smart_client.answer", {"question.length": len(question)}):
+            return await self._route_and_answer(question, use_cache, isolated, verbose, deadline, conversation)
+    
+    async def _route_and_answer(self, question, use_cache, isolated, verbose, deadline, conversation):
+        log = print if verbose else (lambda *args, **kwargs: None)
+        log(f"❓ Question: {question}")
+        
+        deadline = self.resilience.new_deadline(deadline)
+        start = time.perf_counter()
+        # Isolated questions belong to no conversation, so agents see them without a context
+        call = self._call_agent if isolated else self._conversation_call(conversation)
+        remember = (lambda answer: None) if isolated else (
+            lambda answer: self._remember_turn(conversation, question, answer))
+        plan = self.planner.plan(question, self.prerouter) if self.planner else None
+        if plan:
+            # Parts for different agents: ask them concurrently and merge the answers
+            log(f"🧩 Split into {len(plan.tasks)} parts for {', '.join(plan.agents)}")
+            annotate({"a2a.plan.parts": len(plan.tasks)})
+            log()
+            results = await self.planner.execute(plan, call, deadline)
+            if any(r.answer is not None for r in results):
+                self._record_route("planned", start)
+                answer = self.planner.merge(results)
+                remember(answer)
+                return answer
+            if deadline.expired:
+                raise DeadlineExceeded(f"No answer within {deadline.seconds:g}s")
+            log("⚠️  Every part failed, falling back to LLM routing")
+        decision = self.prerouter.route(question) if self.fast_path and self.prerouter else None
+        if decision:
+            # Confident local match: skip the routing LLM and call the specialist directly
+            agent = self.agents[decision.agent]
+            cache = self.response_cache if use_cache else None
+            if cache is not None:
+                cached = cache.get(question, decision.agent)
+                if cached is not None:
+                    annotate({"a2a.route": "cache"})
+                    log(f"💾 Cached answer from {decision.agent}")
+                    log()
+                    remember(cached)
+                    return cached
+            log(f"⚡ Fast path to {decision.agent} (score {decision.score:.2f})")
+            log()
+            try:
+                response = await call(decision.agent, question, deadline)
+                self._record_route("fast_path", start)
+                if cache is not None:
+                    cache.set(question, decision.agent, response,
+                              self.ttl_policy.ttl_for(agent.get("capabilities", [])))
+                remember(response)
+                return response
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                log(f"⚠️  Fast path failed ({e}), falling back to LLM routing")
+        
+        log("🔄 Routing to appropriate agent...")
+        log()
+        
+        invocation_state = {"deadline": deadline}
+        if isolated:
+            routing = self._build_router_agent().invoke_async(question, invocation_state=invocation_state)
+        else:
+            # Past the deadline we stop waiting; the conversation's agent finishes its turn in the
+            # background so its history stays consistent
+            routing = asyncio.shield(asyncio.ensure_future(self._ask_router(question, invocation_state,
+                                                                            conversation)))
+        try:
+            response = await asyncio.wait_for(routing, deadline.remaining())
+        except asyncio.TimeoutError:
+            self.resilience.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"No answer within {deadline.seconds:g}s")
+        self._record_route("llm_path", start)
+        return str(response)
+    
+    async def _ask_router(self, question, invocation_state, conversation=None):
+        # A conversational agent keeps history, so it answers one question at a time
+        agent, lock = await asyncio.to_thread(self._conversation, conversation)
+        async with lock:
+            return await agent.invoke_async(question, invocation_state=invocation_state)
+    
+    async def _call_agent(self, name, message, deadline=None, context_id=None):
+        """Send a message to a replica of agent `name` under the resilience policy.
+        Used by the fast path and by the routing agent's tools, whose messages carry
+        every detail the agent needs and so go without a `context_id`."""
+        # The agent may have left since the call was routed; the dispatcher then has no replica for it
+        agent = self.agents.get(name, {})
+        ttl = self.ttl_policy.ttl_for(agent.get("capabilities", []))
+        # Only answers that are safe to cache are safe to ask twice: only those are hedged, or
+        # retried on another replica after a failure the agent may already have acted on
+        with span("smart_client.call", {"a2a.agent": name}):
+            return await self.resilience.call(
+                self.dispatcher, name,
+                lambda url, remaining: self.transport.send_async(url, message, context_id=context_id,
+                                                                 deadline=remaining),
+                deadline or self.resilience.new_deadline(), idempotent=ttl > 0
+            )
+    
+    def stream(self, question, use_cache=True, deadline=None, conversation=None):
+        """Like ask(), but yield the answer in chunks as the agent produces them"""
+        return self._iterate(self._stream(question, use_cache, deadline, conversation))
+    
+    async def stream_async(self, question, use_cache=True, deadline=None, conversation=None):
+        """Async variant of stream(), iterable from any event loop. Pre-routed questions
+        stream straight from the specialist over A2A message/stream; the rest stream
+        from the routing agent."""
+        async for chunk in self._relay(self._stream(question, use_cache, deadline, conversation)):
+            yield chunk
+    
+    async def _stream(self, question, use_cache, deadline, conversation):
+        with span("smart_client.stream", {"question.length": len(question)}):
+            # Closed with this generator, so its cleanup (router lock, plan tasks) runs right away
+            chunks = self._route_and_stream(question, use_cache, deadline, conversation)
+            async with contextlib.aclosing(chunks):
+                async for chunk in chunks:
+                    yield chunk
+    
+    async def _route_and_stream(self, question, use_cache, deadline, conversation):
+        deadline = self.resilience.new_deadline(deadline)
+        start = time.perf_counter()
+        first_chunk_at = None
+        plan = self.planner.plan(question, self.prerouter) if self.planner else None
+        if plan:
+            # Parts run concurrently; each is shown, in question order, once it has answered.
+            # Failed parts are held back until a part succeeds: if none does, nothing has been
+            # shown and the LLM router answers instead, as in _route_and_answer
+            tasks = self.planner.start(plan, self._conversation_call(conversation), deadline)
+            results = []
+            sections = []
+            try:
+                for task in tasks:
+                    results.append(await task)
+                    if not any(r.answer is not None for r in results):
+                        continue
+                    if first_chunk_at is None:
+                        first_chunk_at = time.perf_counter()
+                    for result in results[len(sections):]:
+                        sections.append(("\n\n" if sections else "") + self.planner.section(result))
+                        yield sections[-1]
+            finally:
+                for task in tasks:
+                    task.cancel()
+            self.planner.record(results, start)
+            if sections:
+                self._record_route("planned", start)
+                self._record_stream(start, first_chunk_at)
+                self._remember_turn(conversation, question, "".join(sections))
+                return
+            if deadline.expired:
+                raise DeadlineExceeded(f"No answer within {deadline.seconds:g}s")
+        decision = self.prerouter.route(question) if self.fast_path and self.prerouter else None
+        if decision:
+            agent = self.agents[decision.agent]
+            cache = self.response_cache if use_cache else None
+            cached = cache.get(question, decision.agent) if cache is not None else None
+            if cached is not None:
+                annotate({"a2a.route": "cache"})
+                self._remember_turn(conversation, question, cached)
+                yield cached
+                return
+            chunks = []
+            # A stream can't be hedged or retried once chunks are shown, but it
+            # still skips open circuits and reports its outcome to the breaker
+            replica = self.resilience.choose(self.dispatcher, decision.agent, set())
+            try:
+                if replica is None:
+                    raise CircuitOpenError(f"No available replica of {decision.agent}: circuits open")
+                attempt_start = time.perf_counter()
+                try:
+                    with self.dispatcher.track(replica):
+                        async for chunk in self.transport.stream_async(
+                                replica.url, question, context_id=self._context_id(conversation, decision.agent),
+                                deadline=deadline.remaining()):
+                            if first_chunk_at is None:
+                                first_chunk_at = time.perf_counter()
+                            chunks.append(chunk)
+                            yield chunk
+                except BaseException as e:
+                    self.resilience.record(decision.agent, replica.url, attempt_start, e)
+                    raise
+                self.resilience.record(decision.agent, replica.url, attempt_start, None)
+            except Exception:
+                if chunks or deadline.expired:
+                    raise
+                # Nothing shown yet, so the LLM router can still answer in full
+                decision = None
+            else:
+                self._record_route("fast_path", start)
+                self._record_stream(start, first_chunk_at)
+                answer = "".join(chunks).strip()
+                if cache is not None:
+                    cache.set(question, decision.agent, answer, self.ttl_policy.ttl_for(agent.get("capabilities", [])))
+                self._remember_turn(conversation, question, answer)
+                return
+        
+        # A conversational agent keeps history, so it answers one question at a time
+        agent, lock = await asyncio.to_thread(self._conversation, conversation)
+        # The deadline bounds the wait for the conversation and every wait for the next chunk
+        try:
+            await until_deadline(lock.acquire(), deadline)
+            try:
+                events = agent.stream_async(question, invocation_state={"deadline": deadline})
+                async with contextlib.aclosing(events):
+                    while True:
+                        try:
+                            event = await until_deadline(anext(events), deadline)
+                        except StopAsyncIteration:
+                            break
+                        if event.get("data"):
+                            if first_chunk_at is None:
+                                first_chunk_at = time.perf_counter()
+                            yield event["data"]
+            finally:
+                lock.release()
+        except DeadlineExceeded:
+            self.resilience.stats["deadline_exceeded"] += 1
+            raise
+        self._record_route("llm_path", start)
+        self._record_stream(start, first_chunk_at)
+    
+    def _record_stream(self, start, first_chunk_at):
+        """Account time to first chunk against time to the complete answer"""
+        now = time.perf_counter()
+        self.stream_stats["streams"] += 1
+        self.stream_stats["first_chunk_seconds"] += (first_chunk_at or now) - start
+        self.stream_stats["total_seconds"] += now - start
+    
+    def _batch_answerer(self, max_concurrency):
+        """Per-question coroutine for a batch, with at most `max_concurrency` in flight"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def answer(index, question, use_cache):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await self._answer(question, use_cache=use_cache, isolated=True, verbose=False)
+                    return BatchResult(index, question, response, None, time.perf_counter() - start)
+                except Exception as e:
+                    return BatchResult(index, question, None, str(e) or type(e).__name__,
+                                       time.perf_counter() - start)
+        
+        return answer
+    
+    async def ask_many_async(self, questions, max_concurrency=DEFAULT_MAX_CONCURRENCY, use_cache=True):
+        """Answer independent questions concurrently; results in input order.
+        A failing question yields a BatchResult with `error` set instead of raising."""
+        return await self._on_loop(self._ask_many(questions, max_concurrency, use_cache))
+    
+    async def _ask_many(self, questions, max_concurrency, use_cache):
+        answer = self._batch_answerer(max_concurrency)
+        return list(await asyncio.gather(*(answer(i, q, use_cache) for i, q in enumerate(questions))))
+    
+    async def ask_as_completed(self, questions, max_concurrency=DEFAULT_MAX_CONCURRENCY, use_cache=True):
+        """Like ask_many_async(), but yield each BatchResult as soon as it is ready"""
+        async for result in self._relay(self._ask_as_completed(questions, max_concurrency, use_cache)):
+            yield result
+    
+    async def _ask_as_completed(self, questions, max_concurrency, use_cache):
+        answer = self._batch_answerer(max_concurrency)
+        tasks = [asyncio.ensure_future(answer(i, q, use_cache)) for i, q in enumerate(questions)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def ask_many(self, questions, max_concurrency=DEFAULT_MAX_CONCURRENCY, use_cache=True, ordered=True):
+        """Sync batch API: a list in input order, or (ordered=False) an iterator
+        of BatchResults in completion order"""
+        questions = list(questions)
+        if ordered:
+            return self.run(self._ask_many(questions, max_concurrency, use_cache))
+        return self._iterate(self._ask_as_completed(questions, max_concurrency, use_cache))
+    
+    def _iterate(self, agen):
+        """Drive an async generator on the client's loop and yield its items to sync code.
+        
+        The generator runs start to finish inside one task (agent streams rely on
+        context variables that must not hop between tasks); items cross back
+        through a thread-safe queue.
+        """
+        items = queue.Queue()
+        future = self._pump(agen, items.put)
+        try:
+            while True:
+                has_item, value = items.get()
+                if has_item:
+                    yield value
+                elif value is not None:
+                    raise value
+                else:
+                    return
+        finally:
+            future.cancel()
+    
+    def _pump(self, agen, put):
+        """Run an async generator on the client's loop, passing each item to put((True, item))
+        and then the end of the stream to put((False, exception or None))"""
+        
+        async def pump():
+            try:
+                async for item in agen:
+                    put((True, item))
+            except Exception as e:
+                put((False, e))
+            else:
+                put((False, None))
+        
+        return self._submit(pump())
+    
+    def invalidate_cache(self, question=None, agent=None):
+        """Drop cached answers for a question and/or agent (everything if neither is given)"""
+        if self.response_cache is None:
+            return 0
+        return self.response_cache.invalidate(question=question, agent=agent)
+    
+    def _record_route(self, path, start):
+        """Account one answered question to the fast or LLM routing path"""
+        annotate({"a2a.route": path})
+        self.routing_stats[path] += 1
+        self.routing_stats[f"{path}_seconds"] += time.perf_counter() - start
+    
+    def routing_report(self):
+        """Fast-path hit rate and estimated latency saved versus LLM routing"""
+        stats = self.routing_stats
+        total = stats["fast_path"] + stats["llm_path"] + stats["planned"]
+        avg_fast = stats["fast_path_seconds"] / stats["fast_path"] if stats["fast_path"] else None
+        avg_llm = stats["llm_path_seconds"] / stats["llm_path"] if stats["llm_path"] else None
+        saved = None
+        if avg_fast is not None and avg_llm is not None:
+            saved = max(avg_llm - avg_fast, 0.0) * stats["fast_path"]
+        streams = self.stream_stats["streams"]
+        refresh = self.refresh_stats
+        return {
+            "questions": total,
+            "fast_path_hit_rate": stats["fast_path"] / total if total else 0.0,
+            "avg_fast_path_seconds": avg_fast,
+            "avg_llm_path_seconds": avg_llm,
+            "estimated_seconds_saved": saved,
+            "planned": stats["planned"],
+            "planner": self.planner.report() if self.planner else None,
+            "streamed": streams,
+            "avg_first_chunk_seconds": self.stream_stats["first_chunk_seconds"] / streams if streams else None,
+            "avg_full_answer_seconds": self.stream_stats["total_seconds"] / streams if streams else None,
+            "resilience": self.resilience.report(),
+            "startup": dict(self.startup_stats),
+            "memory": self.memory.stats(),
+            "conversations": len(self._conversations),
+            "refresh": dict(refresh,
+                            avg_seconds=refresh["seconds"] / refresh["refreshes"] if refresh["refreshes"] else None,
+                            tools_rebuilt_per_change=(refresh["tools_rebuilt"] / refresh["agent_changes"]
+                                                      if refresh["agent_changes"] else None))
+        }
+
+def print_startup_report(client):
+    """Print how long the client took to start and where its agent cards came from"""
+    stats = client.startup_stats
+    cached, fetched = stats["cards_cached"], stats["cards_fetched"]
+    if not cached and not fetched:
+        print(f"🚀 Ready in {stats['seconds']:.2f}s")
+        return
+    kind = "warm" if not fetched else "cold" if not cached else "partly warm"
+    print(f"🚀 Ready in {stats['seconds']:.2f}s ({kind} start: {cached} agent cards from cache, {fetched} fetched)")
+
+def print_routing_report(client):
+    """Print the pre-router hit rate and latency saved"""
+    report = client.routing_report()
+    if not report["questions"]:
+        return
+    print(f"⚡ Fast-path hit rate: {report['fast_path_hit_rate']:.0%} of {report['questions']} questions")
+    if report["estimated_seconds_saved"] is not None:
+        print(f"⏱️  Avg latency: fast path {report['avg_fast_path_seconds']:.2f}s, "
+              f"LLM routing {report['avg_llm_path_seconds']:.2f}s "
+              f"(~{report['estimated_seconds_saved']:.1f}s saved)")
+    for name, replicas in client.dispatcher.stats().items():
+        if len(replicas) > 1:
+            spread = ", ".join(f"{r['url']} x{r['dispatched']}" for r in replicas)
+            print(f"⚖️  {name} ({client.dispatcher.strategy}): {spread}")
+    planner = report["planner"]
+    if planner and planner["plans"]:
+        print(f"🧩 Planner: {planner['plans']} compound questions split into {planner['subtasks']} parts, "
+              f"answered in {planner['seconds']:.2f}s vs ~{planner['sequential_seconds']:.2f}s one part at a time")
+    resilience = report["resilience"]
+    if resilience["hedges"] or resilience["failovers"] or resilience["deadline_exceeded"] or resilience["open_circuits"]:
+        print(f"🛡️  Resilience: {resilience['hedges']} hedged ({resilience['hedge_wins']} won by the hedge), "
+              f"{resilience['failovers']} failovers, {resilience['deadline_exceeded']} past deadline, "
+              f"open circuits: {', '.join(resilience['open_circuits']) or 'none'}")
+    memory = report["memory"]
+    if memory["trims"]:
+        print(f"🧠 Conversation memory: {memory['tokens']} of {memory['max_tokens']} tokens "
+              f"(peak {memory['peak_tokens']}), {memory['messages_dropped']} messages compacted into "
+              f"{memory['summaries']} summaries")
+    refresh = report["refresh"]
+    if refresh["agent_changes"]:
+        print(f"🔄 Live refresh: {refresh['agent_changes']} agent set changes "
+              f"(+{refresh['agents_added']} / -{refresh['agents_removed']} agents), "
+              f"{refresh['tools_rebuilt_per_change']:.1f} tools rebuilt per change, applied in "
+              f"{refresh['avg_seconds'] * 1000:.1f}ms avg ({refresh['max_seconds'] * 1000:.1f}ms max) "
+              f"over {refresh['refreshes']} updates")
+    if report["streamed"]:
+        print(f"🌊 Streaming: first chunk after {report['avg_first_chunk_seconds']:.2f}s vs "
+              f"full answer after {report['avg_full_answer_seconds']:.2f}s (avg of {report['streamed']})")
 
 def interactive_mode(client):
     """Run in interactive mode"""
@@ -95,8 +904,10 @@ def interactive_mode(client):
                 continue
                 
             print()
-            response = client.ask(question)
-            print(f"🤖 Assistant: {response}")
+            print("🤖 Assistant: ", end="", flush=True)
+            for chunk in client.stream(question):
+                print(chunk, end="", flush=True)
+            print()
             print("\n" + "="*40 + "\n")
             
         except KeyboardInterrupt:
@@ -105,8 +916,8 @@ def interactive_mode(client):
         except Exception as e:
             print(f"❌ Error: {e}")
 
-def demo_mode(client):
-    """Run demo with sample questions"""
+def demo_mode(client, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Run demo with sample questions, answered concurrently"""
     print("🎯 Smart A2A Client - Demo Mode")
     print("="*40)
     
@@ -119,11 +930,72 @@ def demo_mode(client):
         "How do I cancel a flight booking?"
     ]
     
-    for question in demo_questions:
+    start = time.perf_counter()
+    results = client.ask_many(demo_questions, max_concurrency=max_concurrency)
+    elapsed = time.perf_counter() - start
+    
+    for result in results:
         print()
-        response = client.ask(question)
-        print(f"🤖 Assistant: {response}")
+        print(f"❓ Question: {result.question}")
+        print(f"🤖 Assistant: {result.answer if result.ok else f'❌ Error: {result.error}'}")
         print("\n" + "-"*40)
+    
+    print()
+    print_batch_summary(results, elapsed)
+    print_routing_report(client)
+
+def print_batch_summary(results, elapsed):
+    """Print wall-clock time against the sequential sum of per-question latencies"""
+    failed = sum(1 for r in results if not r.ok)
+    sequential = sum(r.seconds for r in results)
+    print(f"📦 {len(results)} questions in {elapsed:.2f}s ({failed} failed); "
+          f"one at a time would take ~{sequential:.2f}s")
+
+def load_batch_questions(path):
+    """Read questions from a JSONL file: one object per line with a `question`,
+    `body` or `title` field (an `id`/`request_id` is carried through)"""
+    items = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            question = record.get("question") or record.get("body") or record.get("title")
+            if not question:
+                print(f"⚠️  Skipping line {line_number}: no question, body or title")
+                continue
+            items.append((record.get("request_id") or record.get("id") or line_number, question))
+    return items
+
+def batch_mode(client, input_path, output_path=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Answer every question in a JSONL file concurrently, writing results as they complete"""
+    items = load_batch_questions(input_path)
+    print(f"🎯 Smart A2A Client - Batch Mode ({len(items)} questions, concurrency {max_concurrency})")
+    print("="*40)
+    
+    output = open(output_path, "w") if output_path else None
+    results = []
+    start = time.perf_counter()
+    try:
+        for result in client.ask_many([q for _, q in items], max_concurrency=max_concurrency, ordered=False):
+            results.append(result)
+            item_id = items[result.index][0]
+            status = "✅" if result.ok else f"❌ {result.error}"
+            print(f"[{len(results)}/{len(items)}] {item_id} {result.seconds:.2f}s {status}")
+            if output:
+                output.write(json.dumps({"id": item_id, "question": result.question, "answer": result.answer,
+                                         "error": result.error, "seconds": round(result.seconds, 3)}) + "\n")
+                output.flush()
+    finally:
+        if output:
+            output.close()
+    
+    print()
+    print_batch_summary(results, time.perf_counter() - start)
+    print_routing_report(client)
+    if output_path:
+        print(f"💾 Results written to {output_path}")
 
 def main():
     """Main entry point"""
@@ -139,25 +1011,132 @@ def main():
         default="http://localhost:8000",
         help="Agent registry URL for service discovery (default: http://localhost:8000)"
     )
+    parser.add_argument(
+        "--no-fast-path",
+        action="store_true",
+        help="Always route through the LLM instead of the local pre-router"
+    )
+    parser.add_argument(
+        "--no-planner",
+        action="store_true",
+        help="Don't split compound questions into concurrent parts for different agents"
+    )
+    parser.add_argument(
+        "--cache",
+        choices=["none", "memory", "disk"],
+        default="memory",
+        help="Response cache for pre-routed answers (default: memory)"
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default="response_cache.db",
+        help="SQLite file for --cache disk, shareable between clients (default: response_cache.db)"
+    )
+    parser.add_argument(
+        "--card-cache",
+        type=str,
+        default=DEFAULT_CARD_CACHE_PATH,
+        help=f"JSON file caching agent cards between runs (default: {DEFAULT_CARD_CACHE_PATH})"
+    )
+    parser.add_argument(
+        "--no-card-cache",
+        action="store_true",
+        help="Fetch every agent card at startup instead of using the on-disk cache"
+    )
+    parser.add_argument(
+        "--balancer",
+        choices=sorted(BALANCERS),
+        default="p2c",
+        help="How to spread requests over replicas of an agent: power-of-two-choices on "
+             "outstanding requests or weighted round-robin (default: p2c)"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help=f"Seconds allowed per answer, passed on to agents (default: {DEFAULT_DEADLINE:g})"
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Re-send slow calls to a second replica at the agent's p95 latency (read-only agents only)"
+    )
+    parser.add_argument(
+        "--memory-tokens",
+        type=int,
+        default=DEFAULT_MAX_TOKENS,
+        help=f"Token budget for the conversation history; older turns are summarized (default: {DEFAULT_MAX_TOKENS})"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Pick up agents that register, leave or change while running (registry change feed, "
+             f"or agent cards re-checked every {DEFAULT_REFRESH_INTERVAL:g}s for --agents)"
+    )
+    add_model_arguments(parser)
+    add_telemetry_arguments(parser, metrics=False)
     parser.add_argument(
         "--mode",
-        choices=["interactive", "demo"],
+        choices=["interactive", "demo", "batch"],
         default="interactive",
-        help="Run mode: interactive or demo"
+        help="Run mode: interactive, demo or batch"
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        help="JSONL file of questions for --mode batch (question, body or title per line)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="JSONL file to write batch results to"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help=f"Questions answered in parallel in demo and batch modes (default: {DEFAULT_MAX_CONCURRENCY})"
     )
     
     args = parser.parse_args()
+    if args.mode == "batch" and not args.input:
+        parser.error("--mode batch requires --input")
+    setup_tracing("smart_client", args.trace)
+    
+    response_cache = None
+    if args.cache == "memory":
+        response_cache = LRUResponseCache()
+    elif args.cache == "disk":
+        response_cache = SQLiteResponseCache(args.cache_path)
+    
+    resilience = ResiliencePolicy(deadline=args.deadline, hedge=args.hedge)
+    card_cache = AgentCardCache(path=None if args.no_card_cache else args.card_cache)
     
     try:
         # Create smart client - prefer registry over direct URLs
         if args.registry and not args.agents:
-            client = SmartA2AClient(registry_url=args.registry)
+            client = SmartA2AClient(registry_url=args.registry, fast_path=not args.no_fast_path,
+                                    response_cache=response_cache, balancer=args.balancer,
+                                    resilience=resilience, card_cache=card_cache,
+                                    memory_tokens=args.memory_tokens, planner=not args.no_planner,
+                                    model=build_model(args))
         else:
-            client = SmartA2AClient(agent_urls=args.agents or ["http://localhost:8080", "http://localhost:8081"])
+            client = SmartA2AClient(agent_urls=args.agents or ["http://localhost:8080", "http://localhost:8081"],
+                                    fast_path=not args.no_fast_path, response_cache=response_cache,
+                                    balancer=args.balancer, resilience=resilience, card_cache=card_cache,
+                                    memory_tokens=args.memory_tokens, planner=not args.no_planner,
+                                    model=build_model(args))
+        # Revalidate cards and build the routing agent while the first question is typed
+        client.warm_up()
+        if args.refresh:
+            client.start_refresh()
         
         # Run in selected mode
         if args.mode == "demo":
-            demo_mode(client)
+            demo_mode(client, args.concurrency)
+        elif args.mode == "batch":
+            batch_mode(client, args.input, args.output, args.concurrency)
         else:
             interactive_mode(client)
             
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Conversation Memory
+Token-budgeted sliding window for long-lived agents, with the messages that
+slide out compacted into a rolling summary on a background thread
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from strands.agent.conversation_manager import ConversationManager
+from strands.hooks import BeforeInvocationEvent
+from strands.types.exceptions import ContextWindowOverflowException
+
+DEFAULT_MAX_TOKENS = 8000
+# After trimming, the history fills this share of the budget, so trimming doesn't run every turn
+DEFAULT_TARGET_RATIO = 0.75
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+PLACEHOLDER_TEXT = "Earlier messages were removed to save memory; their summary is not available yet."
+SUMMARY_SYSTEM_PROMPT = """You compress conversation history for an assistant.
+Write a concise summary of the conversation below that keeps every fact, name, date, place,
+number, decision and open request the assistant may need later. Reply with the summary only."""
+
+_summary_executor: Optional[ThreadPoolExecutor] = None
+_summary_executor_lock = threading.Lock()
+
+def _executor() -> ThreadPoolExecutor:
+    """Shared background pool for summaries across every conversation in the process"""
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarize")
+        return _summary_executor
+
+def _block_text(block: dict) -> str:
+    if "text" in block:
+        return block["text"]
+    if "toolUse" in block:
+        return f"[tool call {block['toolUse'].get('name', '')}: {json.dumps(block['toolUse'].get('input', {}))}]"
+    if "toolResult" in block:
+        return "[tool result: " + " ".join(_block_text(c) for c in block["toolResult"].get("content", [])) + "]"
+    if "json" in block:
+        return json.dumps(block["json"])
+    return "[attachment]"
+
+def message_text(message: dict) -> str:
+    """Plain-text rendering of a message's content blocks"""
+    return " ".join(_block_text(block) for block in message.get("content", []))
+
+def estimate_tokens(message: dict) -> int:
+    """Rough token count of a message (~4 characters per token, plus per-message overhead)"""
+    return len(message_text(message)) // 4 + 4
+
+async def _complete(model, prompt: str) -> str:
+    """One-shot text completion on a strands model"""
+    chunks = []
+    async for event in model.stream([{"role": "user", "content": [{"text": prompt}]}],
+                                    system_prompt=SUMMARY_SYSTEM_PROMPT):
+        delta = event.get("contentBlockDelta", {}).get("delta", {})
+        if "text" in delta:
+            chunks.append(delta["text"])
+    return "".join(chunks).strip()
+
+class TokenBudgetConversationManager(ConversationManager):
+    """Keeps an agent's history within `max_tokens` (estimated).
+
+    After a turn that leaves the history over budget, the oldest messages are
+    dropped until it fits in `target_ratio` of the budget, always keeping the
+    latest `min_messages`. The history then starts with one summary message
+    followed by an assistant message, so roles still alternate and no tool call
+    is separated from its result.
+
+    Dropped messages are summarized on a background thread (folded into the
+    previous summary), and the new summary is swapped in before the next turn.
+    A turn never waits for a summary; until one is ready the history starts
+    with a placeholder. With `summarize=False` the window just slides.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, target_ratio: float = DEFAULT_TARGET_RATIO,
+                 summarize: bool = True, min_messages: int = 2):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.target_ratio = target_ratio
+        self.summarize = summarize
+        self.min_messages = max(1, min_messages)
+        # The message at the front of the history standing in for dropped messages
+        self._summary_message: Optional[dict] = None
+        self._summary_text: Optional[str] = None
+        self._ready_summary: Optional[str] = None
+        self._pending: List[dict] = []
+        self._summarizing = False
+        self._lock = threading.Lock()
+        self.metrics = {
+            "turns": 0, "messages": 0, "tokens": 0, "peak_tokens": 0, "summary_tokens": 0,
+            "trims": 0, "messages_dropped": 0, "summaries": 0, "summary_failures": 0,
+            "summary_seconds": 0.0, "pending_messages": 0
+        }
+
+    def register_hooks(self, registry, **kwargs: Any) -> None:
+        super().register_hooks(registry, **kwargs)
+        registry.add_callback(BeforeInvocationEvent, lambda event: self._install_summary(event.agent))
+
+    def apply_management(self, agent, **kwargs: Any) -> None:
+        """End of turn: swap in a finished summary, then trim if over budget"""
+        self._install_summary(agent)
+        total = sum(estimate_tokens(m) for m in agent.messages)
+        if total > self.max_tokens:
+            self._trim(agent, int(self.max_tokens * self.target_ratio))
+            total = sum(estimate_tokens(m) for m in agent.messages)
+        self.metrics["turns"] += 1
+        self.metrics["messages"] = len(agent.messages)
+        self.metrics["tokens"] = total
+        self.metrics["peak_tokens"] = max(self.metrics["peak_tokens"], total)
+
+    def reduce_context(self, agent, e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """The model rejected the prompt as too long: trim to half the budget right away"""
+        if not self._trim(agent, self.max_tokens // 2) and e is not None:
+            raise ContextWindowOverflowException("Cannot trim the conversation any further") from e
+
+    def _trim(self, agent, target: int) -> int:
+        """Drop the oldest messages until the history fits `target` tokens; returns how many were dropped"""
+        messages = agent.messages
+        start = 1 if messages and messages[0] is self._summary_message else 0
+        tokens = [estimate_tokens(m) for m in messages]
+        total = sum(tokens)
+        removed = 0
+        split = None
+        # The window must start at an assistant message: right after the (user-role) summary
+        for i in range(start, len(messages) - self.min_messages + 1):
+            if i > start and messages[i]["role"] == "assistant":
+                split = i
+                if total - removed <= target:
+                    break
+            removed += tokens[i]
+        if split is None:
+            return 0
+        dropped = messages[start:split]
+        if self._summary_message is None:
+            self._summary_message = {"role": "user", "content": [{"text": PLACEHOLDER_TEXT}]}
+        messages[:] = [self._summary_message] + messages[split:]
+        self.removed_message_count += len(dropped)
+        self.metrics["trims"] += 1
+        self.metrics["messages_dropped"] += len(dropped)
+        if self.summarize:
+            with self._lock:
+                self._pending.extend(dropped)
+                self.metrics["pending_messages"] = len(self._pending)
+            self._schedule_summary(agent.model)
+        return len(dropped)
+
+    def _schedule_summary(self, model):
+        """Summarize pending messages in the background, one batch at a time per conversation"""
+        with self._lock:
+            if self._summarizing or not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            previous = self._ready_summary or self._summary_text
+            self._summarizing = True
+            self.metrics["pending_messages"] = 0
+        _executor().submit(self._summarize, model, previous, batch)
+
+    def _summarize(self, model, previous: Optional[str], batch: List[dict]):
+        start = time.perf_counter()
+        transcript = "\n".join(f"{m['role'].capitalize()}: {message_text(m)}" for m in batch)
+        prompt = f"{SUMMARY_PREFIX}\n{previous}\n\nConversation since then:\n{transcript}" if previous else transcript
+        summary = None
+        try:
+            summary = asyncio.run(_complete(model, prompt)) or None
+        except Exception as e:
+            print(f"⚠️  Conversation summary failed: {e}")
+        with self._lock:
+            self._summarizing = False
+            if summary:
+                self._ready_summary = summary
+                self.metrics["summaries"] += 1
+                self.metrics["summary_seconds"] += time.perf_counter() - start
+            else:
+                # The dropped messages are gone either way; the previous summary still stands
+                self.metrics["summary_failures"] += 1
+        self._schedule_summary(model)
+
+    def _install_summary(self, agent):
+        """Replace the front-of-history summary with the newest finished one"""
+        with self._lock:
+            summary, self._ready_summary = self._ready_summary, None
+        if summary is None:
+            return
+        message = {"role": "user", "content": [{"text": f"{SUMMARY_PREFIX}\n{summary}"}]}
+        messages = agent.messages
+        if messages and messages[0] is self._summary_message:
+            messages[0] = message
+        self._summary_message = message
+        self._summary_text = summary
+        self.metrics["summary_tokens"] = estimate_tokens(message)
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory metrics for this conversation, as of the end of its last turn"""
+        with self._lock:
+            return dict(self.metrics, max_tokens=self.max_tokens, summarizing=self._summarizing)
+
+    def get_state(self) -> Dict[str, Any]:
+        return {"summary_message": self._summary_message, **super().get_state()}
+
+    def restore_from_session(self, state: Dict[str, Any]) -> Optional[List[dict]]:
+        super().restore_from_session(state)
+        self._summary_message = state.get("summary_message")
+        return [self._summary_message] if self._summary_message else None
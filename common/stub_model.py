@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Stub Model
+Deterministic, offline stand-in for an LLM with configurable latency and token
+rate, so the whole system can be run and benchmarked without network access
+"""
+
+import asyncio
+import json
+import re
+import zlib
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from strands.models.model import Model
+
+DEFAULT_LATENCY = 0.3
+DEFAULT_TOKENS_PER_SECOND = 80.0
+DEFAULT_REPLY_TOKENS = 40
+MODEL_CHOICES = ("bedrock", "stub")
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[A-Za-z0-9']+", text)
+
+def _text(message: dict) -> str:
+    parts = []
+    for block in message.get("content", []):
+        if "text" in block:
+            parts.append(block["text"])
+        elif "toolResult" in block:
+            parts.extend(c.get("text", "") for c in block["toolResult"].get("content", []))
+    return " ".join(parts)
+
+class StubModel(Model):
+    """Model that answers without a network.
+
+    Every turn waits `latency` seconds (time to first token), then streams
+    `reply_tokens` words at `tokens_per_second`. Replies are built from the
+    prompt, so the same conversation always gets the same answer. With
+    `use_tools`, a turn that offers tools calls the tool whose name and
+    description best match the prompt once (string inputs filled with the
+    prompt), then answers from its result, which exercises agent tool paths.
+    """
+
+    def __init__(self, latency: float = DEFAULT_LATENCY, tokens_per_second: float = DEFAULT_TOKENS_PER_SECOND,
+                 reply_tokens: int = DEFAULT_REPLY_TOKENS, use_tools: bool = True):
+        self.config: Dict[str, Any] = {"model_id": "stub", "latency": latency,
+                                       "tokens_per_second": tokens_per_second,
+                                       "reply_tokens": reply_tokens, "use_tools": use_tools}
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("StubModel does not produce structured output")
+        yield
+
+    def _pick_tool(self, prompt: str, tool_specs: List[dict]) -> Optional[dict]:
+        """Tool best matching the prompt (shared 5-letter word prefixes), if its required inputs are strings"""
+        prompt_terms = {w[:5].lower() for w in _words(prompt)}
+        best, best_score = None, 0
+        for spec in tool_specs:
+            schema = spec.get("inputSchema", {}).get("json", {})
+            properties = schema.get("properties", {})
+            if any(properties.get(name, {}).get("type") != "string" for name in schema.get("required", [])):
+                continue
+            described = f"{spec['name'].replace('_', ' ')} {spec.get('description', '')}"
+            terms = {w[:5].lower() for w in _words(described)}
+            score = len(prompt_terms & terms)
+            if score > best_score:
+                best, best_score = spec, score
+        return best
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs) -> AsyncGenerator[dict, None]:
+        config = self.config
+        await asyncio.sleep(config["latency"])
+        last = messages[-1] if messages else {"content": []}
+        answering_tool = any("toolResult" in block for block in last.get("content", []))
+        prompt = next((_text(m) for m in reversed(messages)
+                       if m["role"] == "user" and not any("toolResult" in b for b in m["content"])), "")
+        input_tokens = sum(len(_text(m)) for m in messages) // 4
+        yield {"messageStart": {"role": "assistant"}}
+
+        spec = None
+        if config["use_tools"] and tool_specs and not answering_tool:
+            spec = self._pick_tool(prompt, tool_specs)
+        if spec:
+            schema = spec["inputSchema"]["json"]
+            tool_input = {name: prompt for name in schema.get("required", [])}
+            tool_use_id = "stub-%08x" % zlib.crc32(f"{spec['name']}:{prompt}".encode())
+            yield {"contentBlockStart": {"start": {"toolUse": {"name": spec["name"], "toolUseId": tool_use_id}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(tool_input)}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            yield {"metadata": {"usage": {"inputTokens": input_tokens, "outputTokens": 10,
+                                          "totalTokens": input_tokens + 10}, "metrics": {"latencyMs": 0}}}
+            return
+
+        source = _words(_text(last)) if answering_tool else _words(prompt)
+        words = (["Stub", "answer:"] + (source or ["ok"]) * config["reply_tokens"])[:max(config["reply_tokens"], 1)]
+        delay = 1.0 / config["tokens_per_second"] if config["tokens_per_second"] > 0 else 0.0
+        yield {"contentBlockStart": {"start": {}}}
+        for word in words:
+            if delay:
+                await asyncio.sleep(delay)
+            yield {"contentBlockDelta": {"delta": {"text": word + " "}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {"usage": {"inputTokens": input_tokens, "outputTokens": len(words),
+                                      "totalTokens": input_tokens + len(words)}, "metrics": {"latencyMs": 0}}}
+
+def add_model_arguments(parser, default: str = "bedrock"):
+    """--model and stub tuning flags, shared by the agents and the client"""
+    parser.add_argument(
+        "--model",
+        choices=MODEL_CHOICES,
+        default=default,
+        help=f"LLM to use: Amazon Bedrock, or a local stub for offline runs (default: {default})"
+    )
+    parser.add_argument(
+        "--stub-latency",
+        type=float,
+        default=DEFAULT_LATENCY,
+        help=f"Stub model: seconds before the first token (default: {DEFAULT_LATENCY:g})"
+    )
+    parser.add_argument(
+        "--stub-tokens-per-second",
+        type=float,
+        default=DEFAULT_TOKENS_PER_SECOND,
+        help=f"Stub model: tokens streamed per second (default: {DEFAULT_TOKENS_PER_SECOND:g})"
+    )
+    parser.add_argument(
+        "--stub-reply-tokens",
+        type=int,
+        default=DEFAULT_REPLY_TOKENS,
+        help=f"Stub model: tokens per answer (default: {DEFAULT_REPLY_TOKENS})"
+    )
+
+def build_model(args):
+    """Model selected by add_model_arguments() flags; None means the agent's default (Bedrock)"""
+    if args.model == "stub":
+        return StubModel(latency=args.stub_latency, tokens_per_second=args.stub_tokens_per_second,
+                         reply_tokens=args.stub_reply_tokens)
+    return None
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Telemetry
+Prometheus metrics and OpenTelemetry tracing shared by the registry, the agents
+and the smart client. Trace context travels hop to hop in W3C traceparent
+headers, so a client question, its registry and A2A calls and the specialist's
+model calls form one trace. Both are opt-in per process; switched off they cost
+a flag check.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from opentelemetry import context, propagate, trace
+from opentelemetry.trace import SpanKind
+from starlette.responses import Response
+from strands.hooks import (AfterInvocationEvent, AfterModelCallEvent, AfterToolCallEvent, BeforeModelCallEvent,
+                           HookProvider, HookRegistry)
+
+TRACE_EXPORTERS = ("off", "console", "otlp")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans model calls of a few milliseconds (stub) to several minutes (long answers)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# invocation_state key holding the start of the model call in progress
+_MODEL_CALL_STARTED = "_telemetry_model_call_started"
+
+_tracer = trace.get_tracer("a2a_strands")
+_tracing = False
+
+def setup_tracing(service_name: str, exporter: str = "off") -> bool:
+    """Export this process's spans (and strands' agent and model spans) as `service_name`.
+    Returns whether tracing is on; "off" leaves the no-op tracer in place."""
+    global _tracing
+    if exporter == "off" or _tracing:
+        return _tracing
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            print("⚠️  OTLP export needs opentelemetry-exporter-otlp-proto-http; tracing disabled")
+            return False
+        processor = BatchSpanProcessor(OTLPSpanExporter())
+    else:
+        processor = SimpleSpanProcessor(ConsoleSpanExporter())
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+    _tracing = True
+    return True
+
+def tracing_enabled() -> bool:
+    return _tracing
+
+def span(name: str, attributes: Optional[dict] = None, kind: SpanKind = SpanKind.INTERNAL,
+         only_in_trace: bool = False):
+    """Context manager for a child span of the current one; yields a no-op span when tracing is off.
+    `only_in_trace` skips background work (e.g. heartbeats) that isn't part of a traced request."""
+    if not _tracing or (only_in_trace and not trace.get_current_span().get_span_context().is_valid):
+        return nullcontext(trace.INVALID_SPAN)
+    return _tracer.start_as_current_span(name, kind=kind, attributes=attributes)
+
+def annotate(attributes: dict):
+    """Set attributes on the current span, if tracing"""
+    if _tracing:
+        trace.get_current_span().set_attributes(attributes)
+
+def inject(headers: Optional[dict] = None) -> dict:
+    """Headers plus the current trace context (traceparent), for an outgoing request"""
+    headers = dict(headers or {})
+    if _tracing:
+        propagate.inject(headers)
+    return headers
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Metric:
+    """A named metric with fixed label names; values are kept per label tuple"""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(value)}" for key, value in values]
+
+class Gauge(Metric):
+    """Gauge set by the caller, or read from `fn` at scrape time (label-less)"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def samples(self):
+        if self.fn is not None:
+            return [f"{self.name} {_number(self.fn())}"]
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(value)}" for key, value in values]
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram, as Prometheus expects"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (plus +Inf), sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {cumulative}")
+        return lines
+
+class Metrics:
+    """Metrics of one server process, served in the Prometheus text format at GET /metrics.
+
+    Comes with HTTP request metrics, recorded by instrument(); components add
+    their own through counter(), gauge() and histogram().
+    """
+
+    def __init__(self, prefix: str = "a2a"):
+        self.prefix = prefix
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+        self.http_requests = self.counter("http_requests_total", "HTTP requests handled",
+                                          ["method", "route", "status"])
+        self.http_latency = self.histogram("http_request_duration_seconds",
+                                           "Time from request to the end of the response (whole stream)",
+                                           ["method", "route"])
+        self.http_in_flight = self.gauge("http_requests_in_flight", "HTTP requests being handled or queued")
+
+    def _add(self, metric: Metric) -> Metric:
+        with self._lock:
+            # Registering twice (e.g. two hook providers) shares the first metric
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(f"{self.prefix}_{name}", help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), fn=None) -> Gauge:
+        return self._add(Gauge(f"{self.prefix}_{name}", help, labels, fn))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(f"{self.prefix}_{name}", help, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    async def endpoint(self, request):
+        """GET /metrics"""
+        return Response(self.render(), media_type=CONTENT_TYPE)
+
+def _route(scope) -> str:
+    """Route template of a handled request, so path parameters don't multiply the label values"""
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    if "endpoint" in scope:
+        return scope["path"]
+    return "unmatched"
+
+def instrument(app, metrics: Optional[Metrics] = None):
+    """ASGI app recording request metrics and continuing the caller's trace around `app`.
+    With no metrics and tracing off this is `app` itself."""
+    if metrics is None and not _tracing:
+        return app
+
+    async def instrumented_app(scope, receive, send):
+        if scope["type"] != "http":
+            return await app(scope, receive, send)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        server_span = token = None
+        # Frameworks with their own OpenTelemetry support (recent FastAPI) have already started one
+        if _tracing and not trace.get_current_span().is_recording():
+            carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", [])}
+            parent = propagate.extract(carrier)
+            server_span = _tracer.start_span(f"{scope['method']} {scope['path']}", context=parent,
+                                             kind=SpanKind.SERVER,
+                                             attributes={"http.method": scope["method"], "url.path": scope["path"]})
+            # A recording span as current, so strands' agent spans become its children
+            token = context.attach(trace.set_span_in_context(server_span, parent))
+        if metrics is not None:
+            metrics.http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await app(scope, receive, send_with_status)
+        finally:
+            route = _route(scope)
+            if metrics is not None:
+                metrics.http_in_flight.dec()
+                metrics.http_requests.inc(scope["method"], route, str(status))
+                metrics.http_latency.observe(time.perf_counter() - start, scope["method"], route)
+            if server_span is not None:
+                server_span.set_attributes({"http.route": route, "http.status_code": status})
+                server_span.update_name(f"{scope['method']} {route}")
+                server_span.end()
+                context.detach(token)
+
+    return instrumented_app
+
+class ModelMetrics(HookProvider):
+    """Strands hooks counting an agent server's invocations, model calls, tokens and tool calls"""
+
+    def __init__(self, metrics: Metrics):
+        self.invocations = metrics.counter("agent_invocations_total", "Agent invocations (A2A messages answered)")
+        self.model_calls = metrics.counter("model_calls_total", "Model calls", ["status"])
+        self.model_latency = metrics.histogram("model_call_duration_seconds", "Model call time, whole stream")
+        self.tokens = metrics.counter("model_tokens_total", "Model tokens", ["direction"])
+        self.tool_calls = metrics.counter("tool_calls_total", "Tool calls", ["tool", "status"])
+
+    def register_hooks(self, registry: HookRegistry, **kwargs):
+        registry.add_callback(BeforeModelCallEvent, self._model_call_started)
+        registry.add_callback(AfterModelCallEvent, self._model_call_finished)
+        registry.add_callback(AfterToolCallEvent, self._tool_call_finished)
+        registry.add_callback(AfterInvocationEvent, self._invocation_finished)
+
+    def _model_call_started(self, event: BeforeModelCallEvent):
+        event.invocation_state[_MODEL_CALL_STARTED] = time.perf_counter()
+
+    def _model_call_finished(self, event: AfterModelCallEvent):
+        self.model_calls.inc("error" if event.exception else "ok")
+        started = event.invocation_state.pop(_MODEL_CALL_STARTED, None)
+        if started is not None:
+            self.model_latency.observe(time.perf_counter() - started)
+
+    def _tool_call_finished(self, event: AfterToolCallEvent):
+        status = "error" if event.exception else (event.result or {}).get("status", "success")
+        self.tool_calls.inc(event.tool_use["name"], status)
+
+    def _invocation_finished(self, event: AfterInvocationEvent):
+        self.invocations.inc()
+        invocation = event.agent.event_loop_metrics.latest_agent_invocation
+        if invocation is not None:
+            self.tokens.inc("input", amount=invocation.usage.get("inputTokens", 0))
+            self.tokens.inc("output", amount=invocation.usage.get("outputTokens", 0))
+
+def add_telemetry_arguments(parser, metrics: bool = True):
+    """--trace (and, for servers, --no-metrics) flags"""
+    parser.add_argument(
+        "--trace",
+        choices=TRACE_EXPORTERS,
+        default="off",
+        help="Export trace spans to the console or an OTLP endpoint (OTEL_EXPORTER_OTLP_ENDPOINT) (default: off)"
+    )
+    if metrics:
+        parser.add_argument(
+            "--no-metrics",
+            action="store_true",
+            help="Don't record request and model metrics or serve GET /metrics"
+        )
@@ -4,70 +4,239 @@ Custom Agent Registry for A2A Protocol
 Simple HTTP-based registry for agent discovery and management
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 import uvicorn
 import argparse
+import asyncio
+import os
 import sys
 import time
 from typing import Dict, List, Optional
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from registry.registry_journal import RegistryJournal, DEFAULT_SNAPSHOT_EVERY
+from registry.registry_store import AgentInfo, RegistryStore, MemoryStore, SQLiteStore, DEFAULT_LEASE_TTL
+from common.telemetry import Metrics, add_telemetry_arguments, instrument, setup_tracing
 
-class AgentInfo(BaseModel):
-    """Agent registration information"""
-    name: str
-    description: str
-    url: str
-    capabilities: List[str] = []
-    registered_at: float = None
+MAX_SWEEP_INTERVAL = 1.0
+MAX_PAGE_SIZE = 1000
+MAX_WATCH_TIMEOUT = 60.0
 
 class AgentRegistry:
     """Simple agent registry implementation"""
     
-    def __init__(self):
-        self.agents: Dict[str, AgentInfo] = {}
-        self.app = FastAPI(title="A2A Agent Registry", version="1.0.0")
+    def __init__(self, default_ttl: float = DEFAULT_LEASE_TTL, store: Optional[RegistryStore] = None,
+                 metrics: Optional[Metrics] = None):
+        self.store = store or MemoryStore()
+        self.default_ttl = default_ttl
+        # Request metrics served at GET /metrics (None: not recorded)
+        self.metrics = metrics
+        self._sweeper_task: Optional[asyncio.Task] = None
+        # Set (and replaced) whenever this process changes the agent set
+        self._change_event = asyncio.Event()
+        self.app = FastAPI(title="A2A Agent Registry", version="1.0.0", lifespan=self._lifespan)
+        self.app.add_middleware(instrument, metrics=metrics)
+        if metrics:
+            metrics.gauge("registry_agents", "Registered agent instances", fn=self.store.count)
+            self.app.add_route("/metrics", metrics.endpoint, methods=["GET"], include_in_schema=False)
         self.setup_routes()
     
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """Run the lease sweeper (and store background work) for the lifetime of the app"""
+        self.store.start()
+        self._sweeper_task = asyncio.create_task(self._sweep_leases())
+        try:
+            yield
+        finally:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+            self._sweeper_task = None
+            self.store.close()
+    
+    async def _store_write(self, method, *args):
+        """Run a store write, off the event loop if the backend may block"""
+        if self.store.blocking_writes:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+    
+    def _notify_watchers(self):
+        """Wake /watch long-polls waiting in this process"""
+        self._change_event.set()
+        self._change_event = asyncio.Event()
+    
+    async def _write(self, method, *args):
+        """Run a store write that changes the agent set, then wake watchers"""
+        result = await self._store_write(method, *args)
+        self._notify_watchers()
+        return result
+    
+    @property
+    def etag(self) -> str:
+        """Entity tag for agent listings; changes whenever the agent set changes"""
+        return f'"{self.store.epoch}-{self.store.revision()}"'
+    
+    async def _sweep_leases(self):
+        """Background task that expires stale registrations"""
+        while True:
+            # Most sweeps expire nothing; only those that do wake watchers
+            expired = await self._store_write(self.store.expire)
+            if expired:
+                self._notify_watchers()
+            for instance_id in expired:
+                print(f"⌛ Lease expired for agent: {instance_id}")
+            delay = MAX_SWEEP_INTERVAL
+            next_expiry = self.store.next_expiry()
+            if next_expiry is not None:
+                delay = min(delay, next_expiry)
+            await asyncio.sleep(delay)
+    
     def setup_routes(self):
         """Setup FastAPI routes"""
         
         @self.app.post("/register")
         async def register_agent(agent: AgentInfo):
             """Register a new agent"""
+            if agent.ttl is not None and agent.ttl <= 0:
+                raise HTTPException(status_code=422, detail="ttl must be positive")
             agent.registered_at = time.time()
-            self.agents[agent.name] = agent
-            print(f"✅ Registered agent: {agent.name} at {agent.url}")
-            return {"status": "registered", "agent": agent.name}
+            agent.ttl = agent.ttl or self.default_ttl
+            await self._write(self.store.register, agent)
+            print(f"✅ Registered agent: {agent.name} at {agent.url} (lease {agent.ttl:g}s)")
+            return {"status": "registered", "agent": agent.name, "instance_id": agent.instance_id, "ttl": agent.ttl}
+        
+        @self.app.post("/heartbeat/{agent_name}")
+        async def heartbeat(
+            agent_name: str,
+            instance_id: Optional[str] = None,
+            load: Optional[Dict[str, float]] = Body(None, embed=True)
+        ):
+            """Renew an instance's lease (every instance of the agent if no id is given),
+            optionally reporting its current load hints"""
+            # Lease renewals don't change the agent set, so watchers aren't woken
+            if self.store.blocking_writes:
+                ttl = await asyncio.to_thread(self.store.heartbeat, agent_name, instance_id)
+            else:
+                ttl = self.store.heartbeat(agent_name, instance_id)
+            if ttl is None:
+                raise HTTPException(status_code=404, detail="Agent not found")
+            # Load hints that move to another load_level are recorded as "update" changes that
+            # clients balance on; smaller changes leave the revision (and watchers) alone
+            if load is not None and await self._store_write(self.store.update_load, agent_name, instance_id, load):
+                self._notify_watchers()
+            return {"status": "renewed", "agent": agent_name, "instance_id": instance_id, "ttl": ttl}
         
         @self.app.delete("/unregister/{agent_name}")
-        async def unregister_agent(agent_name: str):
-            """Unregister an agent"""
-            if agent_name in self.agents:
-                del self.agents[agent_name]
-                print(f"❌ Unregistered agent: {agent_name}")
-                return {"status": "unregistered", "agent": agent_name}
+        async def unregister_agent(agent_name: str, instance_id: Optional[str] = None):
+            """Unregister one instance of an agent (every instance if no id is given)"""
+            if await self._write(self.store.unregister, agent_name, instance_id):
+                print(f"❌ Unregistered agent: {instance_id or agent_name}")
+                return {"status": "unregistered", "agent": agent_name, "instance_id": instance_id}
             raise HTTPException(status_code=404, detail="Agent not found")
         
         @self.app.get("/agents")
-        async def list_agents():
-            """List all registered agents"""
-            return {"agents": list(self.agents.values())}
+        async def list_agents(
+            request: Request,
+            response: Response,
+            capability: Optional[List[str]] = Query(None),
+            match: str = Query("any", pattern="^(any|all)$"),
+            limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+            cursor: Optional[str] = None
+        ):
+            """List registered agents, optionally filtered by capability and paginated"""
+            # Every listing is a pure function of the query and the revision, so a
+            # client holding the current ETag can skip the body entirely.
+            etag = self.etag
+            if_none_match = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+            if etag in if_none_match or "*" in if_none_match:
+                return Response(status_code=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+            
+            if not capability and limit is None and cursor is None:
+                agents, next_cursor = self.store.list_all(), None
+            else:
+                # Accept both ?capability=a&capability=b and ?capability=a,b
+                capabilities = [c for value in capability or [] for c in value.split(",") if c]
+                agents, next_cursor = self.store.query(capabilities, match, limit, cursor)
+            return {"agents": agents, "next_cursor": next_cursor, "revision": self.store.revision()}
+        
+        @self.app.get("/watch")
+        async def watch(
+            since: int = Query(0, ge=0),
+            epoch: Optional[str] = None,
+            timeout: float = Query(30.0, ge=0, le=MAX_WATCH_TIMEOUT)
+        ):
+            """Long-poll for register/update/unregister deltas after a revision.
+            
+            Returns as soon as there are changes newer than `since`, or an empty
+            change list after `timeout` seconds. If the deltas are no longer available
+            (or `epoch` names a previous registry process) the response is a reset
+            carrying the full agent list.
+            """
+            store = self.store
+            deadline = time.monotonic() + timeout
+            while True:
+                # Read the revision first so it never runs ahead of the changes returned
+                revision = store.revision()
+                changes = store.changes_since(since) if epoch in (None, store.epoch) else None
+                if changes is None:
+                    return {
+                        "epoch": store.epoch,
+                        "revision": revision,
+                        "reset": True,
+                        "agents": store.list_all(),
+                        "changes": []
+                    }
+                remaining = deadline - time.monotonic()
+                if changes or remaining <= 0:
+                    return {
+                        "epoch": store.epoch,
+                        "revision": max([revision] + [c["revision"] for c in changes]),
+                        "reset": False,
+                        "changes": changes
+                    }
+                # Changes made by other worker processes don't set our event, so
+                # shared backends are also re-checked every poll_interval
+                wait = min(remaining, store.poll_interval or remaining)
+                try:
+                    await asyncio.wait_for(self._change_event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
         
         @self.app.get("/agents/{agent_name}")
         async def get_agent(agent_name: str):
-            """Get specific agent info"""
-            if agent_name in self.agents:
-                return self.agents[agent_name]
+            """Get specific agent info (one of its instances)"""
+            agent = self.store.get(agent_name)
+            if agent is not None:
+                return agent
+            raise HTTPException(status_code=404, detail="Agent not found")
+        
+        @self.app.get("/agents/{agent_name}/instances")
+        async def get_agent_instances(agent_name: str):
+            """Every registered instance of an agent, with its url and load hints"""
+            instances = self.store.instances(agent_name)
+            if instances:
+                return {"agent": agent_name, "instances": instances}
             raise HTTPException(status_code=404, detail="Agent not found")
         
         @self.app.get("/health")
         async def health_check():
-            """Health check endpoint"""
-            return {
-                "status": "healthy", 
-                "agents_count": len(self.agents),
+            """Health check endpoint; 503 while the store is degraded (e.g. no longer persisting)"""
+            degraded = self.store.degraded()
+            body = {
+                "status": "degraded" if degraded else "healthy",
+                "agents_count": self.store.count(),
+                "revision": self.store.revision(),
                 "timestamp": time.time()
             }
+            if degraded:
+                body["reason"] = degraded
+                return JSONResponse(body, status_code=503)
+            return body
         
         @self.app.get("/")
         async def root():
@@ -75,21 +244,67 @@ class AgentRegistry:
             return {
                 "service": "A2A Agent Registry",
                 "version": "1.0.0",
-                "agents_registered": len(self.agents),
+                "agents_registered": self.store.count(),
                 "endpoints": {
                     "register": "POST /register",
-                    "unregister": "DELETE /unregister/{agent_name}",
-                    "list_agents": "GET /agents",
+                    "heartbeat": "POST /heartbeat/{agent_name}?instance_id=",
+                    "unregister": "DELETE /unregister/{agent_name}?instance_id=",
+                    "list_agents": "GET /agents?capability=&match=any|all&limit=&cursor=",
                     "get_agent": "GET /agents/{agent_name}",
+                    "get_instances": "GET /agents/{agent_name}/instances",
+                    "watch": "GET /watch?since=<revision>&timeout=",
                     "health": "GET /health"
                 }
             }
 
+def build_store(storage: str = "memory", data_dir: Optional[str] = None, db_path: Optional[str] = None,
+                snapshot_every: int = DEFAULT_SNAPSHOT_EVERY) -> RegistryStore:
+    """Create the configured storage backend"""
+    if storage == "sqlite":
+        if db_path is None:
+            db_path = os.path.join(data_dir, "registry.db") if data_dir else "registry.db"
+        return SQLiteStore(db_path)
+    journal = RegistryJournal(data_dir, snapshot_every) if data_dir else None
+    return MemoryStore(journal=journal)
+
+def create_app() -> FastAPI:
+    """App factory for multi-worker mode; each worker reads its settings from the environment"""
+    store = build_store(
+        storage=os.environ.get("REGISTRY_STORAGE", "memory"),
+        data_dir=os.environ.get("REGISTRY_DATA_DIR") or None,
+        db_path=os.environ.get("REGISTRY_DB") or None,
+        snapshot_every=int(os.environ.get("REGISTRY_SNAPSHOT_EVERY", DEFAULT_SNAPSHOT_EVERY))
+    )
+    default_ttl = float(os.environ.get("REGISTRY_LEASE_TTL", DEFAULT_LEASE_TTL))
+    setup_tracing("registry", os.environ.get("REGISTRY_TRACE", "off"))
+    metrics = Metrics() if os.environ.get("REGISTRY_METRICS", "1") == "1" else None
+    return AgentRegistry(default_ttl=default_ttl, store=store, metrics=metrics).app
+
 class AgentRegistryServer:
     """Agent Registry Server wrapper"""
     
-    def __init__(self):
-        self.registry = AgentRegistry()
+    def __init__(self, default_ttl: float = DEFAULT_LEASE_TTL, data_dir: Optional[str] = None,
+                 snapshot_every: int = DEFAULT_SNAPSHOT_EVERY, storage: str = "memory",
+                 db_path: Optional[str] = None, workers: int = 1, metrics: bool = True, trace: str = "off"):
+        if workers > 1 and storage != "sqlite":
+            # Worker processes can only see each other's registrations through a shared store
+            print("ℹ️  --workers > 1 requires shared state, using SQLite storage")
+            storage = "sqlite"
+        self.settings = {
+            "REGISTRY_STORAGE": storage,
+            "REGISTRY_DATA_DIR": data_dir or "",
+            "REGISTRY_DB": db_path or "",
+            "REGISTRY_SNAPSHOT_EVERY": str(snapshot_every),
+            "REGISTRY_LEASE_TTL": str(default_ttl),
+            "REGISTRY_METRICS": "1" if metrics else "0",
+            "REGISTRY_TRACE": trace
+        }
+        self.workers = workers
+        self.registry = None
+        if workers == 1:
+            store = build_store(storage, data_dir, db_path, snapshot_every)
+            setup_tracing("registry", trace)
+            self.registry = AgentRegistry(default_ttl=default_ttl, store=store, metrics=Metrics() if metrics else None)
     
     def start_registry(self, port=8000, host="localhost"):
         """Start the agent registry server"""
@@ -97,6 +312,9 @@ class AgentRegistryServer:
         print(f"📡 Host: {host}")
         print(f"🔌 Port: {port}")
         print(f"🌐 URL: http://{host}:{port}")
+        print(f"💾 Storage: {self.settings['REGISTRY_STORAGE']} ({self.workers} worker{'s' if self.workers > 1 else ''})")
+        print(f"📈 Metrics: {'GET /metrics' if self.settings['REGISTRY_METRICS'] == '1' else 'off'}, "
+              f"tracing {self.settings['REGISTRY_TRACE']}")
         print("="*50)
         
         try:
@@ -104,13 +322,24 @@ class AgentRegistryServer:
             print("🔍 Agents can register and discover each other")
             print("📊 Registry endpoints:")
             print("   - POST /register - Register an agent")
-            print("   - GET /agents - List all agents")
+            print("   - POST /heartbeat/{agent_name}?instance_id= - Renew an instance's lease and report load")
+            print("   - GET /agents - List agents (filter with ?capability=&match=any|all, page with ?limit=&cursor=)")
+            print("   - GET /watch?since=<revision> - Long-poll for registry changes")
             print("   - GET /health - Health check")
+            if self.settings["REGISTRY_METRICS"] == "1":
+                print("   - GET /metrics - Prometheus metrics")
             print("🛑 Press Ctrl+C to stop the registry")
             print()
             
             # Start serving (this blocks)
-            uvicorn.run(self.registry.app, host=host, port=port, log_level="warning")
+            if self.registry is not None:
+                uvicorn.run(self.registry.app, host=host, port=port, log_level="warning")
+            else:
+                # Workers are separate processes that build their app via create_app()
+                os.environ.update(self.settings)
+                uvicorn.run("registry.agent_registry:create_app", factory=True, workers=self.workers,
+                            host=host, port=port, log_level="warning",
+                            app_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
             
         except KeyboardInterrupt:
             print("\n🛑 Shutting down Agent Registry...")
@@ -134,11 +363,51 @@ def main():
         default="localhost", 
         help="Host to bind the registry to (default: localhost)"
     )
+    parser.add_argument(
+        "--lease-ttl",
+        type=float,
+        default=DEFAULT_LEASE_TTL,
+        help=f"Default registration lease in seconds (default: {DEFAULT_LEASE_TTL:g})"
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default=None,
+        help="Directory for the durable journal and snapshots (default: in-memory only)"
+    )
+    parser.add_argument(
+        "--snapshot-every",
+        type=int,
+        default=DEFAULT_SNAPSHOT_EVERY,
+        help=f"Compact the journal into a snapshot every N events (default: {DEFAULT_SNAPSHOT_EVERY})"
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["memory", "sqlite"],
+        default="memory",
+        help="State backend: in-process memory or a shared SQLite (WAL) database (default: memory)"
+    )
+    parser.add_argument(
+        "--db",
+        type=str,
+        default=None,
+        help="SQLite database path (default: <data-dir>/registry.db or ./registry.db)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes; more than one implies --storage sqlite (default: 1)"
+    )
+    add_telemetry_arguments(parser)
     
     args = parser.parse_args()
     
     # Create and start registry server
-    registry_server = AgentRegistryServer()
+    registry_server = AgentRegistryServer(default_ttl=args.lease_ttl, data_dir=args.data_dir,
+                                          snapshot_every=args.snapshot_every, storage=args.storage,
+                                          db_path=args.db, workers=args.workers, metrics=not args.no_metrics,
+                                          trace=args.trace)
     registry_server.start_registry(port=args.port, host=args.host)
 
 if __name__ == "__main__":
@@ -4,63 +4,624 @@ Registry Client Helper
 Helper functions for agents to register with the custom registry
 """
 
+import asyncio
+import httpx
+import json
+import os
+import random
 import requests
+import threading
 import time
-from typing import List, Optional
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, List, Optional
+from common.telemetry import SpanKind, inject, span
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.25
+MAX_BACKOFF = 5.0
+RETRY_STATUSES = {429, 502, 503, 504}
+# Listing queries (capabilities, page size, cursor) remembered per cache; the least recently used go first
+DEFAULT_LISTING_CACHE_SIZE = 128
+
+def _backoff_delay(attempt: int, backoff: float) -> float:
+    """Full-jitter exponential backoff so retrying clients don't stampede"""
+    return random.uniform(0, min(MAX_BACKOFF, backoff * (2 ** attempt)))
+
+def _registration_payload(name: str, description: str, url: str, capabilities: List[str] = None,
+                          ttl: Optional[float] = None, instance_id: Optional[str] = None,
+                          weight: Optional[float] = None) -> dict:
+    """Build the /register request body"""
+    agent_data = {
+        "name": name,
+        "description": description,
+        "url": url,
+        "capabilities": capabilities or [],
+        # Replicas share a name; the instance id (name@url unless chosen) tells them apart
+        "instance_id": instance_id or f"{name}@{url}"
+    }
+    if ttl is not None:
+        agent_data["ttl"] = ttl
+    if weight is not None:
+        agent_data["weight"] = weight
+    return agent_data
+
+def _instance_params(registration: Optional[dict]) -> dict:
+    """Query parameters addressing the instance this client registered"""
+    return {"instance_id": registration["instance_id"]} if registration else {}
+
+def _listing_key(params: dict) -> tuple:
+    """Hashable cache key for a /agents query"""
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in params.items()))
+
+def _listing_params(capabilities: List[str] = None, match: str = "any", page_size: Optional[int] = None) -> dict:
+    """Query parameters for a /agents listing"""
+    params = {"match": match}
+    if capabilities:
+        params["capability"] = list(capabilities)
+    if page_size:
+        params["limit"] = page_size
+    return params
+
+class ListingETags:
+    """Last (ETag, page) per listing query for conditional GETs, keeping the
+    `max_entries` most recently used queries"""
+
+    def __init__(self, max_entries: int = DEFAULT_LISTING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, etag: str, data: dict):
+        with self._lock:
+            self._entries[key] = (etag, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DiscoveryCache:
+    """In-process cache of agent listings with stale-while-revalidate.
+
+    Entries younger than `ttl` are served as hits. Older entries are served as
+    stale for up to `stale_ttl` more seconds while one background refresh per
+    query runs. If the registry cannot be reached, the last known listing is
+    served regardless of age. With `path` set, listings are mirrored to a JSON
+    file so a restarted process can route before the registry answers. At most
+    `max_entries` queries are kept; the least recently used are dropped.
+    """
+
+    def __init__(self, ttl: float = 30.0, stale_ttl: float = 300.0, path: Optional[str] = None,
+                 max_entries: int = DEFAULT_LISTING_CACHE_SIZE):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.path = path
+        self.max_entries = max_entries
+        # key -> (fetched_at wall clock, agents), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+        if path:
+            self._load()
+
+    @staticmethod
+    def key(params: dict) -> str:
+        """Stable string key for a listing query (usable as a JSON object key)"""
+        return json.dumps(_listing_key(params))
+
+    def lookup(self, key: str):
+        """Return (agents, state) where state is 'fresh', 'stale', 'expired' or 'missing'"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return None, "missing"
+        age = time.time() - entry[0]
+        if age < self.ttl:
+            return entry[1], "fresh"
+        if age < self.ttl + self.stale_ttl:
+            return entry[1], "stale"
+        return entry[1], "expired"
+
+    def store(self, key: str, agents: list):
+        """Record a freshly fetched listing"""
+        with self._lock:
+            self._entries[key] = (time.time(), agents)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            snapshot = dict(self._entries) if self.path else None
+        if snapshot is not None:
+            self._save(snapshot)
+
+    def record(self, counter: str):
+        """Bump a monitoring counter"""
+        with self._lock:
+            self.stats[counter] += 1
+
+    def begin_refresh(self, key: str) -> bool:
+        """Claim the background refresh for a key; False if one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: str):
+        """Release a key claimed by begin_refresh"""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _load(self):
+        """Warm the cache from the persisted file, if any"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            entries = sorted((entry["fetched_at"], key, entry["agents"]) for key, entry in data.items())
+            self._entries = OrderedDict((key, (fetched_at, agents))
+                                        for fetched_at, key, agents in entries[-self.max_entries:])
+        except (OSError, ValueError, KeyError, TypeError):
+            self._entries = OrderedDict()
+
+    def _save(self, entries: Dict[str, tuple]):
+        """Atomically persist the cache (write to a temp file, then rename)"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({key: {"fetched_at": fetched_at, "agents": agents}
+                           for key, (fetched_at, agents) in entries.items()}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Failed to persist discovery cache: {e}")
+
+def _granted_ttl(response: dict, registration: Optional[dict]) -> Optional[float]:
+    """Lease ttl the registry granted, which may be clamped or defaulted; the ttl
+    asked for only when the response doesn't say"""
+    return response.get("ttl") or (registration or {}).get("ttl")
+
+def _heartbeat_interval(ttl: Optional[float]) -> float:
+    """Three beats per lease so a single lost heartbeat never expires the agent"""
+    return (ttl or 30.0) / 3
 
 class RegistryClient:
-    """Client for interacting with the custom agent registry"""
-    
-    def __init__(self, registry_url: str = "http://localhost:8000"):
+    """Client for interacting with the custom agent registry.
+
+    All calls share one keep-alive session with a bounded connection pool,
+    explicit connect/read timeouts and jittered retries on transient failures.
+    Pass `cache_ttl` to serve discovery from a DiscoveryCache instead of
+    hitting the registry on every call.
+    """
+
+    def __init__(self, registry_url: str = "http://localhost:8000",
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF,
+                 cache_ttl: Optional[float] = None,
+                 cache_stale_ttl: float = 300.0,
+                 cache_file: Optional[str] = None):
         self.registry_url = registry_url.rstrip('/')
-    
-    def register_agent(self, name: str, description: str, url: str, capabilities: List[str] = None):
-        """Register an agent with the registry"""
-        agent_data = {
-            "name": name,
-            "description": description,
-            "url": url,
-            "capabilities": capabilities or []
-        }
-        
-        try:
-            response = requests.post(f"{self.registry_url}/register", json=agent_data)
+        self.cache = DiscoveryCache(cache_ttl, cache_stale_ttl, cache_file) if cache_ttl is not None else None
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._registrations: Dict[str, dict] = {}
+        # Lease ttl the registry last granted each registration, which paces its heartbeats
+        self._lease_ttls: Dict[str, float] = {}
+        self._heartbeats: Dict[str, threading.Event] = {}
+        # Last (ETag, agents page) per listing query, for conditional GETs
+        self._listing_cache = ListingETags()
+
+    def _request(self, method: str, path: str, timeout=None, **kwargs) -> requests.Response:
+        """Send a request, retrying connection errors, timeouts and 429/5xx gateway errors"""
+        with span(f"registry {method} {path}", {"url.full": f"{self.registry_url}{path}"}, kind=SpanKind.CLIENT,
+                  only_in_trace=True):
+            kwargs["headers"] = inject(kwargs.get("headers"))
+            for attempt in range(self.retries + 1):
+                try:
+                    response = self.session.request(method, f"{self.registry_url}{path}",
+                                                    timeout=timeout or self.timeout, **kwargs)
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        return response
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt == self.retries:
+                        raise
+                time.sleep(_backoff_delay(attempt, self.backoff))
+
+    def close(self):
+        """Stop heartbeats and release pooled connections"""
+        for name in list(self._heartbeats):
+            self.stop_heartbeat(name)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def register_agent(self, name: str, description: str, url: str, capabilities: List[str] = None,
+                       ttl: Optional[float] = None, instance_id: Optional[str] = None,
+                       weight: Optional[float] = None):
+        """Register an agent instance with the registry"""
+        agent_data = _registration_payload(name, description, url, capabilities, ttl, instance_id, weight)
+
+        try:
+            response = self._request("POST", "/register", json=agent_data)
             response.raise_for_status()
-            return response.json()
+            self._registrations[name] = agent_data
+            body = response.json()
+            self._lease_ttls[name] = _granted_ttl(body, agent_data)
+            return body
         except requests.exceptions.RequestException as e:
             print(f"❌ Failed to register with registry: {e}")
             return None
-    
+
+    def heartbeat(self, name: str, load: Optional[Dict[str, float]] = None):
+        """Renew an agent's lease (and report load hints), re-registering if the registry has dropped it"""
+        try:
+            response = self._request("POST", f"/heartbeat/{name}",
+                                     params=_instance_params(self._registrations.get(name)),
+                                     json={"load": load} if load is not None else None)
+            if response.status_code == 404 and name in self._registrations:
+                print(f"⚠️  Lease for {name} was lost, re-registering")
+                response = self._request("POST", "/register", json=self._registrations[name])
+            response.raise_for_status()
+            body = response.json()
+            if body.get("ttl"):
+                self._lease_ttls[name] = body["ttl"]
+            return body
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Failed to send heartbeat to registry: {e}")
+            return None
+
+    def start_heartbeat(self, name: str, interval: Optional[float] = None,
+                        load_fn: Optional[Callable[[], Dict[str, float]]] = None):
+        """Renew an agent's lease from a background thread until stopped.
+        Without an `interval`, beats follow the lease ttl the registry last granted.
+        `load_fn` is called on every beat to report current load hints."""
+        if name in self._heartbeats:
+            return
+        stop = threading.Event()
+        self._heartbeats[name] = stop
+
+        def beat():
+            while not stop.wait(interval or _heartbeat_interval(self._lease_ttls.get(name))):
+                self.heartbeat(name, load_fn() if load_fn else None)
+
+        threading.Thread(target=beat, name=f"heartbeat-{name}", daemon=True).start()
+
+    def stop_heartbeat(self, name: str):
+        """Stop renewing an agent's lease"""
+        stop = self._heartbeats.pop(name, None)
+        if stop:
+            stop.set()
+
     def unregister_agent(self, name: str):
-        """Unregister an agent from the registry"""
+        """Unregister an agent from the registry (only this client's instance, if it registered one)"""
+        self.stop_heartbeat(name)
+        registration = self._registrations.pop(name, None)
+        self._lease_ttls.pop(name, None)
         try:
-            response = requests.delete(f"{self.registry_url}/unregister/{name}")
+            response = self._request("DELETE", f"/unregister/{name}", params=_instance_params(registration))
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"❌ Failed to unregister from registry: {e}")
             return None
-    
-    def list_agents(self):
-        """Get list of all registered agents"""
+
+    def list_agents(self, capabilities: List[str] = None, match: str = "any", page_size: Optional[int] = None,
+                    use_cache: bool = True):
+        """Get list of registered agents, optionally only those with the given capabilities"""
+        params = _listing_params(capabilities, match, page_size)
+        if self.cache is not None and use_cache:
+            return self._list_agents_cached(params)
         try:
-            response = requests.get(f"{self.registry_url}/agents")
-            response.raise_for_status()
-            return response.json()["agents"]
+            return self._fetch_agents(params)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Failed to get agents from registry: {e}")
+            return []
+
+    def _fetch_agents(self, params: dict) -> list:
+        """Fetch every page of a listing; raises on registry errors"""
+        params = dict(params)
+        agents = []
+        while True:
+            data = self._get_listing(params)
+            agents.extend(data["agents"])
+            if not data.get("next_cursor"):
+                return agents
+            params["cursor"] = data["next_cursor"]
+
+    def _list_agents_cached(self, params: dict) -> list:
+        """Serve a listing from the discovery cache, revalidating as needed"""
+        cache = self.cache
+        key = cache.key(params)
+        agents, state = cache.lookup(key)
+        if state == "fresh":
+            cache.record("hits")
+            return agents
+        if state == "stale":
+            cache.record("stale_hits")
+            if cache.begin_refresh(key):
+                threading.Thread(target=self._refresh_cache, args=(key, params),
+                                 name="discovery-refresh", daemon=True).start()
+            return agents
+
+        cache.record("misses")
+        try:
+            fresh = self._fetch_agents(params)
         except requests.exceptions.RequestException as e:
+            cache.record("refresh_failures")
+            if agents is not None:
+                print(f"⚠️  Registry unavailable, using last known agents: {e}")
+                return agents
             print(f"❌ Failed to get agents from registry: {e}")
             return []
-    
-    def get_agent_urls(self):
+        cache.store(key, fresh)
+        return fresh
+
+    def _refresh_cache(self, key: str, params: dict):
+        """Background revalidation of one stale cache entry"""
+        try:
+            self.cache.store(key, self._fetch_agents(params))
+            self.cache.record("refreshes")
+        except requests.exceptions.RequestException:
+            self.cache.record("refresh_failures")
+        finally:
+            self.cache.end_refresh(key)
+
+    def cache_stats(self) -> dict:
+        """Discovery cache counters (hits, stale_hits, misses, refreshes, refresh_failures)"""
+        return dict(self.cache.stats) if self.cache is not None else {}
+
+    def _get_listing(self, params: dict) -> dict:
+        """Fetch one /agents page, revalidating any cached copy with its ETag"""
+        key = _listing_key(params)
+        cached = self._listing_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self._request("GET", "/agents", params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+        if response.headers.get("ETag"):
+            self._listing_cache.put(key, response.headers["ETag"], data)
+        return data
+
+    def watch(self, since: int = 0, epoch: Optional[str] = None, timeout: float = 30.0):
+        """Wait for registry changes after a revision.
+
+        Returns the /watch response: `changes` holds register/update/unregister deltas, or
+        `reset` is true and `agents` holds the full list when the deltas are gone.
+        Pass back the returned `revision` and `epoch` on the next call.
+        """
+        params = {"since": since, "timeout": timeout}
+        if epoch:
+            params["epoch"] = epoch
+        try:
+            # The server holds the request open for up to `timeout` seconds
+            response = self._request("GET", "/watch", params=params,
+                                     timeout=(self.timeout[0], timeout + self.timeout[1]))
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Failed to watch registry: {e}")
+            return None
+
+    def get_agent_urls(self, capabilities: List[str] = None, match: str = "any"):
         """Get list of agent URLs for A2A client"""
-        agents = self.list_agents()
+        agents = self.list_agents(capabilities, match)
         return [agent["url"] for agent in agents]
-    
+
     def health_check(self):
         """Check if registry is healthy"""
         try:
-            response = requests.get(f"{self.registry_url}/health")
+            response = self._request("GET", "/health")
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException:
-            return None
\ No newline at end of file
+            return None
+
+class AsyncRegistryClient:
+    """Asyncio counterpart of RegistryClient for use inside event loops.
+
+    Mirrors the RegistryClient API with coroutines, backed by a pooled
+    httpx.AsyncClient, so async servers never block on registry I/O.
+    """
+
+    def __init__(self, registry_url: str = "http://localhost:8000",
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF):
+        self.registry_url = registry_url.rstrip('/')
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.client = httpx.AsyncClient(
+            base_url=self.registry_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+        self._registrations: Dict[str, dict] = {}
+        self._lease_ttls: Dict[str, float] = {}
+        self._heartbeats: Dict[str, asyncio.Task] = {}
+        self._listing_cache = ListingETags()
+
+    async def _request(self, method: str, path: str, timeout=None, **kwargs) -> httpx.Response:
+        """Send a request, retrying connection errors, timeouts and 429/5xx gateway errors"""
+        with span(f"registry {method} {path}", {"url.full": f"{self.registry_url}{path}"}, kind=SpanKind.CLIENT,
+                  only_in_trace=True):
+            kwargs["headers"] = inject(kwargs.get("headers"))
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.client.request(method, path, timeout=timeout or self.timeout, **kwargs)
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        return response
+                except httpx.TransportError:
+                    if attempt == self.retries:
+                        raise
+                await asyncio.sleep(_backoff_delay(attempt, self.backoff))
+
+    async def aclose(self):
+        """Stop heartbeats and release pooled connections"""
+        for name in list(self._heartbeats):
+            self.stop_heartbeat(name)
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def register_agent(self, name: str, description: str, url: str, capabilities: List[str] = None,
+                             ttl: Optional[float] = None, instance_id: Optional[str] = None,
+                             weight: Optional[float] = None):
+        """Register an agent instance with the registry"""
+        agent_data = _registration_payload(name, description, url, capabilities, ttl, instance_id, weight)
+
+        try:
+            response = await self._request("POST", "/register", json=agent_data)
+            response.raise_for_status()
+            self._registrations[name] = agent_data
+            body = response.json()
+            self._lease_ttls[name] = _granted_ttl(body, agent_data)
+            return body
+        except httpx.HTTPError as e:
+            print(f"❌ Failed to register with registry: {e}")
+            return None
+
+    async def heartbeat(self, name: str, load: Optional[Dict[str, float]] = None):
+        """Renew an agent's lease (and report load hints), re-registering if the registry has dropped it"""
+        try:
+            response = await self._request("POST", f"/heartbeat/{name}",
+                                           params=_instance_params(self._registrations.get(name)),
+                                           json={"load": load} if load is not None else None)
+            if response.status_code == 404 and name in self._registrations:
+                print(f"⚠️  Lease for {name} was lost, re-registering")
+                response = await self._request("POST", "/register", json=self._registrations[name])
+            response.raise_for_status()
+            body = response.json()
+            if body.get("ttl"):
+                self._lease_ttls[name] = body["ttl"]
+            return body
+        except httpx.HTTPError as e:
+            print(f"❌ Failed to send heartbeat to registry: {e}")
+            return None
+
+    def start_heartbeat(self, name: str, interval: Optional[float] = None,
+                        load_fn: Optional[Callable[[], Dict[str, float]]] = None):
+        """Renew an agent's lease from a background task until stopped.
+        Without an `interval`, beats follow the lease ttl the registry last granted.
+        `load_fn` is called on every beat to report current load hints."""
+        if name in self._heartbeats:
+            return
+
+        async def beat():
+            while True:
+                await asyncio.sleep(interval or _heartbeat_interval(self._lease_ttls.get(name)))
+                await self.heartbeat(name, load_fn() if load_fn else None)
+
+        self._heartbeats[name] = asyncio.create_task(beat())
+
+    def stop_heartbeat(self, name: str):
+        """Stop renewing an agent's lease"""
+        task = self._heartbeats.pop(name, None)
+        if task:
+            task.cancel()
+
+    async def unregister_agent(self, name: str):
+        """Unregister an agent from the registry (only this client's instance, if it registered one)"""
+        self.stop_heartbeat(name)
+        registration = self._registrations.pop(name, None)
+        self._lease_ttls.pop(name, None)
+        try:
+            response = await self._request("DELETE", f"/unregister/{name}", params=_instance_params(registration))
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            print(f"❌ Failed to unregister from registry: {e}")
+            return None
+
+    async def list_agents(self, capabilities: List[str] = None, match: str = "any",
+                          page_size: Optional[int] = None):
+        """Get list of registered agents, optionally only those with the given capabilities"""
+        params = _listing_params(capabilities, match, page_size)
+
+        agents = []
+        try:
+            while True:
+                data = await self._get_listing(params)
+                agents.extend(data["agents"])
+                if not data.get("next_cursor"):
+                    return agents
+                params["cursor"] = data["next_cursor"]
+        except httpx.HTTPError as e:
+            print(f"❌ Failed to get agents from registry: {e}")
+            return []
+
+    async def _get_listing(self, params: dict) -> dict:
+        """Fetch one /agents page, revalidating any cached copy with its ETag"""
+        key = _listing_key(params)
+        cached = self._listing_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = await self._request("GET", "/agents", params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+        if response.headers.get("ETag"):
+            self._listing_cache.put(key, response.headers["ETag"], data)
+        return data
+
+    async def watch(self, since: int = 0, epoch: Optional[str] = None, timeout: float = 30.0):
+        """Wait for registry changes after a revision (see RegistryClient.watch)"""
+        params = {"since": since, "timeout": timeout}
+        if epoch:
+            params["epoch"] = epoch
+        try:
+            response = await self._request(
+                "GET", "/watch", params=params,
+                timeout=httpx.Timeout(timeout + self.timeout.read, connect=self.timeout.connect)
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            print(f"❌ Failed to watch registry: {e}")
+            return None
+
+    async def get_agent_urls(self, capabilities: List[str] = None, match: str = "any"):
+        """Get list of agent URLs for A2A client"""
+        agents = await self.list_agents(capabilities, match)
+        return [agent["url"] for agent in agents]
+
+    async def health_check(self):
+        """Check if registry is healthy"""
+        try:
+            response = await self._request("GET", "/health")
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError:
+            return None
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Registry Journal
+Durable storage for the agent registry: an append-only event log plus
+periodically compacted snapshots
+"""
+
+import json
+import os
+import queue
+import threading
+from typing import Dict, Optional, Tuple
+
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "journal.log"
+DEFAULT_SNAPSHOT_EVERY = 1000
+
+_STOP = object()
+
+def _instance_key(agent: dict) -> str:
+    """Instance id of a journaled agent (older entries predate instance ids and use the name@url default)"""
+    return agent.get("instance_id") or f"{agent['name']}@{agent['url']}"
+
+class RegistryJournal:
+    """Append-only log of register/update/unregister events with compacted snapshots.
+
+    `append` only enqueues, so callers on the event loop never touch the disk.
+    A writer thread drains the queue in batches, writes each batch to the log
+    and fsyncs once per batch. It also keeps its own copy of the agent set, so
+    after `snapshot_every` events it can write a snapshot and truncate the log
+    without asking the registry for its state. Recovery therefore reads one
+    snapshot plus at most `snapshot_every` log lines. If writing fails the
+    writer stops and records why in `error`; the registry keeps serving from
+    memory and reports itself degraded.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._agents: Dict[str, dict] = {}
+        self._revision = 0
+        self._events_since_snapshot = 0
+        # Why the writer thread stopped, if it failed; events appended since are counted in `dropped`
+        self.error: Optional[str] = None
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self) -> Tuple[Dict[str, dict], int]:
+        """Rebuild (agents by instance id, revision) from the snapshot and the log tail"""
+        agents: Dict[str, dict] = {}
+        revision = 0
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            # Snapshots written before per-instance registrations are keyed by name
+            agents = {_instance_key(data): data for data in snapshot["agents"].values()}
+            revision = snapshot["revision"]
+        except FileNotFoundError:
+            pass
+
+        replayed = 0
+        try:
+            with open(self.log_path, "rb+") as f:
+                good_offset = 0
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Torn final write from a crash: cut it off so new events
+                        # are not appended onto a corrupt line
+                        f.truncate(good_offset)
+                        break
+                    good_offset += len(line)
+                    if event["revision"] <= revision:
+                        continue  # already folded into the snapshot
+                    self._apply(agents, event)
+                    revision = event["revision"]
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+
+        self._agents = dict(agents)
+        self._revision = revision
+        self._events_since_snapshot = replayed
+        return agents, revision
+
+    @staticmethod
+    def _apply(agents: Dict[str, dict], event: dict):
+        """Fold one event into an agent map keyed by instance id"""
+        if event["type"] in ("register", "update"):
+            agents[_instance_key(event["agent"])] = event["agent"]
+        elif event.get("instance_id"):
+            agents.pop(event["instance_id"], None)
+        else:
+            # Events from before per-instance registrations address every instance of a name
+            for key in [key for key, agent in agents.items() if agent["name"] == event["name"]]:
+                del agents[key]
+
+    def start(self):
+        """Start the background writer thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="registry-journal", daemon=True)
+            self._thread.start()
+
+    def append(self, event: dict):
+        """Queue an event for durable storage; never blocks. Once the writer has
+        failed (see `error`) events are dropped instead of queueing up forever."""
+        if self.error is not None:
+            self.dropped += 1
+            return
+        self._queue.put_nowait(event)
+
+    def close(self):
+        """Flush pending events, write a final snapshot and stop the writer"""
+        if self._thread is not None:
+            if self._thread.is_alive():
+                self._queue.put(_STOP)
+                self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Writer thread: write batches until stopped or until the disk fails"""
+        try:
+            self._write_batches()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"❌ Registry journal writer failed, changes are no longer persisted: {self.error}")
+            # Nothing will write the backlog now; let it go rather than hold it forever
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _write_batches(self):
+        """Writer loop: batch, write, fsync, and compact when due"""
+        log = open(self.log_path, "a")
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                events = [event for event in batch if event is not _STOP]
+                stopping = len(events) != len(batch)
+
+                if events:
+                    log.write("".join(json.dumps(event) + "\n" for event in events))
+                    log.flush()
+                    os.fsync(log.fileno())
+                    for event in events:
+                        self._apply(self._agents, event)
+                        self._revision = event["revision"]
+                    self._events_since_snapshot += len(events)
+
+                if self._events_since_snapshot >= self.snapshot_every or (stopping and self._events_since_snapshot):
+                    log.close()
+                    self._compact()
+                    log = open(self.log_path, "a")
+        finally:
+            log.close()
+
+    def _compact(self):
+        """Write a snapshot of the mirrored state, then truncate the log"""
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"revision": self._revision, "agents": self._agents}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # A crash between the rename and the truncate is harmless: load() skips
+        # log events the snapshot already covers.
+        open(self.log_path, "w").close()
+        self._events_since_snapshot = 0
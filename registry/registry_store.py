@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Registry Storage Backends
+State storage for the agent registry: an in-process memory store and a
+SQLite (WAL) store that several registry worker processes can share
+"""
+
+from pydantic import BaseModel, model_validator
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from registry.registry_journal import RegistryJournal
+
+DEFAULT_LEASE_TTL = 30.0
+CHANGE_LOG_SIZE = 10000
+
+def load_level(load: Dict[str, float]) -> Dict[str, int]:
+    """Coarse view of load hints, in power-of-two steps (0-1, 2-3, 4-7, ...). Stored
+    load only changes, with a new revision, when this does, so ordinary jitter in a
+    replica's heartbeats doesn't invalidate every listing ETag or wake every watcher.
+    Listed load is therefore only accurate to its level, and clients compare levels
+    (see clients/load_balancer.reported_load), never the raw values."""
+    levels = {key: int(max(value, 0) // 2).bit_length() for key, value in load.items()}
+    return {key: level for key, level in levels.items() if level}
+
+def default_instance_id(name: str, url: str) -> str:
+    """Instance id for a replica that doesn't choose its own"""
+    return f"{name}@{url}"
+
+class AgentInfo(BaseModel):
+    """Agent registration information.
+
+    Several instances (replicas) may register under one `name`; each is
+    identified by its `instance_id` and carries its own url and load hints.
+    """
+    name: str
+    description: str
+    url: str
+    capabilities: List[str] = []
+    registered_at: float = None
+    ttl: Optional[float] = None
+    instance_id: Optional[str] = None
+    # Relative capacity for weighted load balancing
+    weight: float = 1.0
+    # Load hints reported through heartbeats, e.g. {"in_flight": 3, "queue_depth": 0}
+    load: Dict[str, float] = {}
+
+    @model_validator(mode="after")
+    def _default_instance_id(self):
+        if not self.instance_id:
+            self.instance_id = default_instance_id(self.name, self.url)
+        return self
+
+class RegistryStore:
+    """Interface every registry storage backend implements.
+
+    Reads (get, list_all, query, changes_since, revision) must be cheap enough
+    to call directly from the event loop. Writes may block when `blocking_writes`
+    is set, in which case the registry runs them on a worker thread.
+    """
+
+    epoch: str = ""
+    # Writes may touch disk and should be kept off the event loop
+    blocking_writes: bool = False
+    # How often watchers must re-check for changes made by other processes
+    # (None when every change goes through this process)
+    poll_interval: Optional[float] = None
+
+    def start(self):
+        """Begin background work (called once the server is running)"""
+
+    def close(self):
+        """Flush and release resources"""
+
+    def degraded(self) -> Optional[str]:
+        """Why the store can no longer keep its guarantees (e.g. persistence failed), or None"""
+        return None
+
+    def revision(self) -> int:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def register(self, agent: AgentInfo):
+        """Store an agent instance (replacing one with the same instance id) and start its lease"""
+        raise NotImplementedError
+
+    def heartbeat(self, name: str, instance_id: Optional[str] = None) -> Optional[float]:
+        """Renew one instance's lease (every instance of `name` if no id is given);
+        returns the ttl, or None if nothing matched"""
+        raise NotImplementedError
+
+    def update_load(self, name: str, instance_id: Optional[str], load: Dict[str, float]) -> bool:
+        """Replace the load hints of matching instances whose load_level changed; True if any did"""
+        raise NotImplementedError
+
+    def unregister(self, name: str, instance_id: Optional[str] = None) -> bool:
+        """Remove one instance (every instance of `name` if no id is given)"""
+        raise NotImplementedError
+
+    def get(self, name: str):
+        """One instance of a logical agent (the lowest instance id)"""
+        raise NotImplementedError
+
+    def instances(self, name: str) -> list:
+        """Every instance registered under a name, ordered by instance id"""
+        raise NotImplementedError
+
+    def list_all(self) -> list:
+        raise NotImplementedError
+
+    def query(self, capabilities: Optional[List[str]] = None, match: str = "any",
+              limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """One page of agent instances ordered by instance id, plus the cursor for the next page"""
+        raise NotImplementedError
+
+    def changes_since(self, since: int) -> Optional[list]:
+        """Deltas after a revision, or None if they have fallen out of the log"""
+        raise NotImplementedError
+
+    def expire(self) -> List[str]:
+        """Remove instances whose lease has run out; returns their instance ids"""
+        raise NotImplementedError
+
+    def next_expiry(self) -> Optional[float]:
+        """Seconds until the earliest lease runs out, if any"""
+        raise NotImplementedError
+
+class MemoryStore(RegistryStore):
+    """Registry state held in this process, optionally journaled to disk"""
+
+    def __init__(self, journal: Optional[RegistryJournal] = None):
+        # Instances by instance id, and instance ids per logical agent name
+        self.agents: Dict[str, AgentInfo] = {}
+        self.names: Dict[str, Set[str]] = {}
+        # Every instance id in order, so an unfiltered page starts with a binary search
+        self.sorted_ids: List[str] = []
+        # Inverted index: capability -> ids of instances advertising it
+        self.capability_index: Dict[str, Set[str]] = {}
+        # Lease deadlines: the dict holds the current deadline per instance, the heap
+        # holds every deadline ever issued. Heap entries whose deadline no longer
+        # matches the dict (renewed or unregistered) are discarded lazily.
+        self.leases: Dict[str, float] = {}
+        self._lease_heap: List[Tuple[float, int, str]] = []
+        self._lease_seq = itertools.count()
+        # Change feed: every register/update/unregister bumps the revision and is kept
+        # in a bounded log so watchers can catch up with deltas instead of full lists.
+        # The epoch distinguishes revisions issued by different registry processes.
+        self.epoch = uuid.uuid4().hex[:12]
+        self._revision = 0
+        self.changes: deque = deque(maxlen=CHANGE_LOG_SIZE)
+        self.journal = journal
+        if journal is not None:
+            self._restore(journal)
+
+    def start(self):
+        if self.journal is not None:
+            self.journal.start()
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+
+    def degraded(self) -> Optional[str]:
+        if self.journal is not None and self.journal.error is not None:
+            return f"journal writer failed ({self.journal.error}); {self.journal.dropped} changes not persisted"
+        return None
+
+    def _restore(self, journal: RegistryJournal):
+        """Rebuild state from the journal; restored agents get a fresh lease to heartbeat into"""
+        agents, revision = journal.load()
+        for data in agents.values():
+            agent = AgentInfo(**data)
+            self._add_agent(agent, record=False)
+            self._grant_lease(agent.instance_id, agent.ttl or DEFAULT_LEASE_TTL)
+        self._revision = revision
+        if agents:
+            print(f"♻️  Restored {len(agents)} agent instances at revision {revision} from {journal.directory}")
+
+    def _grant_lease(self, instance_id: str, ttl: float) -> float:
+        """Set (or renew) the lease deadline for an instance"""
+        deadline = time.monotonic() + ttl
+        self.leases[instance_id] = deadline
+        heapq.heappush(self._lease_heap, (deadline, next(self._lease_seq), instance_id))
+        return deadline
+
+    def _record_change(self, change_type: str, name: str, instance_id: str, agent: Optional[AgentInfo] = None):
+        """Bump the revision and append to the change log (and journal)"""
+        self._revision += 1
+        self.changes.append({
+            "revision": self._revision,
+            "type": change_type,
+            "name": name,
+            "instance_id": instance_id,
+            "agent": agent
+        })
+        if self.journal is not None:
+            self.journal.append({
+                "revision": self._revision,
+                "type": change_type,
+                "name": name,
+                "instance_id": instance_id,
+                "agent": agent.model_dump() if agent is not None else None
+            })
+
+    def _add_agent(self, agent: AgentInfo, record: bool = True):
+        """Store an instance, replacing any previous registration under its instance id"""
+        previous = self.agents.get(agent.instance_id)
+        if previous is not None:
+            self._unindex_agent(previous)
+        else:
+            insort(self.sorted_ids, agent.instance_id)
+        self.agents[agent.instance_id] = agent
+        self.names.setdefault(agent.name, set()).add(agent.instance_id)
+        for capability in set(agent.capabilities):
+            self.capability_index.setdefault(capability, set()).add(agent.instance_id)
+        if record:
+            self._record_change("register", agent.name, agent.instance_id, agent)
+
+    def _unindex_agent(self, agent: AgentInfo):
+        """Remove an instance's entries from the name and capability indexes"""
+        for index, key in [(self.names, agent.name)] + [(self.capability_index, c) for c in set(agent.capabilities)]:
+            ids = index.get(key)
+            if ids is None:
+                continue
+            ids.discard(agent.instance_id)
+            if not ids:
+                del index[key]
+
+    def _remove_agent(self, instance_id: str):
+        """Drop an instance, its index entries and its lease"""
+        self.leases.pop(instance_id, None)
+        agent = self.agents.pop(instance_id, None)
+        if agent is not None:
+            self._unindex_agent(agent)
+            del self.sorted_ids[bisect_left(self.sorted_ids, instance_id)]
+            self._record_change("unregister", agent.name, instance_id)
+        return agent
+
+    def _matching(self, name: str, instance_id: Optional[str]) -> List[str]:
+        """Instance ids addressed by a name and optional instance id"""
+        ids = self.names.get(name, ())
+        if instance_id is None:
+            return sorted(ids)
+        return [instance_id] if instance_id in ids else []
+
+    def revision(self) -> int:
+        return self._revision
+
+    def count(self) -> int:
+        return len(self.agents)
+
+    def register(self, agent: AgentInfo):
+        self._add_agent(agent)
+        self._grant_lease(agent.instance_id, agent.ttl)
+
+    def heartbeat(self, name: str, instance_id: Optional[str] = None) -> Optional[float]:
+        ttl = None
+        for matched in self._matching(name, instance_id):
+            ttl = self.agents[matched].ttl
+            self._grant_lease(matched, ttl)
+        return ttl
+
+    def update_load(self, name: str, instance_id: Optional[str], load: Dict[str, float]) -> bool:
+        changed = False
+        for matched in self._matching(name, instance_id):
+            agent = self.agents[matched]
+            if load_level(agent.load) != load_level(load):
+                agent = agent.model_copy(update={"load": dict(load)})
+                self.agents[matched] = agent
+                self._record_change("update", name, matched, agent)
+                changed = True
+        return changed
+
+    def unregister(self, name: str, instance_id: Optional[str] = None) -> bool:
+        matched = self._matching(name, instance_id)
+        for instance in matched:
+            self._remove_agent(instance)
+        return bool(matched)
+
+    def get(self, name: str) -> Optional[AgentInfo]:
+        matched = self._matching(name, None)
+        return self.agents[matched[0]] if matched else None
+
+    def instances(self, name: str) -> List[AgentInfo]:
+        return [self.agents[i] for i in self._matching(name, None)]
+
+    def list_all(self) -> List[AgentInfo]:
+        return list(self.agents.values())
+
+    def query(self, capabilities: Optional[List[str]] = None, match: str = "any",
+              limit: Optional[int] = None, cursor: Optional[str] = None):
+        """Find agent instances by capability, returning one page ordered by instance id.
+
+        Candidates come from the capability index, so the cost is proportional to
+        the number of matching instances rather than the size of the registry.
+        Unfiltered pages are slices of the sorted id list, so each costs O(log n + limit).
+        """
+        if not capabilities:
+            start = 0 if cursor is None else bisect_right(self.sorted_ids, cursor)
+            end = len(self.sorted_ids) if limit is None else start + limit
+            page = self.sorted_ids[start:end]
+            next_cursor = page[-1] if limit is not None and end < len(self.sorted_ids) else None
+            return [self.agents[i] for i in page], next_cursor
+
+        postings = [self.capability_index.get(c, set()) for c in capabilities]
+        if match == "all":
+            postings.sort(key=len)
+            smallest, rest = postings[0], postings[1:]
+            ids = (i for i in smallest if all(i in p for p in rest))
+        else:
+            ids = set().union(*postings)
+
+        if cursor is not None:
+            ids = (i for i in ids if i > cursor)
+        if limit is None:
+            page = sorted(ids)
+            next_cursor = None
+        else:
+            page = heapq.nsmallest(limit + 1, ids)
+            next_cursor = page[limit - 1] if len(page) > limit else None
+            page = page[:limit]
+        return [self.agents[i] for i in page], next_cursor
+
+    def changes_since(self, since: int) -> Optional[list]:
+        if since > self._revision:
+            return None
+        oldest = self.changes[0]["revision"] if self.changes else self._revision + 1
+        if since < oldest - 1:
+            return None
+        return list(itertools.islice(self.changes, since - oldest + 1, None))
+
+    def expire(self) -> List[str]:
+        """Only touches due heap entries, so the cost is O(expired)"""
+        now = time.monotonic()
+        expired = []
+        heap = self._lease_heap
+        while heap and heap[0][0] <= now:
+            deadline, _, instance_id = heapq.heappop(heap)
+            if self.leases.get(instance_id) != deadline:
+                continue  # superseded by a heartbeat or re-registration
+            self._remove_agent(instance_id)
+            expired.append(instance_id)
+        return expired
+
+    def next_expiry(self) -> Optional[float]:
+        if not self._lease_heap:
+            return None
+        return max(self._lease_heap[0][0] - time.monotonic(), 0.0)
+
+class SQLiteStore(RegistryStore):
+    """Registry state in a SQLite database in WAL mode.
+
+    Every registry worker opens the same file. WAL lets readers proceed without
+    blocking each other or the single writer, so listing, lookup and watch
+    requests scale with the number of workers. Writes take a short
+    BEGIN IMMEDIATE transaction. Lease deadlines use wall-clock time so that
+    all processes agree on them.
+    """
+
+    blocking_writes = True
+    poll_interval = 0.25
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS agents (
+        instance_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        data TEXT NOT NULL,
+        ttl REAL NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS agents_name ON agents(name);
+    CREATE INDEX IF NOT EXISTS agents_expires_at ON agents(expires_at);
+    CREATE TABLE IF NOT EXISTS capabilities (
+        capability TEXT NOT NULL,
+        instance_id TEXT NOT NULL,
+        PRIMARY KEY (capability, instance_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS capabilities_instance ON capabilities(instance_id);
+    CREATE TABLE IF NOT EXISTS changes (
+        revision INTEGER PRIMARY KEY AUTOINCREMENT,
+        type TEXT NOT NULL,
+        name TEXT NOT NULL,
+        instance_id TEXT NOT NULL,
+        data TEXT
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(agents)")]
+        if columns and "instance_id" not in columns:
+            # Database from before per-instance registrations. Its contents are
+            # only leases, which live agents re-create on their next heartbeat.
+            conn.executescript("""
+            DROP TABLE IF EXISTS agents;
+            DROP TABLE IF EXISTS capabilities;
+            DROP TABLE IF EXISTS changes;
+            DROP TABLE IF EXISTS meta;
+            """)
+        conn.executescript(self.SCHEMA)
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:12],))
+        self.epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections must not be shared across threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    class _write:
+        """Context manager for an immediate (write-locked) transaction"""
+
+        def __init__(self, conn: sqlite3.Connection):
+            self.conn = conn
+
+        def __enter__(self):
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, *exc_info):
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _record_change(self, conn: sqlite3.Connection, change_type: str, name: str, instance_id: str,
+                       data: Optional[str] = None):
+        """Append to the change log inside the caller's transaction, trimming old entries"""
+        revision = conn.execute("INSERT INTO changes (type, name, instance_id, data) VALUES (?, ?, ?, ?)",
+                                (change_type, name, instance_id, data)).lastrowid
+        if revision % 100 == 0:
+            conn.execute("DELETE FROM changes WHERE revision <= ?", (revision - CHANGE_LOG_SIZE,))
+        return revision
+
+    def _delete(self, conn: sqlite3.Connection, name: str, instance_id: str) -> bool:
+        if conn.execute("DELETE FROM agents WHERE instance_id = ?", (instance_id,)).rowcount == 0:
+            return False
+        conn.execute("DELETE FROM capabilities WHERE instance_id = ?", (instance_id,))
+        self._record_change(conn, "unregister", name, instance_id)
+        return True
+
+    @staticmethod
+    def _selector(name: str, instance_id: Optional[str]) -> Tuple[str, tuple]:
+        """WHERE clause addressing a name and optional instance id"""
+        if instance_id is None:
+            return "name = ?", (name,)
+        return "name = ? AND instance_id = ?", (name, instance_id)
+
+    def revision(self) -> int:
+        row = self._conn().execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+
+    def register(self, agent: AgentInfo):
+        data = agent.model_dump_json()
+        with self._write(self._conn()) as conn:
+            conn.execute("DELETE FROM capabilities WHERE instance_id = ?", (agent.instance_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO agents (instance_id, name, data, ttl, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (agent.instance_id, agent.name, data, agent.ttl, time.time() + agent.ttl)
+            )
+            conn.executemany("INSERT INTO capabilities (capability, instance_id) VALUES (?, ?)",
+                             [(capability, agent.instance_id) for capability in set(agent.capabilities)])
+            self._record_change(conn, "register", agent.name, agent.instance_id, data)
+
+    def heartbeat(self, name: str, instance_id: Optional[str] = None) -> Optional[float]:
+        where, params = self._selector(name, instance_id)
+        rows = self._conn().execute(
+            f"UPDATE agents SET expires_at = ? + ttl WHERE {where} RETURNING ttl", (time.time(), *params)
+        ).fetchall()
+        return float(rows[0][0]) if rows else None
+
+    def update_load(self, name: str, instance_id: Optional[str], load: Dict[str, float]) -> bool:
+        where, params = self._selector(name, instance_id)
+        changed = False
+        with self._write(self._conn()) as conn:
+            for matched, data in conn.execute(f"SELECT instance_id, data FROM agents WHERE {where}", params).fetchall():
+                agent = json.loads(data)
+                if load_level(agent.get("load") or {}) == load_level(load):
+                    continue
+                agent["load"] = load
+                data = json.dumps(agent)
+                conn.execute("UPDATE agents SET data = ? WHERE instance_id = ?", (data, matched))
+                self._record_change(conn, "update", name, matched, data)
+                changed = True
+        return changed
+
+    def unregister(self, name: str, instance_id: Optional[str] = None) -> bool:
+        where, params = self._selector(name, instance_id)
+        with self._write(self._conn()) as conn:
+            matched = [i for (i,) in conn.execute(f"SELECT instance_id FROM agents WHERE {where}", params).fetchall()]
+            for instance in matched:
+                self._delete(conn, name, instance)
+        return bool(matched)
+
+    def get(self, name: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT data FROM agents WHERE name = ? ORDER BY instance_id LIMIT 1",
+                                   (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def instances(self, name: str) -> List[dict]:
+        return [json.loads(data) for (data,) in self._conn().execute(
+            "SELECT data FROM agents WHERE name = ? ORDER BY instance_id", (name,))]
+
+    def list_all(self) -> List[dict]:
+        return [json.loads(data) for (data,) in self._conn().execute("SELECT data FROM agents ORDER BY instance_id")]
+
+    def query(self, capabilities: Optional[List[str]] = None, match: str = "any",
+              limit: Optional[int] = None, cursor: Optional[str] = None):
+        """Page through agent instances using the capability index; cost follows the matches"""
+        fetch = -1 if limit is None else limit + 1
+        after = cursor or ""
+        conn = self._conn()
+        if capabilities:
+            capabilities = sorted(set(capabilities))
+            placeholders = ",".join("?" * len(capabilities))
+            required = len(capabilities) if match == "all" else 1
+            rows = conn.execute(
+                f"""SELECT a.instance_id, a.data FROM capabilities c JOIN agents a ON a.instance_id = c.instance_id
+                    WHERE c.capability IN ({placeholders}) AND c.instance_id > ?
+                    GROUP BY c.instance_id HAVING COUNT(*) >= ? ORDER BY c.instance_id LIMIT ?""",
+                (*capabilities, after, required, fetch)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT instance_id, data FROM agents WHERE instance_id > ? ORDER BY instance_id LIMIT ?",
+                (after, fetch)
+            ).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+        return [json.loads(data) for _, data in rows], next_cursor
+
+    def changes_since(self, since: int) -> Optional[list]:
+        conn = self._conn()
+        revision = self.revision()
+        if since > revision:
+            return None
+        oldest = conn.execute("SELECT MIN(revision) FROM changes").fetchone()[0] or revision + 1
+        if since < oldest - 1:
+            return None
+        return [
+            {"revision": rev, "type": change_type, "name": name, "instance_id": instance_id,
+             "agent": json.loads(data) if data else None}
+            for rev, change_type, name, instance_id, data in conn.execute(
+                "SELECT revision, type, name, instance_id, data FROM changes WHERE revision > ? ORDER BY revision",
+                (since,)
+            )
+        ]
+
+    def expire(self) -> List[str]:
+        """Uses the expires_at index, so the cost is O(expired)"""
+        conn = self._conn()
+        now = time.time()
+        # Cheap unlocked check first: most sweeps find nothing to do
+        if conn.execute("SELECT 1 FROM agents WHERE expires_at <= ? LIMIT 1", (now,)).fetchone() is None:
+            return []
+        with self._write(conn):
+            expired = conn.execute("SELECT name, instance_id FROM agents WHERE expires_at <= ?", (now,)).fetchall()
+            for name, instance_id in expired:
+                self._delete(conn, name, instance_id)
+        return [instance_id for _, instance_id in expired]
+
+    def next_expiry(self) -> Optional[float]:
+        deadline = self._conn().execute("SELECT MIN(expires_at) FROM agents").fetchone()[0]
+        return None if deadline is None else max(deadline - time.time(), 0.0)
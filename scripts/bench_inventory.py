@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Inventory Reservation Benchmark
+Reservation throughput of the booking inventory with 1 vs N concurrent clients
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from agents.booking_inventory import Inventory, InventoryError, Resource, format_time
+
+DAY = 86400
+KIND_DURATIONS = {"hotel": DAY, "restaurant": 5400, "car": DAY}
+
+def build_inventory(resources: int, units: int) -> Inventory:
+    """Synthetic inventory spread over kinds and a few cities"""
+    cities = ["Paris", "London", "New York", "Tokyo", "Sydney"]
+    kinds = list(KIND_DURATIONS)
+    return Inventory(Resource(f"res-{i:05d}", kinds[i % len(kinds)], f"Resource {i}", cities[i % len(cities)],
+                              units, duration=KIND_DURATIONS[kinds[i % len(kinds)]])
+                     for i in range(resources))
+
+def client(inventory: Inventory, resource_ids: list, horizon_days: int, confirm_ratio: float,
+           stop_at: float, seed: int, results: list, lock: threading.Lock):
+    """Hold random ranges on random resources, then confirm or cancel each hold"""
+    rng = random.Random(seed)
+    start_of_horizon = int(time.time()) // DAY * DAY
+    latencies = []
+    conflicts = 0
+    while time.monotonic() < stop_at:
+        resource = inventory.resources[rng.choice(resource_ids)]
+        start_at = start_of_horizon + rng.randrange(horizon_days) * DAY
+        end_at = start_at + rng.randint(1, 3) * KIND_DURATIONS[resource.kind]
+        started = time.perf_counter()
+        try:
+            hold = inventory.hold(resource.id, format_time(start_at), format_time(end_at))
+            if rng.random() < confirm_ratio:
+                inventory.confirm(hold["reservation_id"])
+            else:
+                inventory.cancel(hold["reservation_id"])
+        except InventoryError:
+            conflicts += 1
+        latencies.append(time.perf_counter() - started)
+    with lock:
+        results.append((latencies, conflicts))
+
+def check(inventory: Inventory) -> int:
+    """Count overlapping intervals on any unit (must be 0)"""
+    overlaps = 0
+    for resource in inventory.resources.values():
+        for index in resource.units:
+            overlaps += sum(1 for i in range(1, len(index)) if index.starts[i] < index.ends[i - 1])
+    return overlaps
+
+def run(clients: int, args) -> dict:
+    """Run `clients` threads against a fresh inventory for the configured duration"""
+    inventory = build_inventory(args.resources, args.units)
+    # A small hot set of resources makes clients contend for the same locks and rooms
+    resource_ids = list(inventory.resources)[:args.hot] if args.hot else list(inventory.resources)
+    results, lock = [], threading.Lock()
+    stop_at = time.monotonic() + args.duration
+    threads = [threading.Thread(target=client, args=(inventory, resource_ids, args.horizon, args.confirm_ratio,
+                                                     stop_at, n, results, lock))
+               for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    conflicts = sum(c for _, c in results)
+    pct = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inventory.json")
+        started = time.perf_counter()
+        inventory.snapshot(path)
+        snapshot_ms = (time.perf_counter() - started) * 1000
+        snapshot_kb = os.path.getsize(path) / 1024
+        restored = Inventory.load(path).report()["confirmed"]
+    report = inventory.report()
+    return {
+        "clients": clients,
+        "operations": len(latencies),
+        "conflicts": conflicts,
+        "ops": len(latencies) / args.duration,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "confirmed": report["confirmed"],
+        "restored": restored,
+        "overlaps": check(inventory),
+        "snapshot_ms": snapshot_ms,
+        "snapshot_kb": snapshot_kb
+    }
+
+def main():
+    """Main entry point with CLI arguments"""
+    parser = argparse.ArgumentParser(description="Inventory reservation throughput: 1 client vs N clients")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients to compare against 1")
+    parser.add_argument("--resources", type=int, default=1000, help="Resources in the synthetic inventory")
+    parser.add_argument("--units", type=int, default=10, help="Bookable units per resource")
+    parser.add_argument("--hot", type=int, default=0, help="Only book the first N resources (0 = all)")
+    parser.add_argument("--horizon", type=int, default=180, help="Days ahead bookings fall in")
+    parser.add_argument("--confirm-ratio", type=float, default=0.7, help="Share of holds confirmed, the rest cancelled")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load per run")
+    args = parser.parse_args()
+
+    print(f"📊 Inventory reservation throughput ({args.resources} resources x {args.units} units, "
+          f"{args.hot or args.resources} booked, {args.horizon}-day horizon, {args.duration:g}s per run)")
+    results = [run(n, args) for n in sorted({1, args.clients})]
+    print(f"{'clients':>8} {'ops':>9} {'conflicts':>10} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'confirmed':>10} {'snapshot':>16}")
+    for r in results:
+        print(f"{r['clients']:>8} {r['operations']:>9} {r['conflicts']:>10} {r['ops']:>9.0f} {r['p50_ms']:>8.3f} "
+              f"{r['p99_ms']:>8.3f} {r['confirmed']:>10} {r['snapshot_ms']:>7.0f}ms {r['snapshot_kb']:>5.0f}KB")
+    for r in results:
+        if r["overlaps"] or r["restored"] != r["confirmed"]:
+            print(f"❌ {r['clients']} clients: {r['overlaps']} overlapping bookings, "
+                  f"{r['restored']} of {r['confirmed']} confirmed restored from snapshot")
+            sys.exit(1)
+    print("✅ No double bookings; snapshots restored every confirmed reservation")
+
+if __name__ == "__main__":
+    main()
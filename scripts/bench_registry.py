@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Registry Throughput Benchmark
+Compares discovery throughput of the registry with 1 vs N worker processes
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+REGISTRY = os.path.join(ROOT, "registry", "agent_registry.py")
+CAPABILITIES = ["weather_info", "forecasts", "hotel_booking", "restaurant_reservations", "event_booking"]
+
+def wait_for_health(url: str, timeout: float = 30.0):
+    """Poll /health until the registry answers"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Registry at {url} did not become healthy")
+
+def seed(url: str, count: int):
+    """Register `count` agents spread over a few capabilities"""
+    session = requests.Session()
+    for i in range(count):
+        session.post(f"{url}/register", json={
+            "name": f"agent-{i:05d}",
+            "description": "benchmark agent",
+            "url": f"http://localhost:{10000 + i}",
+            "capabilities": [CAPABILITIES[i % len(CAPABILITIES)]],
+            "ttl": 3600
+        }).raise_for_status()
+
+def client_process(url: str, duration: float, threads: int, queue):
+    """One load-generating process: `threads` threads issuing filtered discovery queries"""
+    import threading
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(n):
+        session = requests.Session()
+        local = []
+        i = n
+        while time.monotonic() < stop_at:
+            params = {"capability": CAPABILITIES[i % len(CAPABILITIES)], "limit": 20}
+            start = time.perf_counter()
+            try:
+                session.get(f"{url}/agents", params=params, timeout=10).raise_for_status()
+                local.append(time.perf_counter() - start)
+            except requests.exceptions.RequestException:
+                with lock:
+                    errors[0] += 1
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    queue.put((latencies, errors[0]))
+
+def run(workers: int, port: int, agents: int, clients: int, threads: int, duration: float) -> dict:
+    """Start a registry with `workers` workers, load it, and return throughput stats"""
+    url = f"http://localhost:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = subprocess.Popen(
+            [sys.executable, REGISTRY, "--port", str(port), "--workers", str(workers),
+             "--storage", "sqlite", "--db", os.path.join(tmp, "registry.db")],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_health(url)
+            seed(url, agents)
+            queue = multiprocessing.Queue()
+            procs = [multiprocessing.Process(target=client_process, args=(url, duration, threads, queue))
+                     for _ in range(clients)]
+            for p in procs:
+                p.start()
+            latencies, errors = [], 0
+            for _ in procs:
+                lat, err = queue.get()
+                latencies.extend(lat)
+                errors += err
+            for p in procs:
+                p.join()
+        finally:
+            registry.terminate()
+            registry.wait()
+
+    latencies.sort()
+    pct = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99)
+    }
+
+def main():
+    """Main entry point with CLI arguments"""
+    parser = argparse.ArgumentParser(description="Registry throughput: 1 worker vs N workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker count to compare against 1")
+    parser.add_argument("--port", type=int, default=8900, help="Port for the benchmark registry")
+    parser.add_argument("--agents", type=int, default=2000, help="Agents to register before loading")
+    parser.add_argument("--clients", type=int, default=4, help="Load-generating processes")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per load-generating process")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per run")
+    args = parser.parse_args()
+
+    print(f"📊 Registry discovery throughput ({os.cpu_count()} CPUs, {args.agents} agents, "
+          f"{args.clients}x{args.threads} client threads, {args.duration:g}s per run)")
+    results = [run(n, args.port, args.agents, args.clients, args.threads, args.duration)
+               for n in sorted({1, args.workers})]
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.0f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    if len(results) > 1 and results[0]["rps"]:
+        print(f"⚡ Speedup with {results[-1]['workers']} workers: {results[-1]['rps'] / results[0]['rps']:.2f}x")
+
+if __name__ == "__main__":
+    main()
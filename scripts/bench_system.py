@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+System Load Benchmark
+Starts the registry and both agents on the stub model, replays a JSONL workload
+through SmartA2AClient at a fixed open-loop arrival rate, and reports latency
+percentiles, throughput and errors per component. Needs no network access.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+import httpx
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+from clients.smart_client import SmartA2AClient, load_batch_questions
+from clients.resilience import ResiliencePolicy
+from clients.response_cache import LRUResponseCache
+from common.stub_model import StubModel
+
+DEFAULT_WORKLOAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workloads", "mixed.jsonl")
+COMPONENTS = ["registry", "routing", "specialist", "end_to_end"]
+
+# Specialist calls made while answering the current request: (agent, start, end, error)
+_specialist_calls = contextvars.ContextVar("specialist_calls", default=None)
+
+class InstrumentedClient(SmartA2AClient):
+    """SmartA2AClient that records the timing of every specialist call against
+    the request that made it (fast path, planner parts and routing tools alike)"""
+
+    async def _call_agent(self, name, message, deadline=None):
+        calls = _specialist_calls.get()
+        start = time.perf_counter()
+        error = None
+        try:
+            return await super()._call_agent(name, message, deadline)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if calls is not None:
+                calls.append((name, start, time.perf_counter(), error))
+
+def covered(intervals) -> float:
+    """Seconds covered by at least one of the (start, end) intervals"""
+    total, reach = 0.0, None
+    for start, end in sorted(intervals):
+        if reach is None or start > reach:
+            total += end - start
+            reach = end
+        elif end > reach:
+            total += end - reach
+            reach = end
+    return total
+
+class Recorder:
+    """Latency samples and error counts per component"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, component: str, seconds: float = None, error: bool = False):
+        if error:
+            self.errors[component] = self.errors.get(component, 0) + 1
+        else:
+            self.samples.setdefault(component, []).append(seconds)
+
+    def summary(self) -> Dict[str, dict]:
+        result = {}
+        names = COMPONENTS + sorted(set(self.samples) | set(self.errors) - set(COMPONENTS))
+        for name in names:
+            samples = sorted(self.samples.get(name, []))
+            errors = self.errors.get(name, 0)
+            count = len(samples) + errors
+            if not count:
+                continue
+            pct = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1000 if samples else None
+            result[name] = {"count": count, "errors": errors, "error_rate": errors / count,
+                            "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+                            "mean_ms": sum(samples) / len(samples) * 1000 if samples else None}
+        return result
+
+def wait_until(check, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if check():
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {what}")
+
+def start_system(args, log_dir: str) -> List[subprocess.Popen]:
+    """Registry plus weather and booking agents on the stub model, each logging to log_dir"""
+    registry_url = f"http://localhost:{args.port}"
+    model_flags = ["--model", "stub", "--stub-latency", str(args.agent_latency),
+                   "--stub-tokens-per-second", str(args.tokens_per_second),
+                   "--stub-reply-tokens", str(args.reply_tokens)]
+    commands = [
+        ("registry", [os.path.join(ROOT, "registry", "agent_registry.py"), "--port", str(args.port)]),
+        ("weather_agent", [os.path.join(ROOT, "agents", "weather_agent.py"), "--port", str(args.port + 1),
+                           "--registry", registry_url, "--weather-provider", "fixture"] + model_flags),
+        ("booking_agent", [os.path.join(ROOT, "agents", "booking_agent.py"), "--port", str(args.port + 2),
+                           "--registry", registry_url] + model_flags)
+    ]
+    processes = []
+    for name, command in commands:
+        log = open(os.path.join(log_dir, f"{name}.log"), "w")
+        processes.append(subprocess.Popen([sys.executable, "-u"] + command, stdout=log, stderr=subprocess.STDOUT,
+                                          cwd=ROOT))
+        if name == "registry":
+            wait_until(lambda: httpx.get(f"{registry_url}/health", timeout=1).is_success, 30, "the registry")
+    wait_until(lambda: len(httpx.get(f"{registry_url}/agents", timeout=1).json()["agents"]) >= 2, 60,
+               "both agents to register")
+    return processes
+
+async def replay(client: InstrumentedClient, questions: List[str], args, recorder: Recorder) -> float:
+    """Send questions at a fixed arrival rate, whether or not earlier ones have answered
+    (open loop), and record each component. Returns the elapsed seconds."""
+    registry = httpx.AsyncClient(base_url=f"http://localhost:{args.port}", timeout=10)
+    loop = asyncio.get_running_loop()
+    outstanding = set()
+
+    async def one(question: str, scheduled: float):
+        # Discovery, as a client starting up for this request would do it
+        started = time.perf_counter()
+        try:
+            (await registry.get("/agents")).raise_for_status()
+            recorder.record("registry", time.perf_counter() - started)
+        except httpx.HTTPError:
+            recorder.record("registry", error=True)
+        calls = []
+        _specialist_calls.set(calls)
+        started = time.perf_counter()
+        try:
+            await client._answer(question, use_cache=args.cache, isolated=True, verbose=False,
+                                 deadline=args.deadline)
+            ok = True
+        except Exception:
+            ok = False
+        finished = time.perf_counter()
+        for agent, call_start, call_end, error in calls:
+            for component in ("specialist", f"specialist:{agent}"):
+                recorder.record(component, call_end - call_start, error=error is not None)
+        # Latency counts from the scheduled arrival, so a backlog isn't hidden (no coordinated omission)
+        recorder.record("end_to_end", loop.time() - scheduled, error=not ok)
+        if ok:
+            recorder.record("routing", (finished - started) - covered((s, e) for _, s, e, _ in calls))
+
+    start = loop.time()
+    try:
+        for i in range(args.requests):
+            scheduled = start + i / args.rate
+            await asyncio.sleep(max(scheduled - loop.time(), 0.0))
+            if len(outstanding) >= args.max_outstanding:
+                # The system can't keep up: shed the arrival rather than slow the schedule down
+                recorder.record("end_to_end", error=True)
+                continue
+            task = asyncio.ensure_future(one(questions[i % len(questions)], scheduled))
+            outstanding.add(task)
+            task.add_done_callback(outstanding.discard)
+        if outstanding:
+            await asyncio.wait(list(outstanding))
+        return loop.time() - start
+    finally:
+        await registry.aclose()
+
+def print_report(summary: Dict[str, dict], elapsed: float, args, client: SmartA2AClient):
+    e2e = summary.get("end_to_end", {"count": 0, "errors": 0})
+    completed = e2e["count"] - e2e["errors"]
+    print()
+    print(f"📊 {e2e['count']} requests offered at {args.rate:g}/s over {elapsed:.1f}s: "
+          f"{completed / elapsed:.2f} answers/s, {e2e['errors']} failed")
+    print(f"{'component':<26} {'count':>7} {'errors':>7} {'err %':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    fmt = lambda v: f"{v:>9.1f}" if v is not None else f"{'-':>9}"
+    for name, row in summary.items():
+        print(f"{name:<26} {row['count']:>7} {row['errors']:>7} {row['error_rate']:>6.1%} "
+              f"{fmt(row['p50_ms'])} {fmt(row['p95_ms'])} {fmt(row['p99_ms'])}")
+    stats = client.routing_stats
+    print(f"🔀 Paths: {stats['fast_path']} fast path, {stats['planned']} planned, {stats['llm_path']} LLM routing")
+
+def main():
+    """Main entry point with CLI arguments"""
+    parser = argparse.ArgumentParser(description="Offline open-loop load test of registry, agents and client")
+    parser.add_argument("--workload", type=str, default=DEFAULT_WORKLOAD,
+                        help="JSONL file of questions (question, body or title per line)")
+    parser.add_argument("--rate", type=float, default=5.0, help="Arrivals per second (open loop)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests to send; the workload repeats as needed")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests sent one at a time first")
+    parser.add_argument("--max-outstanding", type=int, default=500,
+                        help="Arrivals beyond this many unanswered requests are counted as failed")
+    parser.add_argument("--deadline", type=float, default=30.0, help="Seconds allowed per answer")
+    parser.add_argument("--agent-latency", type=float, default=0.3, help="Agents' stub model time to first token")
+    parser.add_argument("--router-latency", type=float, default=0.3, help="Routing stub model time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Stub models' token rate")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="Tokens per stub answer")
+    parser.add_argument("--cache", action="store_true", help="Enable the client's response cache")
+    parser.add_argument("--port", type=int, default=8600, help="Registry port; agents use the next two")
+    parser.add_argument("--log-dir", type=str, default=None, help="Keep server logs here (default: temporary)")
+    parser.add_argument("--output", type=str, default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    questions = [q for _, q in load_batch_questions(args.workload)]
+    if not questions:
+        parser.error(f"No questions in {args.workload}")
+    print(f"🧪 Offline benchmark: {len(questions)} workload questions, {args.requests} requests at {args.rate:g}/s, "
+          f"stub models {args.agent_latency:g}s + {args.tokens_per_second:g} tokens/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = args.log_dir or tmp
+        os.makedirs(log_dir, exist_ok=True)
+        processes = []
+        client = None
+        try:
+            processes = start_system(args, log_dir)
+            client = InstrumentedClient(
+                registry_url=f"http://localhost:{args.port}",
+                response_cache=LRUResponseCache() if args.cache else None,
+                resilience=ResiliencePolicy(deadline=args.deadline),
+                model=StubModel(latency=args.router_latency, tokens_per_second=args.tokens_per_second,
+                                reply_tokens=args.reply_tokens)
+            )
+            for question in questions[:args.warmup]:
+                client.run(client._answer(question, use_cache=False, isolated=True, verbose=False))
+            client.routing_stats.update({key: type(value)() for key, value in client.routing_stats.items()})
+
+            recorder = Recorder()
+            elapsed = client.run(replay(client, questions, args, recorder))
+            summary = recorder.summary()
+            print_report(summary, elapsed, args, client)
+            if args.output:
+                with open(args.output, "w") as f:
+                    json.dump({"config": vars(args), "elapsed_seconds": elapsed, "components": summary,
+                               "paths": client.routing_stats}, f, indent=2)
+                print(f"💾 Results written to {args.output}")
+        finally:
+            if client is not None:
+                client.close()
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+if __name__ == "__main__":
+    main()
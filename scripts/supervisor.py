@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+System Supervisor
+Starts the registry, N replicas of each agent and the web UI in parallel, each
+as soon as the services it depends on pass their health/readiness probes,
+restarts crashed services with exponential backoff and reports how long the
+whole system took to come up
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import random
+import signal
+import sys
+import time
+from typing import Dict, List, Optional
+import httpx
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+from agents.weather_data import PROVIDERS
+from common.stub_model import add_model_arguments
+from common.telemetry import TRACE_EXPORTERS
+
+DEFAULT_READY_TIMEOUT = 60.0
+PROBE_INTERVAL = 0.1
+MIN_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 30.0
+# A service that stays up this long is healthy again: its next crash restarts it without delay growth
+STABLE_SECONDS = 60.0
+STOP_TIMEOUT = 10.0
+
+class Service:
+    """One supervised child process, ready when `ready_url` answers 200"""
+
+    def __init__(self, name: str, command: List[str], ready_url: str, depends_on: List["Service"] = ()):
+        self.name = name
+        self.command = command
+        self.ready_url = ready_url
+        self.depends_on = list(depends_on)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.ready = asyncio.Event()
+        # Seconds from supervisor start: process launched / first passed its probe
+        self.started_after: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self.restarts = 0
+
+class Supervisor:
+    """Runs services in dependency order, but everything whose dependencies
+    are ready starts at once. A child that exits, or doesn't become ready
+    within `ready_timeout`, is restarted after an exponentially growing,
+    jittered delay. Children run in their own sessions, so Ctrl+C reaches
+    only the supervisor, which stops them in reverse dependency order."""
+
+    def __init__(self, services: List[Service], ready_timeout: float = DEFAULT_READY_TIMEOUT,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, log_dir: Optional[str] = None):
+        self.services = services
+        self.ready_timeout = ready_timeout
+        self.max_backoff = max_backoff
+        self.log_dir = log_dir
+        self.started = time.perf_counter()
+        self._stopping = asyncio.Event()
+        self._probe_client = httpx.AsyncClient(timeout=2.0)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    async def run(self):
+        """Supervise until SIGINT/SIGTERM, then stop every child"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopping.set)
+        tasks = [asyncio.ensure_future(self._supervise(service)) for service in self.services]
+        reporter = asyncio.ensure_future(self._report_when_ready())
+        try:
+            await self._stopping.wait()
+        finally:
+            print("\n🛑 Shutting down A2A system...")
+            reporter.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, reporter, return_exceptions=True)
+            await self.stop_all()
+            await self._probe_client.aclose()
+
+    async def _report_when_ready(self):
+        await asyncio.gather(*(service.ready.wait() for service in self.services))
+        print_cold_start(self.services, self.elapsed())
+
+    async def _supervise(self, service: Service):
+        failures = 0
+        while not self._stopping.is_set():
+            for dependency in service.depends_on:
+                await dependency.ready.wait()
+            launched = time.perf_counter()
+            await self._spawn(service)
+            if await self._wait_ready(service):
+                service.ready.set()
+                if service.ready_after is None:
+                    service.ready_after = self.elapsed()
+                print(f"✅ {service.name} ready after {time.perf_counter() - launched:.2f}s "
+                      f"(pid {service.process.pid})")
+                await service.process.wait()
+                service.ready.clear()
+                if time.perf_counter() - launched >= STABLE_SECONDS:
+                    failures = 0
+                reason = f"exited with code {service.process.returncode}"
+            else:
+                reason = (f"exited with code {service.process.returncode} before it was ready"
+                          if service.process.returncode is not None
+                          else f"not ready after {self.ready_timeout:g}s")
+                await self._stop(service)
+            # Full-jitter exponential backoff, so a crash loop doesn't spin and replicas don't restart in step
+            delay = random.uniform(MIN_BACKOFF, min(self.max_backoff, MIN_BACKOFF * 2 ** failures))
+            failures += 1
+            service.restarts += 1
+            print(f"💥 {service.name} {reason}; restarting in {delay:.1f}s (restart {service.restarts})")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _spawn(self, service: Service):
+        if self.log_dir:
+            output = open(os.path.join(self.log_dir, f"{service.name}.log"), "ab")
+        else:
+            output = asyncio.subprocess.PIPE
+        service.process = await asyncio.create_subprocess_exec(
+            *service.command, cwd=ROOT, stdout=output, stderr=asyncio.subprocess.STDOUT,
+            env=dict(os.environ, PYTHONUNBUFFERED="1"), start_new_session=True
+        )
+        if service.started_after is None:
+            service.started_after = self.elapsed()
+        if self.log_dir:
+            output.close()
+        else:
+            asyncio.ensure_future(_relay_output(service.name, service.process.stdout))
+
+    async def _wait_ready(self, service: Service) -> bool:
+        """Probe until the service answers 200; False if it exits or times out first"""
+        deadline = time.perf_counter() + self.ready_timeout
+        while time.perf_counter() < deadline and service.process.returncode is None:
+            try:
+                if (await self._probe_client.get(service.ready_url)).status_code == 200:
+                    return True
+            except httpx.HTTPError:
+                pass
+            try:
+                await asyncio.wait_for(service.process.wait(), PROBE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        return False
+
+    async def _stop(self, service: Service):
+        """SIGINT (agents unregister on the way out), then SIGKILL if it lingers"""
+        process = service.process
+        if process is None or process.returncode is not None:
+            return
+        process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    async def stop_all(self):
+        """Stop dependents before what they depend on: UI, agents, registry"""
+        for level in reversed(dependency_levels(self.services)):
+            await asyncio.gather(*(self._stop(service) for service in level))
+
+def dependency_levels(services: List[Service]) -> List[List[Service]]:
+    """Services grouped so each group only depends on earlier groups"""
+    levels: Dict[str, int] = {}
+
+    def level(service: Service) -> int:
+        if service.name not in levels:
+            levels[service.name] = 1 + max((level(d) for d in service.depends_on), default=-1)
+        return levels[service.name]
+
+    grouped: List[List[Service]] = []
+    for service in services:
+        depth = level(service)
+        grouped.extend([] for _ in range(depth + 1 - len(grouped)))
+        grouped[depth].append(service)
+    return grouped
+
+async def _relay_output(name: str, stream: asyncio.StreamReader):
+    """Print a child's output, each line prefixed with the service name"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            return
+        print(f"[{name}] {line.decode(errors='replace').rstrip()}")
+
+def print_cold_start(services: List[Service], elapsed: float):
+    print()
+    print(f"🚀 System ready in {elapsed:.2f}s ({len(services)} services)")
+    print(f"   {'service':<20} {'started':>8} {'ready':>8} {'restarts':>9}")
+    for service in services:
+        print(f"   {service.name:<20} {service.started_after:>7.2f}s {service.ready_after:>7.2f}s "
+              f"{service.restarts:>9}")
+    print("🛑 Press Ctrl+C to stop all services")
+    print()
+
+def build_services(args) -> List[Service]:
+    """Registry, agent replicas and UI, with their readiness probes and dependencies"""
+    python = [sys.executable, "-u"]
+    registry_url = f"http://{args.host}:{args.registry_port}"
+    registry = Service("registry", python + [os.path.join("registry", "agent_registry.py"), "--host", args.host,
+                                             "--port", str(args.registry_port), "--trace", args.trace],
+                       f"{registry_url}/health")
+    agent_flags = ["--registry", registry_url, "--host", args.host, "--trace", args.trace,
+                   "--model", args.model, "--stub-latency", str(args.stub_latency),
+                   "--stub-tokens-per-second", str(args.stub_tokens_per_second),
+                   "--stub-reply-tokens", str(args.stub_reply_tokens)]
+    agents = []
+    for agent, replicas, base_port, extra in [
+        ("weather_agent", args.weather_replicas, args.weather_port, ["--weather-provider", args.weather_provider]),
+        ("booking_agent", args.booking_replicas, args.booking_port, [])
+    ]:
+        for i in range(replicas):
+            # Replica ports step by 2 so weather (8080, 8082, ...) and booking (8081, 8083, ...) interleave
+            port = base_port + 2 * i
+            agents.append(Service(f"{agent}-{i + 1}",
+                                  python + [os.path.join("agents", f"{agent}.py"), "--port", str(port)]
+                                  + agent_flags + extra,
+                                  f"http://{args.host}:{port}/health", depends_on=[registry]))
+    services = [registry] + agents
+    if not args.no_ui:
+        if importlib.util.find_spec("streamlit") is None:
+            print("⚠️  Streamlit is not installed; starting without the web UI")
+        else:
+            services.append(Service("ui", [sys.executable, "-m", "streamlit", "run",
+                                           os.path.join("ui", "streamlit_app.py"), "--server.port", str(args.ui_port),
+                                           "--server.headless", "true"],
+                                    f"http://{args.host}:{args.ui_port}/_stcore/health", depends_on=agents))
+    return services
+
+def main():
+    """Main entry point with CLI arguments"""
+    parser = argparse.ArgumentParser(description="Start and supervise the registry, agents and web UI")
+    parser.add_argument("--host", type=str, default="localhost", help="Host every service binds to")
+    parser.add_argument("--registry-port", type=int, default=8000, help="Registry port")
+    parser.add_argument("--weather-replicas", type=int, default=1, help="Weather agent replicas")
+    parser.add_argument("--booking-replicas", type=int, default=1, help="Booking agent replicas")
+    parser.add_argument("--weather-port", type=int, default=8080, help="First weather replica's port (then +2 each)")
+    parser.add_argument("--booking-port", type=int, default=8081, help="First booking replica's port (then +2 each)")
+    parser.add_argument("--weather-provider", choices=sorted(PROVIDERS), default="open-meteo",
+                        help="Weather data source for the weather agents")
+    parser.add_argument("--ui-port", type=int, default=8501, help="Streamlit UI port")
+    parser.add_argument("--no-ui", action="store_true", help="Don't start the Streamlit UI")
+    parser.add_argument("--trace", choices=TRACE_EXPORTERS, default="off", help="Trace export for every service")
+    parser.add_argument("--ready-timeout", type=float, default=DEFAULT_READY_TIMEOUT,
+                        help="Seconds a service may take to pass its probe before it is restarted")
+    parser.add_argument("--max-backoff", type=float, default=DEFAULT_MAX_BACKOFF,
+                        help="Longest delay before restarting a crashed service")
+    parser.add_argument("--log-dir", type=str, default=None,
+                        help="Write each service's output to <log-dir>/<service>.log instead of this terminal")
+    add_model_arguments(parser)
+    args = parser.parse_args()
+
+    print("🚀 Starting A2A System with Custom Registry...")
+    print("=" * 46)
+
+    async def supervise():
+        services = build_services(args)
+        for service in services:
+            print(f"   {service.name:<20} probe {service.ready_url}")
+        if args.log_dir:
+            os.makedirs(args.log_dir, exist_ok=True)
+            print(f"📝 Logs in {args.log_dir}")
+        await Supervisor(services, args.ready_timeout, args.max_backoff, args.log_dir).run()
+
+    asyncio.run(supervise())
+
+if __name__ == "__main__":
+    main()
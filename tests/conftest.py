@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules import each other from the repository root (clients.*, registry.*, agents.*)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
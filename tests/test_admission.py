@@ -0,0 +1,111 @@
+import asyncio
+from agents.admission import AdmissionController
+
+async def settle():
+    """Let queued waiters run up to their next wait"""
+    await asyncio.sleep(0.01)
+
+def test_release_hands_the_slot_to_the_oldest_waiter():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue=2)
+        assert await admission.acquire()
+        order = []
+
+        async def waiter(name):
+            assert await admission.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(waiter("first")), asyncio.create_task(waiter("second"))]
+        await settle()
+        assert admission.queue_depth == 2
+        admission.release()
+        await settle()
+        # The slot moved to the waiter: still one in flight, never two
+        assert order == ["first"] and admission.in_flight == 1
+        admission.release()
+        await asyncio.gather(*tasks)
+        assert order == ["first", "second"]
+        admission.release()
+        assert admission.in_flight == 0 and admission.queue_depth == 0
+
+    asyncio.run(scenario())
+
+def test_new_caller_does_not_overtake_queued_waiters():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue=1)
+        await admission.acquire()
+        queued = asyncio.create_task(admission.acquire())
+        await settle()
+        admission.release()
+        # The freed slot already belongs to the queued waiter
+        assert not await admission.acquire(timeout=0.01)
+        assert await queued
+        assert admission.in_flight == 1
+
+    asyncio.run(scenario())
+
+def test_full_queue_and_expired_wait_are_rejected():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        await admission.acquire()
+        queued = asyncio.create_task(admission.acquire())
+        await settle()
+        assert not await admission.acquire()
+        assert not await queued
+        assert admission.stats["rejected_full"] == 1 and admission.stats["rejected_timeout"] == 1
+        assert admission.queue_depth == 0 and admission.in_flight == 1
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_never_loses_a_slot_it_was_handed():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue=2)
+        await admission.acquire()
+        first = asyncio.create_task(admission.acquire())
+        second = asyncio.create_task(admission.acquire())
+        await settle()
+        # Hand the slot to `first` and cancel it before it resumes: either it keeps
+        # the slot (wait_for may still return the result) or passes it on, never drops it
+        admission.release()
+        first.cancel()
+        [kept] = await asyncio.gather(first, return_exceptions=True)
+        if kept is True:
+            admission.release()
+        assert await asyncio.wait_for(second, 1)
+        assert admission.in_flight == 1 and admission.queue_depth == 0
+
+    asyncio.run(scenario())
+
+def test_wrapped_app_answers_429_with_retry_after_when_full():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue=0)
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        async def request(method="POST"):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {"type": "http", "method": method, "headers": [(b"x-request-timeout", b"5")]}
+            await admission.wrap(app)(scope, None, send)
+            return sent
+
+        busy = asyncio.create_task(request())
+        await settle()
+        rejected = await request()
+        assert rejected[0]["status"] == 429
+        assert dict(rejected[0]["headers"])[b"retry-after"] == b"1"
+        # Reads (agent cards) bypass admission control
+        card = asyncio.create_task(request("GET"))
+        release.set()
+        assert (await busy)[0]["status"] == 200
+        assert (await card)[0]["status"] == 200
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+import httpx
+import pytest
+from clients.a2a_transport import A2ATransport
+from clients.agent_card_cache import AgentCardCache
+
+URL = "http://weather"
+
+class CardServer:
+    """Serves one agent card with an ETag (answering 304 when it matches), or is down"""
+
+    def __init__(self):
+        self.card = {"name": "weather", "description": "Weather forecasts"}
+        self.version = 1
+        self.down = False
+        self.requests = []
+
+    def __call__(self, request):
+        if self.down:
+            raise httpx.ConnectError("agent down", request=request)
+        etag = f'"v{self.version}"'
+        self.requests.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, json=self.card, headers={"ETag": etag})
+
+@pytest.fixture
+def server():
+    return CardServer()
+
+def card_cache(server, path=None, max_age=300.0):
+    transport = A2ATransport()
+    transport._client = httpx.Client(transport=httpx.MockTransport(server))
+    return AgentCardCache(path, max_age=max_age, transport=transport)
+
+def test_fresh_cards_need_no_request(server):
+    cache = card_cache(server)
+    assert cache.get(URL) == server.card
+    assert cache.get(URL) == server.card
+    assert len(server.requests) == 1 and cache.stats["fetched"] == 1 and cache.stats["hits"] == 1
+
+def test_old_cards_are_revalidated_with_their_etag(server):
+    cache = card_cache(server, max_age=0)
+    cache.get(URL)
+    assert cache.get(URL) == server.card
+    assert server.requests == [None, '"v1"'] and cache.stats["revalidated"] == 1
+    server.card, server.version = {"name": "weather", "description": "Forecasts and alerts"}, 2
+    assert cache.get(URL)["description"] == "Forecasts and alerts" and cache.stats["changed"] == 1
+
+def test_unreachable_agent_keeps_its_last_card(server):
+    cache = card_cache(server, max_age=0)
+    cache.get(URL)
+    server.down = True
+    assert cache.get(URL) == server.card
+    assert cache.stats["stale"] == 1
+    assert card_cache(server).get("http://unknown") is None
+
+def test_cards_persist_across_restarts(server, tmp_path):
+    path = str(tmp_path / "cards.json")
+    card_cache(server, path).refresh([URL])
+    server.down = True
+    restarted = card_cache(server, path)
+    assert restarted.cached(URL) == server.card and restarted.stale_urls([URL, "http://booking"]) == ["http://booking"]
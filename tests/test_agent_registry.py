@@ -0,0 +1,119 @@
+import asyncio
+import httpx
+from registry.agent_registry import AgentRegistry
+from registry.registry_journal import RegistryJournal
+from registry.registry_store import MemoryStore
+
+def http_client(registry):
+    """httpx client talking to `registry` in-process"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=registry.app), base_url="http://registry")
+
+async def register(client, name, *capabilities):
+    response = await client.post("/register", json={"name": name, "description": name, "url": f"http://{name}",
+                                                     "capabilities": list(capabilities)})
+    assert response.status_code == 200
+
+async def walk(client, **params):
+    """Instance ids of every page of a listing, following next_cursor"""
+    seen, cursor = [], None
+    while True:
+        page = (await client.get("/agents", params=dict(params, **({"cursor": cursor} if cursor else {})))).json()
+        assert len(page["agents"]) <= params["limit"]
+        seen += [agent["instance_id"] for agent in page["agents"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+
+def test_cursor_pages_cover_every_agent_once():
+    async def scenario():
+        async with http_client(AgentRegistry()) as client:
+            for name in ["e", "a", "d", "b", "c"]:
+                await register(client, name, "weather" if name in "ace" else "booking")
+            assert await walk(client, limit=2) == [f"{n}@http://{n}" for n in "abcde"]
+            assert await walk(client, limit=2, capability="weather") == [f"{n}@http://{n}" for n in "ace"]
+            assert await walk(client, limit=1, capability=["weather", "booking"], match="all") == []
+
+    asyncio.run(scenario())
+
+def test_registration_between_pages_is_neither_repeated_nor_skipped():
+    async def scenario():
+        async with http_client(AgentRegistry()) as client:
+            for name in "acd":
+                await register(client, name)
+            first = (await client.get("/agents", params={"limit": 2})).json()
+            assert [a["name"] for a in first["agents"]] == ["a", "c"]
+            # "b" sorts before the cursor and "e" after it
+            await register(client, "b")
+            await register(client, "e")
+            rest = (await client.get("/agents", params={"limit": 5, "cursor": first["next_cursor"]})).json()
+            assert [a["name"] for a in rest["agents"]] == ["d", "e"] and rest["next_cursor"] is None
+
+    asyncio.run(scenario())
+
+def test_listing_etag_answers_304_until_the_agent_set_changes():
+    async def scenario():
+        async with http_client(AgentRegistry()) as client:
+            await register(client, "weather")
+            first = await client.get("/agents")
+            etag = first.headers["etag"]
+            unchanged = await client.get("/agents", headers={"If-None-Match": etag})
+            assert unchanged.status_code == 304 and unchanged.headers["etag"] == etag and not unchanged.content
+            # Renewing a lease changes nothing a listing shows
+            await client.post("/heartbeat/weather")
+            assert (await client.get("/agents", headers={"If-None-Match": etag})).status_code == 304
+            await register(client, "booking")
+            changed = await client.get("/agents", headers={"If-None-Match": etag})
+            assert changed.status_code == 200 and changed.headers["etag"] != etag
+            assert sorted(a["name"] for a in changed.json()["agents"]) == ["booking", "weather"]
+
+    asyncio.run(scenario())
+
+def test_watch_wakes_up_on_a_write():
+    async def scenario():
+        async with http_client(AgentRegistry()) as client:
+            await register(client, "weather")
+            revision = (await client.get("/agents")).json()["revision"]
+            started = asyncio.get_running_loop().time()
+            watch = asyncio.create_task(client.get("/watch", params={"since": revision, "timeout": 10}))
+            await asyncio.sleep(0.1)
+            assert not watch.done()
+            await register(client, "booking")
+            body = (await asyncio.wait_for(watch, 2)).json()
+            assert asyncio.get_running_loop().time() - started < 2
+            assert body["reset"] is False and body["revision"] == revision + 1
+            assert [(c["type"], c["name"]) for c in body["changes"]] == [("register", "booking")]
+
+    asyncio.run(scenario())
+
+def test_watch_from_another_epoch_gets_a_reset():
+    async def scenario():
+        async with http_client(AgentRegistry()) as client:
+            await register(client, "weather")
+            body = (await client.get("/watch", params={"since": 1, "epoch": "previous", "timeout": 0})).json()
+            assert body["reset"] is True and [a["name"] for a in body["agents"]] == ["weather"]
+
+    asyncio.run(scenario())
+
+def test_health_reports_a_failed_journal_as_degraded(tmp_path, monkeypatch):
+    async def scenario():
+        journal = RegistryJournal(str(tmp_path))
+        registry = AgentRegistry(store=MemoryStore(journal=journal))
+        registry.store.start()
+
+        def failing_fsync(fd):
+            raise OSError(28, "No space left on device")
+
+        monkeypatch.setattr("registry.registry_journal.os.fsync", failing_fsync)
+        async with http_client(registry) as client:
+            assert (await client.get("/health")).json()["status"] == "healthy"
+            await register(client, "weather")
+            await asyncio.to_thread(journal._thread.join, 5)
+            health = await client.get("/health")
+            assert health.status_code == 503 and health.json()["status"] == "degraded"
+            assert "No space left" in health.json()["reason"]
+            # Writes are still served from memory
+            await register(client, "booking")
+            assert (await client.get("/health")).json()["agents_count"] == 2
+        registry.store.close()
+
+    asyncio.run(scenario())
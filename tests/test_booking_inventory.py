@@ -0,0 +1,79 @@
+import pytest
+from agents.booking_inventory import Inventory, InventoryError, IntervalIndex, Resource
+
+@pytest.fixture
+def index():
+    # Reservations [10, 20) and [30, 40), added out of order
+    index = IntervalIndex()
+    index.add(30, 40, "b")
+    index.add(10, 20, "a")
+    return index
+
+@pytest.mark.parametrize("start,end,free", [
+    (0, 10, True),     # ends where the first begins
+    (20, 30, True),    # exactly the gap
+    (40, 50, True),    # starts where the last ends
+    (0, 11, False),
+    (19, 21, False),
+    (25, 31, False),
+    (12, 18, False),   # inside a reservation
+    (5, 45, False),    # covers both
+])
+def test_is_free_treats_intervals_as_half_open(index, start, end, free):
+    assert index.is_free(start, end) is free
+
+@pytest.mark.parametrize("start,end,ids", [
+    (0, 10, []),
+    (20, 30, []),
+    (15, 35, ["a", "b"]),
+    (19, 20, ["a"]),
+    (39, 100, ["b"]),
+])
+def test_overlapping_returns_positions_of_conflicts(index, start, end, ids):
+    assert [index.ids[i] for i in index.overlapping(start, end)] == ids
+
+def test_overlapping_agrees_with_is_free(index):
+    for start in range(0, 50, 3):
+        for end in range(start + 1, 55, 4):
+            assert index.is_free(start, end) == (len(index.overlapping(start, end)) == 0)
+
+def test_remove_picks_the_reservation_by_id():
+    index = IntervalIndex()
+    index.add(10, 20, "a")
+    index.remove(10, "a")
+    index.add(10, 20, "b")
+    index.add(20, 30, "c")
+    index.remove(20, "c")
+    assert index.ids == ["b"] and len(index) == 1
+    assert index.is_free(20, 30)
+    assert not index.is_free(10, 11)
+
+def test_empty_index_is_free():
+    index = IntervalIndex()
+    assert index.is_free(0, 1)
+    assert len(index.overlapping(0, 100)) == 0
+
+@pytest.fixture
+def inventory():
+    # One two-room hotel; holds lapse after a second unless the test moves the clock
+    return Inventory([Resource("h1", "hotel", "Hotel", "Paris", units=2)], hold_ttl=1.0)
+
+def test_get_drops_an_expired_hold(inventory, monkeypatch):
+    hold = inventory.hold("h1", "2030-01-01", "2030-01-03")
+    assert inventory.get(hold["reservation_id"])["status"] == "held"
+    later = inventory.resources["h1"].reservations[hold["reservation_id"]]["expires_at"] + 1
+    monkeypatch.setattr("agents.booking_inventory.time.time", lambda: later)
+    with pytest.raises(InventoryError):
+        inventory.get(hold["reservation_id"])
+    resource = inventory.resources["h1"]
+    assert resource.reservations == {} and resource.stats["expired"] == 1
+    assert all(len(unit) == 0 for unit in resource.units)
+
+def test_expire_holds_frees_ranges_nobody_queries(inventory, monkeypatch):
+    held = inventory.hold("h1", "2030-01-01", "2030-01-03")
+    confirmed = inventory.confirm(inventory.hold("h1", "2030-02-01", "2030-02-03")["reservation_id"])
+    later = inventory.resources["h1"].reservations[held["reservation_id"]]["expires_at"] + 1
+    monkeypatch.setattr("agents.booking_inventory.time.time", lambda: later)
+    report = inventory.report()
+    assert report["held"] == 0 and report["confirmed"] == 1 and report["expired"] == 1
+    assert list(inventory.resources["h1"].reservations) == [confirmed["reservation_id"]]
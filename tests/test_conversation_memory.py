@@ -0,0 +1,61 @@
+import time
+from types import SimpleNamespace
+from common.conversation_memory import (PLACEHOLDER_TEXT, SUMMARY_PREFIX, TokenBudgetConversationManager,
+                                        estimate_tokens)
+from common.stub_model import StubModel
+
+class FailingModel:
+    async def stream(self, messages, system_prompt=None, **kwargs):
+        raise RuntimeError("model unavailable")
+        yield
+
+def conversation(turns, model=None):
+    """Agent stand-in holding `turns` user/assistant exchanges of ~100 tokens per message"""
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": [{"text": f"question {turn} " + "x" * 400}]})
+        messages.append({"role": "assistant", "content": [{"text": f"answer {turn} " + "y" * 400}]})
+    return SimpleNamespace(messages=messages, model=model)
+
+def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_history_within_budget_is_left_alone():
+    memory = TokenBudgetConversationManager(max_tokens=1000, summarize=False)
+    agent = conversation(2)
+    memory.apply_management(agent)
+    assert len(agent.messages) == 4 and memory.stats()["trims"] == 0
+
+def test_over_budget_history_slides_to_the_target():
+    memory = TokenBudgetConversationManager(max_tokens=500, summarize=False)
+    agent = conversation(6)
+    memory.apply_management(agent)
+    assert sum(estimate_tokens(m) for m in agent.messages) <= 500 * memory.target_ratio
+    # A stand-in for the dropped turns, then the window from an assistant message on
+    assert agent.messages[0]["content"][0]["text"] == PLACEHOLDER_TEXT
+    assert agent.messages[1]["role"] == "assistant" and agent.messages[-1]["content"][0]["text"].startswith("answer 5")
+    stats = memory.stats()
+    assert stats["trims"] == 1 and stats["messages_dropped"] == 12 - (len(agent.messages) - 1)
+
+def test_dropped_messages_are_summarized_in_the_background():
+    memory = TokenBudgetConversationManager(max_tokens=500)
+    agent = conversation(6, StubModel(latency=0, tokens_per_second=10000, reply_tokens=10))
+    memory.apply_management(agent)
+    assert agent.messages[0]["content"][0]["text"] == PLACEHOLDER_TEXT
+    assert wait_for(lambda: memory.stats()["summaries"] == 1)
+    # The finished summary replaces the placeholder before the next turn
+    memory.apply_management(agent)
+    assert agent.messages[0]["content"][0]["text"].startswith(SUMMARY_PREFIX)
+    assert memory.stats()["summary_tokens"] > 0
+
+def test_failed_summary_keeps_the_placeholder():
+    memory = TokenBudgetConversationManager(max_tokens=500)
+    agent = conversation(6, FailingModel())
+    memory.apply_management(agent)
+    assert wait_for(lambda: memory.stats()["summary_failures"] == 1 and not memory.stats()["summarizing"])
+    memory.apply_management(agent)
+    assert agent.messages[0]["content"][0]["text"] == PLACEHOLDER_TEXT
@@ -0,0 +1,46 @@
+from clients.load_balancer import Dispatcher, reported_load
+
+def instance(url, weight=1.0, **load):
+    return {"name": "weather", "url": url, "instance_id": url, "weight": weight, "load": load}
+
+def dispatcher(strategy, *instances):
+    dispatcher = Dispatcher(strategy)
+    dispatcher.update(list(instances))
+    return dispatcher
+
+def test_wrr_interleaves_replicas_in_proportion_to_weight():
+    wrr = dispatcher("wrr", instance("http://a", weight=3), instance("http://b"))
+    assert [wrr.pick("weather").url for _ in range(8)] == ["http://a", "http://a", "http://b", "http://a"] * 2
+
+def test_p2c_steers_away_from_reported_and_outstanding_load():
+    p2c = dispatcher("p2c", instance("http://a", in_flight=8), instance("http://b"))
+    assert {p2c.pick("weather").url for _ in range(10)} == {"http://b"}
+
+    p2c.update([instance("http://a"), instance("http://b")])
+    busy = p2c.pick("weather")
+    with p2c.track(busy):
+        assert p2c.pick("weather").url != busy.url
+    assert busy.dispatched == 1 and busy.outstanding == 0
+
+def test_update_keeps_counters_of_replicas_still_registered():
+    p2c = dispatcher("p2c", instance("http://a"), instance("http://b"))
+    replica = p2c.pick("weather", exclude={"http://b"})
+    with p2c.track(replica):
+        p2c.update([instance("http://a", in_flight=4)])
+        [stats] = p2c.stats()["weather"]
+        assert stats["url"] == "http://a" and stats["outstanding"] == 1
+    assert p2c.stats()["weather"][0]["outstanding"] == 0
+
+def test_pick_skips_excluded_replicas():
+    wrr = dispatcher("wrr", instance("http://a"), instance("http://b"))
+    assert wrr.pick("weather", exclude={"http://a"}).url == "http://b"
+    assert wrr.pick("weather", exclude={"http://a", "http://b"}) is None
+    assert wrr.pick("booking") is None
+
+def test_replicas_on_one_load_level_compare_equal():
+    # Both were published on reaching level 2 (4-7), one as it entered and one as it jumped in
+    entered = {"name": "weather", "url": "http://a", "load": {"in_flight": 4}}
+    jumped = {"name": "weather", "url": "http://b", "load": {"in_flight": 7}}
+    assert reported_load(entered) == reported_load(jumped) == 4
+    assert reported_load({"name": "weather", "url": "http://c", "load": {"in_flight": 8}}) == 8
+    assert reported_load({"name": "weather", "url": "http://d", "load": {"in_flight": 1, "queue_depth": 3}}) == 2
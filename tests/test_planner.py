@@ -0,0 +1,73 @@
+import asyncio
+import time
+import pytest
+from clients.planner import Planner, split_clauses
+from clients.prerouter import PreRouter
+
+AGENTS = [
+    {"name": "weather_agent", "description": "Weather forecasts and current conditions",
+     "capabilities": ["weather", "forecast", "temperature"]},
+    {"name": "booking_agent", "description": "Hotel, restaurant and event reservations",
+     "capabilities": ["hotel", "restaurant", "booking", "reservation"]},
+]
+INDEPENDENT = "Book a hotel in Rome and what is the weather forecast in Rome?"
+DEPENDENT = "What is the weather in Paris, then book a hotel there"
+
+@pytest.fixture
+def prerouter():
+    prerouter = PreRouter()
+    prerouter.build(AGENTS)
+    return prerouter
+
+def test_split_clauses_marks_dependent_parts():
+    assert split_clauses(DEPENDENT) == [("What is the weather in Paris", False), ("book a hotel there", True)]
+    assert split_clauses("Book a hotel. If it rains, book a table") == [("Book a hotel", False),
+                                                                      ("If it rains, book a table", True)]
+
+def test_plan_splits_by_agent_and_keeps_dependencies(prerouter):
+    planner = Planner()
+    independent = planner.plan(INDEPENDENT, prerouter)
+    assert [(t.agent, t.depends_on) for t in independent.tasks] == [("booking_agent", ()), ("weather_agent", ())]
+    dependent = planner.plan(DEPENDENT, prerouter)
+    assert [(t.agent, t.depends_on) for t in dependent.tasks] == [("weather_agent", ()), ("booking_agent", (0,))]
+
+@pytest.mark.parametrize("question", [
+    "What is the weather forecast?",                  # one clause
+    "Book a hotel in Rome. Also book a restaurant",   # one agent
+    "Book a hotel in Rome and tell me a joke",        # a part nobody can place
+])
+def test_single_agent_questions_are_not_planned(prerouter, question):
+    assert Planner().plan(question, prerouter) is None
+
+def test_independent_parts_run_concurrently(prerouter):
+    planner = Planner()
+
+    async def call(agent, message, deadline):
+        await asyncio.sleep(0.2)
+        return f"{agent} done"
+
+    start = time.perf_counter()
+    results = asyncio.run(planner.execute(planner.plan(INDEPENDENT, prerouter), call, None))
+    assert time.perf_counter() - start < 0.35
+    assert [r.answer for r in results] == ["booking_agent done", "weather_agent done"]
+    assert planner.report()["avg_speedup"] > 1.5
+
+def test_dependent_part_sees_the_earlier_answer_or_is_skipped(prerouter):
+    planner = Planner()
+    plan = planner.plan(DEPENDENT, prerouter)
+    messages = {}
+
+    async def call(agent, message, deadline):
+        messages[agent] = message
+        return "Sunny"
+
+    asyncio.run(planner.execute(plan, call, None))
+    assert "- What is the weather in Paris: Sunny" in messages["booking_agent"]
+
+    async def failing(agent, message, deadline):
+        raise ConnectionError("weather agent down")
+
+    results = asyncio.run(planner.execute(plan, failing, None))
+    assert results[0].error == "weather agent down"
+    assert results[1].error.startswith("skipped because") and results[1].seconds == 0.0
+    assert "No answer from weather_agent" in Planner.merge(results)
@@ -0,0 +1,40 @@
+import pytest
+from clients.prerouter import PreRouter, tokenize
+
+AGENTS = [
+    {"name": "weather_agent", "description": "Weather forecasts and current conditions",
+     "capabilities": ["weather", "forecast", "temperature"]},
+    {"name": "booking_agent", "description": "Hotel, restaurant and event reservations",
+     "capabilities": ["hotel", "restaurant", "booking", "reservation"]},
+]
+
+@pytest.fixture
+def router():
+    router = PreRouter()
+    router.build(AGENTS)
+    return router
+
+def test_tokenize_drops_stopwords_and_shares_stems():
+    assert tokenize("What are the bookings for booking_agent?") == ["book", "book", "agent"]
+
+@pytest.mark.parametrize("question,agent", [
+    ("What's the weather forecast in Paris?", "weather_agent"),
+    ("Book a hotel in Rome", "booking_agent"),
+    ("Reservations for two restaurants", "booking_agent"),
+])
+def test_confident_questions_are_routed_locally(router, question, agent):
+    decision = router.route(question)
+    assert decision.agent == agent and decision.score >= router.min_score
+    assert decision.score - decision.runner_up >= router.min_margin
+
+@pytest.mark.parametrize("question", [
+    "Book a hotel and tell me the weather",   # two agents share the question
+    "Tell me a joke",                         # no agent knows any of its words
+])
+def test_unclear_questions_defer_to_the_llm_router(router, question):
+    assert router.route(question) is None
+
+def test_rebuild_replaces_the_index(router):
+    router.build(AGENTS[:1])
+    assert router.agents == ["weather_agent"]
+    assert router.route("Book a hotel in Rome") is None
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+import httpx
+import requests
+from registry.agent_registry import AgentRegistry
+from registry.registry_client import AsyncRegistryClient, RegistryClient
+
+def registry_client(registry):
+    """Async registry client talking to `registry` in-process"""
+    client = AsyncRegistryClient("http://registry")
+    client.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=registry.app), base_url="http://registry")
+    return client
+
+def test_heartbeats_follow_the_lease_the_registry_granted():
+    async def scenario():
+        # The registry defaults the lease to 0.3s; the registration asks for none
+        registry = AgentRegistry(default_ttl=0.3)
+        client = registry_client(registry)
+        registered = await client.register_agent("weather", "Weather agent", "http://weather")
+        assert registered["ttl"] == 0.3
+        client.start_heartbeat("weather")
+        for _ in range(8):
+            await asyncio.sleep(0.1)
+            assert registry.store.expire() == []
+        assert registry.store.count() == 1
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+class FakeListings:
+    """Stands in for RegistryClient._fetch_agents: returns the current listing, or
+    raises while the registry is down; `gate` holds fetches until it is set"""
+
+    def __init__(self):
+        self.agents = [{"name": "weather"}]
+        self.down = False
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, params):
+        self.calls += 1
+        self.gate.wait(5)
+        if self.down:
+            raise requests.exceptions.ConnectionError("registry down")
+        return list(self.agents)
+
+def cached_client(listings, **options):
+    client = RegistryClient("http://registry", cache_ttl=10.0, cache_stale_ttl=60.0, **options)
+    client._fetch_agents = listings
+    return client
+
+def age(client, seconds):
+    """Backdate every cache entry by `seconds`"""
+    for key, (fetched_at, agents) in list(client.cache._entries.items()):
+        client.cache._entries[key] = (fetched_at - seconds, agents)
+
+def test_fresh_listings_are_served_from_the_cache():
+    listings = FakeListings()
+    client = cached_client(listings)
+    assert client.list_agents() == [{"name": "weather"}]
+    listings.agents = [{"name": "booking"}]
+    assert client.list_agents() == [{"name": "weather"}]
+    assert listings.calls == 1
+    assert client.list_agents(use_cache=False) == [{"name": "booking"}]
+    assert client.cache_stats()["hits"] == 1 and client.cache_stats()["misses"] == 1
+
+def test_stale_listing_is_served_while_one_refresh_runs():
+    listings = FakeListings()
+    client = cached_client(listings)
+    client.list_agents()
+    age(client, 15)
+    listings.agents = [{"name": "booking"}]
+    listings.gate.clear()
+    # Stale answers come back at once, and however many there are, one refresh runs
+    assert [client.list_agents() for _ in range(3)] == [[{"name": "weather"}]] * 3
+    listings.gate.set()
+    for _ in range(50):
+        if client.cache_stats()["refreshes"]:
+            break
+        time.sleep(0.02)
+    assert listings.calls == 2 and client.cache_stats()["stale_hits"] == 3
+    assert client.list_agents() == [{"name": "booking"}]
+
+def test_last_known_listing_outlives_the_registry(tmp_path):
+    listings = FakeListings()
+    path = str(tmp_path / "discovery.json")
+    client = cached_client(listings, cache_file=path)
+    client.list_agents()
+    age(client, 1000)
+    listings.down = True
+    assert client.list_agents() == [{"name": "weather"}]
+    assert client.cache_stats()["refresh_failures"] == 1
+    # A restarted process routes from the persisted listing before the registry answers
+    assert cached_client(listings, cache_file=path).list_agents() == [{"name": "weather"}]
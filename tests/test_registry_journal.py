@@ -0,0 +1,79 @@
+import json
+import os
+import time
+from registry.registry_journal import RegistryJournal
+from registry.registry_store import AgentInfo, MemoryStore
+
+def event(revision, name, change_type="register"):
+    agent = {"name": name, "description": name, "url": f"http://{name}", "instance_id": f"{name}@http://{name}"}
+    return {"revision": revision, "type": change_type, "name": name, "instance_id": agent["instance_id"],
+            "agent": agent if change_type != "unregister" else None}
+
+def write_log(journal, *lines):
+    with open(journal.log_path, "w") as f:
+        f.write("".join(lines))
+
+def test_torn_last_line_is_truncated(tmp_path):
+    journal = RegistryJournal(str(tmp_path))
+    good = json.dumps(event(1, "weather")) + "\n" + json.dumps(event(2, "booking")) + "\n"
+    write_log(journal, good, '{"revision": 3, "type": "reg')
+    agents, revision = journal.load()
+    assert sorted(a["name"] for a in agents.values()) == ["booking", "weather"]
+    assert revision == 2
+    with open(journal.log_path) as f:
+        assert f.read() == good
+
+def test_events_after_recovery_start_on_a_clean_line(tmp_path):
+    journal = RegistryJournal(str(tmp_path))
+    write_log(journal, json.dumps(event(1, "weather")) + "\n", '{"torn')
+    journal.load()
+    journal.start()
+    journal.append(event(2, "booking"))
+    journal.close()
+    agents, revision = RegistryJournal(str(tmp_path)).load()
+    assert sorted(a["name"] for a in agents.values()) == ["booking", "weather"]
+    assert revision == 2
+
+def test_log_events_covered_by_the_snapshot_are_skipped(tmp_path):
+    journal = RegistryJournal(str(tmp_path))
+    with open(journal.snapshot_path, "w") as f:
+        json.dump({"revision": 2, "agents": {"weather@http://weather": event(1, "weather")["agent"]}}, f)
+    # Crash between the snapshot rename and the log truncate: the log repeats revisions 1-2
+    write_log(journal, *(json.dumps(e) + "\n" for e in
+                         [event(1, "weather"), event(2, "booking"), event(3, "weather", "unregister")]))
+    agents, revision = journal.load()
+    assert [a["name"] for a in agents.values()] == []
+    assert revision == 3
+
+def test_store_restores_from_compacted_journal(tmp_path):
+    store = MemoryStore(journal=RegistryJournal(str(tmp_path), snapshot_every=2))
+    store.start()
+    for name in ("weather", "booking", "events"):
+        store.register(AgentInfo(name=name, description=name, url=f"http://{name}", ttl=30.0,
+                                 registered_at=time.time()))
+    store.unregister("events")
+    store.close()
+    assert os.path.exists(os.path.join(tmp_path, "snapshot.json"))
+    restored = MemoryStore(journal=RegistryJournal(str(tmp_path)))
+    assert sorted(a.name for a in restored.list_all()) == ["booking", "weather"]
+    assert restored.revision() == store.revision()
+
+def test_writer_failure_degrades_instead_of_hanging(tmp_path, monkeypatch):
+    journal = RegistryJournal(str(tmp_path))
+    store = MemoryStore(journal=journal)
+    store.start()
+
+    def failing_fsync(fd):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr("registry.registry_journal.os.fsync", failing_fsync)
+    store.register(AgentInfo(name="weather", description="w", url="http://w", registered_at=0.0, ttl=30.0))
+    journal._thread.join(timeout=5)
+    assert not journal._thread.is_alive()
+    assert "No space left" in journal.error
+
+    # Later writes are dropped rather than queued, and shutdown doesn't wait on the dead writer
+    store.register(AgentInfo(name="booking", description="b", url="http://b", registered_at=0.0, ttl=30.0))
+    assert journal._queue.empty() and journal.dropped == 1
+    assert "not persisted" in store.degraded()
+    store.close()
@@ -0,0 +1,97 @@
+import time
+from registry.registry_store import AgentInfo, MemoryStore, load_level
+
+def agent(name="weather", url="http://localhost:8080", ttl=30.0, **fields):
+    return AgentInfo(name=name, description=f"{name} agent", url=url, ttl=ttl, **fields)
+
+def test_expire_removes_only_lapsed_leases():
+    store = MemoryStore()
+    store.register(agent("weather", ttl=0.01))
+    store.register(agent("booking", url="http://localhost:8081", ttl=60.0))
+    time.sleep(0.02)
+    assert store.expire() == ["weather@http://localhost:8080"]
+    assert [a.name for a in store.list_all()] == ["booking"]
+    assert store.query(["weather"])[0] == []
+
+def test_heartbeat_supersedes_the_old_heap_entry():
+    store = MemoryStore()
+    store.register(agent(ttl=0.05))
+    time.sleep(0.03)
+    store.heartbeat("weather")
+    time.sleep(0.03)
+    # The original deadline has passed, but the renewed lease hasn't
+    assert store.expire() == []
+    assert store.count() == 1
+    assert 0 < store.next_expiry() <= 0.05
+
+def test_unregistered_instance_is_not_expired_again():
+    store = MemoryStore()
+    store.register(agent(ttl=0.01))
+    store.unregister("weather")
+    time.sleep(0.02)
+    assert store.expire() == []
+    assert not store._lease_heap
+
+def test_reregistration_keeps_only_the_newest_lease():
+    store = MemoryStore()
+    store.register(agent(ttl=0.01))
+    store.register(agent(ttl=60.0))
+    time.sleep(0.02)
+    assert store.expire() == []
+    assert store.get("weather") is not None
+
+def test_next_expiry_is_none_without_leases():
+    assert MemoryStore().next_expiry() is None
+
+def test_changes_since_returns_deltas_and_detects_gaps():
+    store = MemoryStore()
+    store.register(agent("weather"))
+    store.register(agent("booking", url="http://localhost:8081"))
+    store.unregister("weather")
+    assert [c["type"] for c in store.changes_since(1)] == ["register", "unregister"]
+    assert store.changes_since(store.revision()) == []
+    assert store.changes_since(store.revision() + 1) is None
+
+def test_load_jitter_does_not_create_revisions():
+    store = MemoryStore()
+    store.register(agent())
+    revision = store.revision()
+    assert not store.update_load("weather", None, {"in_flight": 1, "queue_depth": 0})
+    assert not store.update_load("weather", None, {"in_flight": 0})
+    assert store.revision() == revision
+    assert store.update_load("weather", None, {"in_flight": 5})
+    assert store.revision() == revision + 1
+    assert store.get("weather").load == {"in_flight": 5}
+
+def test_load_level_steps_in_powers_of_two():
+    assert load_level({"in_flight": 0, "queue_depth": 1}) == {}
+    assert load_level({"in_flight": 2}) == load_level({"in_flight": 3}) == {"in_flight": 1}
+    assert load_level({"in_flight": 4}) == load_level({"in_flight": 7}) == {"in_flight": 2}
+
+def walk(store, limit, capabilities=None):
+    """Every page of a query, following cursors"""
+    pages, cursor = [], None
+    while True:
+        page, cursor = store.query(capabilities, limit=limit, cursor=cursor)
+        pages.append([a.instance_id for a in page])
+        if cursor is None:
+            return pages
+
+def test_cursor_paging_visits_every_instance_once_in_order():
+    store = MemoryStore()
+    for i in (3, 1, 4, 0, 2):
+        store.register(agent("weather", url=f"http://replica-{i}"))
+    store.unregister("weather", "weather@http://replica-4")
+    ids = [f"weather@http://replica-{i}" for i in range(4)]
+    assert walk(store, 3) == [ids[:3], ids[3:]]
+    assert walk(store, 2) == [ids[:2], ids[2:]]
+    assert walk(store, 10) == [ids]
+    assert store.query(limit=None, cursor=ids[1])[0] == [store.agents[i] for i in ids[2:]]
+    assert store.sorted_ids == ids
+
+def test_capability_paging_follows_the_index():
+    store = MemoryStore()
+    for i in range(5):
+        store.register(agent("weather" if i % 2 else "booking", url=f"http://replica-{i}",
+                             capabilities=["forecast"] if i % 2 else ["hotel"]))
+    assert walk(store, 1, ["forecast"]) == [["weather@http://replica-1"], ["weather@http://replica-3"]]
@@ -0,0 +1,200 @@
+import asyncio
+import time
+import httpx
+import pytest
+from clients.load_balancer import Dispatcher
+from clients.resilience import (MIN_HEDGE_SAMPLES, CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded,
+                                ResiliencePolicy, until_deadline)
+
+URLS = ("http://a", "http://b")
+
+def dispatcher(*urls):
+    # Round-robin over equal weights picks replicas in registration order
+    dispatcher = Dispatcher("wrr")
+    dispatcher.update([{"name": "weather", "url": url, "instance_id": url} for url in urls or URLS])
+    return dispatcher
+
+def sender(behaviour):
+    """send(url, remaining) whose outcome per url comes from `behaviour`: an
+    exception is raised, a number is a delay before answering with the url"""
+    calls = []
+
+    async def send(url, remaining):
+        calls.append(url)
+        outcome = behaviour[url]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        await asyncio.sleep(outcome)
+        return url
+
+    send.calls = calls
+    return send
+
+def read_timeout():
+    return httpx.ReadTimeout("timed out")
+
+def connect_error():
+    return httpx.ConnectError("connection refused")
+
+def call(policy, send, deadline=1.0, **kwargs):
+    return asyncio.run(policy.call(dispatcher(), "weather", send, Deadline(deadline), **kwargs))
+
+# Circuit breaker
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+def test_failed_probe_reopens_and_abandoned_probe_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_abandoned()
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.available()
+
+# Failover
+
+def test_idempotent_call_fails_over_after_any_failure():
+    policy = ResiliencePolicy()
+    send = sender({"http://a": read_timeout(), "http://b": 0})
+    assert call(policy, send) == "http://b"
+    assert send.calls == ["http://a", "http://b"]
+    assert policy.stats["failovers"] == 1
+
+def test_non_idempotent_call_is_not_repeated_after_it_may_have_run():
+    policy = ResiliencePolicy()
+    send = sender({"http://a": read_timeout(), "http://b": 0})
+    with pytest.raises(httpx.ReadTimeout):
+        call(policy, send, idempotent=False)
+    assert send.calls == ["http://a"]
+    assert policy.stats["failovers"] == 0
+
+@pytest.mark.parametrize("error", [
+    connect_error(),
+    httpx.HTTPStatusError("busy", request=httpx.Request("POST", "http://a"),
+                          response=httpx.Response(429, request=httpx.Request("POST", "http://a"))),
+])
+def test_non_idempotent_call_fails_over_when_never_delivered(error):
+    policy = ResiliencePolicy()
+    send = sender({"http://a": error, "http://b": 0})
+    assert call(policy, send, idempotent=False) == "http://b"
+    assert policy.stats["failovers"] == 1
+
+def test_last_error_is_raised_when_every_replica_fails():
+    policy = ResiliencePolicy()
+    send = sender({"http://a": connect_error(), "http://b": read_timeout()})
+    with pytest.raises(httpx.ReadTimeout):
+        call(policy, send)
+    assert send.calls == ["http://a", "http://b"]
+
+def test_open_circuits_are_skipped_then_rejected():
+    policy = ResiliencePolicy(failure_threshold=1, reset_timeout=60)
+    failing = sender({"http://a": connect_error(), "http://b": connect_error()})
+    with pytest.raises(httpx.ConnectError):
+        call(policy, failing)
+    working = sender({"http://a": 0, "http://b": 0})
+    with pytest.raises(CircuitOpenError):
+        call(policy, working)
+    assert working.calls == []
+    assert policy.report()["open_circuits"] == list(URLS)
+
+def test_deadline_bounds_the_call():
+    policy = ResiliencePolicy()
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        call(policy, sender({"http://a": 5, "http://b": 5}), deadline=0.1)
+    assert time.monotonic() - started < 1
+    assert policy.stats["deadline_exceeded"] == 1
+    # Losing to the deadline says nothing about the replica's health
+    assert all(b.state == CircuitBreaker.CLOSED for b in policy.breakers.values())
+
+class LaggingDeadline(Deadline):
+    """Deadline that reads as expired a little after its time runs out, as when
+    asyncio.wait's timeout fires just before the deadline's own clock passes it"""
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self.expires_at > 0.05
+
+def test_non_idempotent_call_near_its_deadline_is_sent_once():
+    policy = ResiliencePolicy()
+    send = sender({"http://a": 5, "http://b": 0})
+    # The attempt's own timeout may win the race with the deadline
+    with pytest.raises((DeadlineExceeded, asyncio.TimeoutError)):
+        asyncio.run(policy.call(dispatcher(), "weather", send, LaggingDeadline(0.05), idempotent=False))
+    assert send.calls == ["http://a"]
+    assert policy.stats["hedges"] == 0
+
+# Hedging
+
+def learned_policy(latency=0.01):
+    policy = ResiliencePolicy(hedge=True)
+    for _ in range(MIN_HEDGE_SAMPLES):
+        policy.record("weather", "http://a", time.perf_counter() - latency, None)
+    return policy
+
+def test_slow_attempt_is_hedged_and_the_first_answer_wins():
+    policy = learned_policy()
+    send = sender({"http://a": 1.0, "http://b": 0})
+    started = time.monotonic()
+    assert call(policy, send) == "http://b"
+    assert time.monotonic() - started < 0.5
+    assert policy.stats["hedges"] == 1 and policy.stats["hedge_wins"] == 1
+    # The cancelled loser is neither a failure nor a stuck probe
+    assert policy.breaker("http://a").state == CircuitBreaker.CLOSED
+
+def test_no_hedge_before_enough_latency_samples():
+    policy = ResiliencePolicy(hedge=True)
+    send = sender({"http://a": 0.05, "http://b": 0})
+    assert call(policy, send) == "http://a"
+    assert policy.stats["hedges"] == 0
+
+def test_non_idempotent_call_is_never_hedged():
+    policy = learned_policy()
+    send = sender({"http://a": 0.1, "http://b": 0})
+    assert call(policy, send, idempotent=False) == "http://a"
+    assert send.calls == ["http://a"]
+    assert policy.stats["hedges"] == 0
+
+# Deadlines on awaits that must stay in the current task
+
+def test_until_deadline_raises_and_leaves_the_task_usable():
+    async def scenario():
+        with pytest.raises(DeadlineExceeded):
+            await until_deadline(asyncio.sleep(5), Deadline(0.05))
+        # The deadline's cancellation was consumed: the task carries on normally
+        await asyncio.sleep(0.01)
+        return await until_deadline(asyncio.sleep(0, "done"), Deadline(1))
+
+    assert asyncio.run(scenario()) == "done"
+
+def test_until_deadline_passes_through_outside_cancellation():
+    async def scenario():
+        task = asyncio.create_task(until_deadline(asyncio.sleep(5), Deadline(5)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+import time
+import pytest
+from clients.response_cache import CapabilityTTLPolicy, LRUResponseCache, SQLiteResponseCache, normalize_question
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return LRUResponseCache(max_entries=2)
+    return SQLiteResponseCache(str(tmp_path / "responses.db"), max_entries=2)
+
+def test_normalize_question_ignores_case_punctuation_and_spacing():
+    assert normalize_question("  What's the Weather in PARIS?? ") == normalize_question("whats the weather in paris")
+
+def test_shortest_capability_ttl_wins():
+    policy = CapabilityTTLPolicy(default_ttl=60.0)
+    assert policy.ttl_for(["forecasts"]) == 900.0
+    assert policy.ttl_for(["weather_info", "forecasts"]) == 300.0
+    # One action-taking capability disables caching for the agent
+    assert policy.ttl_for(["weather_info", "hotel_booking"]) == 0.0
+    assert policy.ttl_for(["unknown"]) == policy.ttl_for([]) == 60.0
+
+def test_hits_are_per_agent_and_normalized(cache):
+    cache.set("What's the weather in Paris?", "weather", "Sunny", ttl=60)
+    assert cache.get("whats the weather in paris", "weather") == "Sunny"
+    assert cache.get("What's the weather in Paris?", "booking") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+def test_zero_ttl_is_never_stored_and_expired_entries_miss(cache):
+    cache.set("Book a hotel", "booking", "Booked", ttl=0)
+    cache.set("Weather?", "weather", "Sunny", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("Book a hotel", "booking") is None and cache.get("Weather?", "weather") is None
+    assert cache.stats["stores"] == 1
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("one", "weather", "1", ttl=60)
+    time.sleep(0.01)
+    cache.set("two", "weather", "2", ttl=60)
+    time.sleep(0.01)
+    assert cache.get("one", "weather") == "1"
+    time.sleep(0.01)
+    cache.set("three", "weather", "3", ttl=60)
+    assert cache.get("two", "weather") is None
+    assert cache.get("one", "weather") == "1" and cache.get("three", "weather") == "3"
+    assert cache.stats["evictions"] == 1
+
+def test_invalidate_by_question_agent_or_everything(cache):
+    cache.set("Weather?", "weather", "Sunny", ttl=60)
+    cache.set("Weather?", "backup", "Rain", ttl=60)
+    assert cache.invalidate(question="weather") == 2
+    cache.set("Weather?", "weather", "Sunny", ttl=60)
+    cache.set("Forecast?", "weather", "Mild", ttl=60)
+    assert cache.invalidate(agent="backup") == 0
+    assert cache.invalidate(question="Forecast?", agent="weather") == 1
+    assert cache.invalidate() == 1
+    assert cache.get("Weather?", "weather") is None
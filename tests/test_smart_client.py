@@ -0,0 +1,221 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from clients.smart_client import SmartA2AClient
+from common.stub_model import StubModel
+
+class SlowAgent:
+    """Routing agent stand-in whose answers wait until released"""
+
+    def __init__(self):
+        self.released = asyncio.Event()
+        self.questions = []
+
+    async def invoke_async(self, question, invocation_state=None):
+        self.questions.append(question)
+        await self.released.wait()
+        return f"answer to {question}"
+
+class QuickAgent:
+    """Routing agent stand-in that answers after a short wait, so concurrent turns contend"""
+
+    async def invoke_async(self, question, invocation_state=None):
+        await asyncio.sleep(0.02)
+        return f"answer to {question}"
+
+    async def stream_async(self, question, invocation_state=None):
+        await asyncio.sleep(0.02)
+        for word in ("answer", " to ", question):
+            yield {"data": word}
+
+@pytest.fixture
+def client(monkeypatch):
+    client = SmartA2AClient(agent_urls=[], planner=False)
+    monkeypatch.setattr(client, "_build_router_agent", lambda *args, **kwargs: SlowAgent())
+    yield client
+    client.close()
+
+def test_cancelled_waiter_does_not_leak_the_conversation_lock(client):
+    async def scenario():
+        holder = asyncio.create_task(client._ask_router("first", {}, conversation="alice"))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(client._ask_router("second", {}, conversation="alice"))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        agent, lock = client._conversation("alice")
+        agent.released.set()
+        assert await holder == "answer to first"
+        await asyncio.sleep(0.05)
+        assert not lock.locked()
+        # The conversation still answers: the cancelled waiter left no lock behind
+        assert await asyncio.wait_for(client._ask_router("third", {}, conversation="alice"), 1) == \
+            "answer to third"
+        assert agent.questions == ["first", "third"]
+
+    # On the client's own loop, as the sync and Streamlit entry points run it
+    client._submit(scenario()).result(timeout=5)
+
+def test_conversations_answer_independently(client):
+    async def scenario():
+        alice = asyncio.create_task(client._ask_router("hello", {}, conversation="alice"))
+        await asyncio.sleep(0.05)
+        bob_agent, _ = client._conversation("bob")
+        bob_agent.released.set()
+        # Alice's question in progress doesn't hold up Bob's
+        assert await asyncio.wait_for(client._ask_router("hi", {}, conversation="bob"), 1) == "answer to hi"
+        client._conversation("alice")[0].released.set()
+        await alice
+
+    # On the client's own loop, as the sync and Streamlit entry points run it
+    client._submit(scenario()).result(timeout=5)
+
+@pytest.mark.parametrize("conversation", [None, "alice"])
+def test_async_callers_on_another_loop_share_locks_with_sync_callers(monkeypatch, conversation):
+    client = SmartA2AClient(agent_urls=[], planner=False)
+    monkeypatch.setattr(client, "_build_router_agent", lambda *args, **kwargs: QuickAgent())
+    questions = ["one", "two", "three"]
+    try:
+        async def on_caller_loop():
+            answers = await asyncio.gather(*(client.ask_async(q, conversation=conversation) for q in questions))
+            streamed = [chunk async for chunk in client.stream_async("four", conversation=conversation)]
+            return answers, "".join(streamed)
+
+        # Contended on the caller's loop first, then on the client's loop by sync callers
+        answers, streamed = asyncio.run(on_caller_loop())
+        assert answers == [f"answer to {q}" for q in questions]
+        assert streamed == "answer to four"
+        with ThreadPoolExecutor(len(questions)) as pool:
+            answers = list(pool.map(lambda q: client.ask(q, conversation=conversation), questions))
+        assert answers == [f"answer to {q}" for q in questions]
+        assert "".join(client.stream("five", conversation=conversation)) == "answer to five"
+    finally:
+        client.close()
+
+class HistoryAgent:
+    """Routing agent stand-in that only keeps a history"""
+
+    def __init__(self):
+        self.messages = []
+        self.conversation_manager = self
+
+    def apply_management(self, agent, **kwargs):
+        pass
+
+    async def invoke_async(self, question, invocation_state=None):
+        raise RuntimeError("no routing model here")
+
+AGENTS = [
+    {"name": "weather", "description": "Weather forecasts", "url": "http://weather", "capabilities": ["weather"]},
+    {"name": "booking", "description": "Hotel reservations", "url": "http://booking", "capabilities": ["hotel"]},
+]
+WEATHER = "What's the weather forecast in Paris?"
+
+@pytest.fixture
+def routed_client(monkeypatch):
+    """Client whose weather and hotel questions take the fast path to fake agents"""
+    client = SmartA2AClient(agent_urls=[], planner=False)
+    client._apply_agents(AGENTS)
+    routers = {}
+    monkeypatch.setattr(client, "_build_router_agent",
+                        lambda *args, **kwargs: routers.setdefault(len(routers), HistoryAgent()))
+    client.sent = []
+
+    async def send_async(url, text, context_id=None, timeout=None, deadline=None):
+        client.sent.append((url, context_id))
+        return f"{url} says hi"
+
+    monkeypatch.setattr(client.transport, "send_async", send_async)
+    yield client
+    client.close()
+
+def recorded_turns(client, conversation):
+    async def settle():
+        while client._pending_turns:
+            await asyncio.gather(*list(client._pending_turns))
+        return client._conversation(conversation)[0].messages
+
+    return client.run(settle())
+
+def test_fast_path_keeps_one_agent_context_per_conversation(routed_client):
+    client = routed_client
+    for conversation in ("alice", "alice", "bob", None, None):
+        client.ask(WEATHER, conversation=conversation)
+    client.ask("Book a hotel in Rome", conversation="alice")
+    alice, again, bob, shared, shared_again, alice_booking = [context for _, context in client.sent]
+    assert alice == again and shared == shared_again
+    assert len({alice, bob, shared, alice_booking}) == 4
+    # Isolated (batch) questions belong to no conversation
+    client.ask_many([WEATHER])
+    assert client.sent[-1] == ("http://weather", None)
+
+def test_fast_path_turns_are_recorded_in_the_conversation(routed_client):
+    routed_client.ask(WEATHER, conversation="alice")
+    assert recorded_turns(routed_client, "alice") == [
+        {"role": "user", "content": [{"text": WEATHER}]},
+        {"role": "assistant", "content": [{"text": "http://weather says hi"}]},
+    ]
+    assert recorded_turns(routed_client, "bob") == []
+
+def test_streamed_fast_path_uses_the_conversation_context(routed_client, monkeypatch):
+    client = routed_client
+
+    async def stream_async(url, text, context_id=None, timeout=None, deadline=None):
+        client.sent.append((url, context_id))
+        for chunk in ("sunny ", "all day"):
+            yield chunk
+
+    monkeypatch.setattr(client.transport, "stream_async", stream_async)
+    client.ask(WEATHER, conversation="alice")
+    assert "".join(client.stream(WEATHER, conversation="alice")) == "sunny all day"
+    assert client.sent[0] == client.sent[1]
+    assert recorded_turns(client, "alice")[-1] == {"role": "assistant", "content": [{"text": "sunny all day"}]}
+
+def test_ask_many_bounds_concurrency_and_reports_failures_in_place(routed_client, monkeypatch):
+    client = routed_client
+    running = {"now": 0, "peak": 0}
+
+    async def send_async(url, text, context_id=None, timeout=None, deadline=None):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            running["now"] -= 1
+        if "Tokyo" in text:
+            raise ConnectionError("weather agent down")
+        return f"forecast for {text.split()[-1]}"
+
+    monkeypatch.setattr(client.transport, "send_async", send_async)
+    cities = ["Paris?", "Rome?", "Tokyo?", "Oslo?", "Lima?"]
+    results = client.ask_many([f"What's the weather forecast in {city}" for city in cities], max_concurrency=2)
+    assert running["peak"] == 2
+    assert [r.index for r in results] == list(range(len(cities)))
+    assert [r.answer for r in results if r.error is None] == [f"forecast for {c}" for c in cities if c != "Tokyo?"]
+    # The failed fast path falls back to the routing agent, which can't answer either
+    assert results[2].answer is None and results[2].error == "no routing model here"
+    # In completion order, every question is still answered once
+    unordered = list(client.ask_many([f"What's the weather forecast in {c}" for c in cities], ordered=False))
+    assert sorted(r.index for r in unordered) == list(range(len(cities)))
+
+def test_agent_set_changes_swap_tools_without_rebuilding_the_router():
+    client = SmartA2AClient(agent_urls=[], planner=False,
+                            model=StubModel(latency=0, tokens_per_second=10000, use_tools=False))
+    try:
+        client._apply_agents(AGENTS)
+        router = client.client_agent
+        router.messages.append({"role": "user", "content": [{"text": "earlier turn"}]})
+        events = {"name": "events", "description": "Concert tickets", "url": "http://events",
+                  "capabilities": ["tickets"]}
+        assert client._apply_agents([AGENTS[0], events]) == (["events"], ["booking"], 1)
+        assert client.client_agent is router and len(router.messages) == 1
+        assert set(router.tool_registry.registry) == {"ask_weather", "ask_events"}
+        assert client.prerouter.route("Two concert tickets please").agent == "events"
+        # New replicas and load hints leave the tools and the pre-router alone
+        prerouter = client.prerouter
+        replica = dict(AGENTS[0], url="http://weather-2", instance_id="weather@2", load={"in_flight": 4})
+        assert client._apply_agents([AGENTS[0], replica, events]) == ([], [], 0)
+        assert client.prerouter is prerouter and len(client.dispatcher.stats()["weather"]) == 2
+    finally:
+        client.close()
@@ -0,0 +1,66 @@
+import asyncio
+import httpx
+from strands import Agent
+from common.stub_model import StubModel
+from common.telemetry import Metrics, ModelMetrics, instrument
+from registry.agent_registry import AgentRegistry
+
+def samples(metrics):
+    """Sample lines of a scrape, by name and labels"""
+    return dict(line.rsplit(" ", 1) for line in metrics.render().splitlines() if not line.startswith("#"))
+
+def test_render_uses_the_prometheus_text_format():
+    metrics = Metrics(prefix="test")
+    metrics.counter("jobs_total", "Jobs", ["status"]).inc("ok", amount=2)
+    metrics.gauge("depth", "Queue depth", fn=lambda: 3)
+    latency = metrics.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    text = metrics.render()
+    assert "# TYPE test_jobs_total counter" in text and "# TYPE test_latency_seconds histogram" in text
+    lines = samples(metrics)
+    assert lines['test_jobs_total{status="ok"}'] == "2" and lines["test_depth"] == "3"
+    assert lines['test_latency_seconds_bucket{le="0.1"}'] == "1"
+    assert lines['test_latency_seconds_bucket{le="1"}'] == "2"
+    assert lines['test_latency_seconds_bucket{le="+Inf"}'] == "2"
+    assert lines["test_latency_seconds_sum"] == "0.55" and lines["test_latency_seconds_count"] == "2"
+
+def test_registering_a_metric_twice_shares_it():
+    metrics = Metrics()
+    assert metrics.counter("jobs_total", "Jobs") is metrics.counter("jobs_total", "Jobs")
+
+def test_requests_are_counted_by_route_template():
+    async def scenario():
+        metrics = Metrics()
+        registry = AgentRegistry(metrics=metrics)
+        transport = httpx.ASGITransport(app=registry.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://registry") as client:
+            await client.post("/register", json={"name": "weather", "description": "w", "url": "http://w"})
+            await client.get("/agents/weather")
+            await client.get("/agents/booking")
+            scrape = await client.get("/metrics")
+        return metrics, scrape
+
+    metrics, scrape = asyncio.run(scenario())
+    assert scrape.status_code == 200 and scrape.headers["content-type"].startswith("text/plain")
+    lines = samples(metrics)
+    assert lines['a2a_http_requests_total{method="GET",route="/agents/{agent_name}",status="200"}'] == "1"
+    assert lines['a2a_http_requests_total{method="GET",route="/agents/{agent_name}",status="404"}'] == "1"
+    assert lines["a2a_http_requests_in_flight"] == "0" and lines["a2a_registry_agents"] == "1"
+
+def test_uninstrumented_app_is_returned_as_is():
+    async def app(scope, receive, send):
+        pass
+
+    assert instrument(app) is app
+
+def test_model_metrics_count_invocations_and_model_calls():
+    metrics = Metrics()
+    agent = Agent(model=StubModel(latency=0, tokens_per_second=10000, reply_tokens=5, use_tools=False),
+                  hooks=[ModelMetrics(metrics)], callback_handler=None)
+    agent("Hello there")
+    agent("And again")
+    lines = samples(metrics)
+    assert lines["a2a_agent_invocations_total"] == "2"
+    assert lines['a2a_model_calls_total{status="ok"}'] == "2"
+    assert lines["a2a_model_call_duration_seconds_count"] == "2"
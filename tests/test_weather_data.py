@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from agents.weather_data import FixtureWeatherProvider, WeatherLookup, WeatherProvider, normalize_location, weather_tool
+
+class GatedProvider(WeatherProvider):
+    """Answers every location after `gate` opens; fails the first `failures` calls"""
+
+    name = "gated"
+
+    def __init__(self, failures=0):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.failures = failures
+        self.calls = []
+
+    def fetch(self, location):
+        self.calls.append(location)
+        self.gate.wait(5)
+        if len(self.calls) <= self.failures:
+            raise ConnectionError("upstream down")
+        return None if location == "Atlantis" else {"location": location}
+
+def test_normalize_location_ignores_case_spacing_and_punctuation():
+    assert normalize_location("  Paris,  FR ") == normalize_location("paris, fr") == "paris, fr"
+    assert normalize_location("St. John's") == "st johns"
+
+def test_fixture_provider_resolves_aliases_and_countries():
+    provider = FixtureWeatherProvider()
+    assert provider.fetch("NYC")["location"] == provider.fetch("new york")["location"]
+    assert provider.fetch("Paris, France")["location"] == provider.fetch("Paris")["location"]
+    assert len(provider.fetch("Tokyo")["forecast"]) > 0 and provider.fetch("Atlantis") is None
+
+def test_lookups_are_cached_per_location_and_bucket(monkeypatch):
+    provider = GatedProvider()
+    lookup = WeatherLookup(provider, bucket_seconds=600)
+    monkeypatch.setattr("agents.weather_data.time.time", lambda: 1000.0)
+    assert lookup.get("Paris") == lookup.get(" paris ") == {"location": "Paris"}
+    # Unknown locations are cached too
+    assert lookup.get("Atlantis") is None and lookup.get("atlantis") is None
+    assert provider.calls == ["Paris", "Atlantis"]
+    monkeypatch.setattr("agents.weather_data.time.time", lambda: 1700.0)
+    lookup.get("Paris")
+    assert provider.calls == ["Paris", "Atlantis", "Paris"]
+    # Entries of the past bucket are gone
+    assert lookup.report()["entries"] == 1
+
+def test_concurrent_misses_share_one_provider_call():
+    provider = GatedProvider()
+    provider.gate.clear()
+    lookup = WeatherLookup(provider)
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(lookup.get, "Paris") for _ in range(8)]
+        while lookup.report()["lookups"] < 8:
+            time.sleep(0.01)
+        provider.gate.set()
+        assert [f.result() for f in futures] == [{"location": "Paris"}] * 8
+    report = lookup.report()
+    assert provider.calls == ["Paris"] and report["coalesced"] == 7 and report["hit_rate"] == pytest.approx(7 / 8)
+
+def test_provider_errors_are_not_cached():
+    lookup = WeatherLookup(GatedProvider(failures=1))
+    with pytest.raises(ConnectionError):
+        lookup.get("Paris")
+    assert lookup.get("Paris") == {"location": "Paris"}
+    assert lookup.report()["provider_errors"] == 1
+
+def test_weather_tool_reports_unknown_and_failing_locations():
+    get_weather = weather_tool(WeatherLookup(GatedProvider(failures=1)))
+    assert "unavailable" in json.loads(get_weather("Paris"))["error"]
+    assert json.loads(get_weather("Atlantis")) == {"error": "Unknown location: Atlantis"}
+    assert json.loads(get_weather("Paris")) == {"location": "Paris"}
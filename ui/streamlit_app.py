@@ -4,10 +4,23 @@ Simple Streamlit App for Smart A2A Client
 """
 
 import streamlit as st
+import math
 import sys
 import os
+import uuid
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from clients.agent_card_cache import AgentCardCache
 from clients.smart_client import SmartA2AClient
+from common.telemetry import setup_tracing
+
+# Trace each question through routing and the agents: A2A_TRACE=console|otlp (once per process)
+setup_tracing("streamlit_ui", os.environ.get("A2A_TRACE", "off"))
+
+DEFAULT_AGENT_URLS = ("http://localhost:8080", "http://localhost:8081")
+# Messages kept per browser session; older ones are dropped
+MAX_HISTORY = 200
+# Messages rendered per page, so a rerun costs the same however long the conversation
+PAGE_SIZE = 20
 
 # Page config
 st.set_page_config(
@@ -16,11 +29,58 @@ st.set_page_config(
     layout="centered"
 )
 
+@st.cache_resource(show_spinner="Connecting to agents...")
+def connect(urls):
+    """One client per set of agent URLs, shared by every browser session of this
+    process (one connection pool and set of routing tools); each session talks to
+    it under its own conversation id. Routing tools are built in the background, and
+    changed agent cards are picked up while it runs, so it never needs recreating."""
+    client = SmartA2AClient(agent_urls=list(urls), card_cache=AgentCardCache())
+    client.warm_up()
+    client.start_refresh()
+    return client
+
+def new_conversation():
+    """Start the session over: empty history and a fresh routing conversation"""
+    client = st.session_state.get("client")
+    if client is not None and "conversation_id" in st.session_state:
+        client.end_conversation(st.session_state.conversation_id)
+    st.session_state.conversation_id = uuid.uuid4().hex
+    st.session_state.messages = []
+    st.session_state.page = 0
+
+def render_history(messages, page):
+    """Show one page of the history (page 0 is the newest) with older/newer controls"""
+    pages = max(1, math.ceil(len(messages) / PAGE_SIZE))
+    page = min(page, pages - 1)
+    end = len(messages) - page * PAGE_SIZE
+    start = max(0, end - PAGE_SIZE)
+    if pages > 1:
+        older, position, newer = st.columns([1, 2, 1])
+        if older.button("◀ Older", disabled=page >= pages - 1, use_container_width=True):
+            st.session_state.page = page + 1
+            st.rerun()
+        position.caption(f"Messages {start + 1}–{end} of {len(messages)}")
+        if newer.button("Newer ▶", disabled=page == 0, use_container_width=True):
+            st.session_state.page = page - 1
+            st.rerun()
+    for message in messages[start:end]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+def remember(role, content):
+    """Add a message to the session's history, dropping the oldest beyond MAX_HISTORY"""
+    messages = st.session_state.messages
+    messages.append({"role": role, "content": content})
+    del messages[:-MAX_HISTORY]
+
 # Initialize session state
+if "agent_urls" not in st.session_state:
+    st.session_state.agent_urls = DEFAULT_AGENT_URLS
 if "client" not in st.session_state:
     st.session_state.client = None
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "conversation_id" not in st.session_state:
+    new_conversation()
 
 # Title
 st.title("🤖 Smart A2A Assistant")
@@ -29,66 +89,84 @@ st.markdown("Ask questions and get routed to the right specialist agent!")
 # Sidebar for configuration
 with st.sidebar:
     st.header("Configuration")
-    
+
     agent_urls = st.text_area(
-        "Agent URLs (one per line)", 
-        value="http://localhost:8080\nhttp://localhost:8081",
+        "Agent URLs (one per line)",
+        value="\n".join(st.session_state.agent_urls),
         help="URLs of A2A agents"
     )
-    
+
     if st.button("Connect to Agents"):
+        urls = tuple(url.strip() for url in agent_urls.split('\n') if url.strip())
         try:
-            urls = [url.strip() for url in agent_urls.split('\n') if url.strip()]
-            with st.spinner("Connecting to agents..."):
-                st.session_state.client = SmartA2AClient(agent_urls=urls)
+            client = connect(urls)
+            if client is not st.session_state.client:
+                # Another set of agents: the routing conversation starts over
+                new_conversation()
+            st.session_state.agent_urls = urls
+            st.session_state.client = client
             st.success(f"✅ Connected to {len(urls)} agents!")
         except Exception as e:
             st.error(f"❌ Connection failed: {e}")
-    
-    # Auto-connect on first load
+
+    # Auto-connect on first load (shared with every other session using these agents)
     if st.session_state.client is None:
         try:
-            urls = ["http://localhost:8080", "http://localhost:8081"]
-            st.session_state.client = SmartA2AClient(agent_urls=urls)
+            st.session_state.client = connect(st.session_state.agent_urls)
             st.success("🟢 Auto-connected to agents")
-        except:
+        except Exception:
             st.warning("🟡 Not Connected")
-    
+
+    if st.button("New conversation"):
+        new_conversation()
+
     # Status
     if st.session_state.client:
         st.success("🟢 Client Ready")
+        report = st.session_state.client.routing_report()
+        startup = report["startup"]
+        if startup["seconds"] is not None:
+            st.caption(f"🚀 Started in {startup['seconds']:.2f}s "
+                       f"({startup['cards_cached']} agent cards cached, {startup['cards_fetched']} fetched)")
+        if report["streamed"]:
+            st.caption(f"🌊 First token after {report['avg_first_chunk_seconds']:.2f}s, "
+                       f"full answer after {report['avg_full_answer_seconds']:.2f}s "
+                       f"(avg of {report['streamed']})")
+        st.caption(f"👥 Shared client, {report['conversations']} conversations; "
+                   f"this one keeps its last {MAX_HISTORY} messages")
     else:
         st.warning("🟡 Not Connected")
 
 # Main chat interface
 if st.session_state.client:
-    # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-    
-    # Chat input
-    if prompt := st.chat_input("Ask me anything..."):
+    prompt = st.chat_input("Ask me anything...")
+    if prompt:
+        # A new question brings the view back to the latest messages
+        st.session_state.page = 0
+
+    # Display one page of chat history
+    render_history(st.session_state.messages, st.session_state.page)
+
+    if prompt:
         # Add user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        remember("user", prompt)
         with st.chat_message("user"):
             st.markdown(prompt)
-        
-        # Get response from smart client
+
+        # Stream the response from the shared client, in this session's own conversation
         with st.chat_message("assistant"):
-            with st.spinner("Routing to appropriate agent..."):
-                try:
-                    response = st.session_state.client.ask(prompt)
-                    st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-                except Exception as e:
-                    error_msg = f"❌ Error: {e}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+            try:
+                response = st.write_stream(st.session_state.client.stream(
+                    prompt, conversation=st.session_state.conversation_id))
+                remember("assistant", response)
+            except Exception as e:
+                error_msg = f"❌ Error: {e}"
+                st.error(error_msg)
+                remember("assistant", error_msg)
 
 else:
     st.info("👈 Please connect to agents first using the sidebar")
-    
+
     # Sample questions
     st.subheader("Sample Questions")
     st.markdown("""
@@ -100,4 +178,4 @@ else:
 
 # Footer
 st.markdown("---")
-st.markdown("*Powered by Smart A2A Client*")
\ No newline at end of file
+st.markdown("*Powered by Smart A2A Client*")